@@ -0,0 +1,166 @@
+from typing import Any, Dict, List, Optional
+import threading
+import time
+import uuid
+import numpy as np
+
+class SemanticAnswerCache:
+    """
+    Bounded cache of assistant answers to generic questions, looked up by query embedding
+
+    A lookup returns the stored answer whose question embedding has the highest cosine
+    similarity with the new one, provided it reaches threshold and has not outlived
+    ttl_seconds. Entries are evicted least recently used first.
+    """
+
+    def __init__(self, max_entries: int = 500, ttl_seconds: float = 86400, threshold: float = 0.92):
+        """
+        Args:
+            max_entries (int): Answers kept before the least recently used is evicted
+            ttl_seconds (float): Age after which an answer is no longer served
+            threshold (float): Minimum cosine similarity between the questions
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._expired = 0
+        self._evicted = 0
+        self._invalidated = 0
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _purge_expired(self, now: float):
+        expired = [entry_id for entry_id, entry in self._entries.items() if now - entry["created_at"] > self.ttl_seconds]
+        for entry_id in expired:
+            del self._entries[entry_id]
+        if expired:
+            self._expired += len(expired)
+            self._matrix = None
+
+    def _similarities(self, vector: np.ndarray) -> np.ndarray:
+        # The matrix is rebuilt only after the entries changed
+        if self._matrix is None:
+            self._matrix = np.stack([entry["vector"] for entry in self._entries.values()])
+        return self._matrix @ vector
+
+    def get(self, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached answer for the most similar stored question
+
+        Args:
+            embedding (list): Embedding of the new question
+
+        Returns:
+            Dict with id, question, answer and similarity, or None on a miss
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            now = time.time()
+            self._purge_expired(now)
+            if self._entries:
+                scores = self._similarities(vector)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry_id = list(self._entries)[best]
+                    entry = self._entries[entry_id]
+                    entry["hits"] += 1
+                    # Entries keep insertion order to match the matrix rows, so recency is a timestamp
+                    entry["last_used"] = now
+                    self._hits += 1
+                    return {
+                        "id": entry_id,
+                        "question": entry["question"],
+                        "answer": entry["answer"],
+                        "similarity": float(scores[best])
+                    }
+            self._misses += 1
+            return None
+
+    def set(self, question: str, embedding: List[float], answer: str) -> str:
+        """
+        Store an answer under the embedding of its question
+
+        Returns:
+            Entry id, usable with invalidate()
+        """
+        entry_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._entries[entry_id] = {
+                "question": question,
+                "vector": self._normalize(embedding),
+                "answer": answer,
+                "created_at": now,
+                "last_used": now,
+                "hits": 0
+            }
+            self._stores += 1
+            while len(self._entries) > self.max_entries:
+                del self._entries[min(self._entries, key=lambda key: self._entries[key]["last_used"])]
+                self._evicted += 1
+            self._matrix = None
+        return entry_id
+
+    def invalidate(self, entry_id: str) -> bool:
+        """Remove one answer; returns False when it was not cached"""
+        with self._lock:
+            if self._entries.pop(entry_id, None) is None:
+                return False
+            self._invalidated += 1
+            self._matrix = None
+            return True
+
+    def invalidate_similar(self, embedding: List[float]) -> int:
+        """
+        Remove every answer that a lookup with this embedding could return
+
+        Returns:
+            Number of answers removed
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            if not self._entries:
+                return 0
+            scores = self._similarities(vector)
+            matches = [entry_id for entry_id, score in zip(list(self._entries), scores) if score >= self.threshold]
+            for entry_id in matches:
+                del self._entries[entry_id]
+            if matches:
+                self._invalidated += len(matches)
+                self._matrix = None
+            return len(matches)
+
+    def clear(self):
+        with self._lock:
+            self._invalidated += len(self._entries)
+            self._entries.clear()
+            self._matrix = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, evictions and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "stores": self._stores,
+                "expired": self._expired,
+                "evicted": self._evicted,
+                "invalidated": self._invalidated,
+                "threshold": self.threshold,
+                "ttl_seconds": self.ttl_seconds
+            }
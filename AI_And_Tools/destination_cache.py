@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import copy
+import re
+import threading
+import time
+import os
+
+# Frequent misspellings and old spellings of Indonesian city names
+COMMON_MISSPELLINGS = {
+    "jakrta": "jakarta",
+    "jakarata": "jakarta",
+    "djakarta": "jakarta",
+    "surabaja": "surabaya",
+    "surubaya": "surabaya",
+    "soerabaja": "surabaya",
+    "bandoeng": "bandung",
+    "jogja": "yogyakarta",
+    "jogjakarta": "yogyakarta",
+    "djokjakarta": "yogyakarta",
+    "yogya": "yogyakarta",
+    "semarng": "semarang",
+    "medn": "medan",
+    "palembng": "palembang",
+    "makasar": "makassar",
+}
+
+def normalize_keyword(keyword: str) -> str:
+    """
+    Normalize a destination keyword for cache lookups and upstream searches
+
+    Args:
+        keyword (str): Raw location keyword typed by the user
+
+    Returns:
+        Lowercased keyword with collapsed whitespace and common misspellings corrected
+    """
+    text = re.sub(r"[^\w\s]", " ", keyword.lower())
+    words = [COMMON_MISSPELLINGS.get(word, word) for word in text.split()]
+    return " ".join(words)
+
+class DestinationCache:
+    """Bounded TTL/LRU cache for destination search responses"""
+
+    def __init__(self, ttl: float = 86400, negative_ttl: float = 600, max_entries: int = 1024):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, keyword: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached search response
+
+        Args:
+            keyword (str): Normalized search keyword
+            allow_stale (bool): Also return expired entries, e.g. while the API is unavailable
+
+        Returns:
+            Copy of the cached API response, or None on a miss or expired entry
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(keyword)
+            # Expired entries are kept until evicted so they can be served stale
+            if entry is None or (entry["expires_at"] <= now and not allow_stale):
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(keyword)
+            if entry["negative"]:
+                self._negative_hits += 1
+            else:
+                self._hits += 1
+            return copy.deepcopy(entry["response"])
+
+    def set(self, keyword: str, response: Dict[str, Any]):
+        """
+        Store a successful search response; empty results are cached with the shorter negative TTL
+
+        Args:
+            keyword (str): Normalized search keyword
+            response (dict): Raw API response from destination search
+        """
+        if response.get("meta", {}).get("status") != "success":
+            return
+
+        negative = not response.get("data")
+        ttl = self.negative_ttl if negative else self.ttl
+        with self._lock:
+            self._entries[keyword] = {
+                "response": copy.deepcopy(response),
+                "negative": negative,
+                "expires_at": time.monotonic() + ttl
+            }
+            self._entries.move_to_end(keyword)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def invalidate(self, keyword: Optional[str] = None):
+        """Drop one keyword, or the whole cache when no keyword is given"""
+        with self._lock:
+            if keyword is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(normalize_keyword(keyword), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._negative_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "negative_hits": self._negative_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": (self._hits + self._negative_hits) / lookups if lookups else 0.0
+            }
+
+_cache: Optional[DestinationCache] = None
+_cache_lock = threading.Lock()
+
+def get_destination_cache() -> DestinationCache:
+    """Return the process-wide destination cache shared by all sessions"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DestinationCache(
+                    ttl=float(os.getenv("DESTINATION_CACHE_TTL", "86400")),
+                    negative_ttl=float(os.getenv("DESTINATION_CACHE_NEGATIVE_TTL", "600")),
+                    max_entries=int(os.getenv("DESTINATION_CACHE_MAX_ENTRIES", "1024"))
+                )
+    return _cache
@@ -0,0 +1,322 @@
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+import argparse
+import csv
+import json
+import sqlite3
+import threading
+import time
+import os
+from destination_cache import normalize_keyword
+
+class DestinationIndex:
+    """Offline destination catalog with prefix, full-text and typo-tolerant lookup"""
+
+    def __init__(self, db_path: str = None, fuzzy_threshold: float = 0.5, limit: int = 10):
+        if db_path is None:
+            # Default to Data_And_Config/destination_index.db relative to project root
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            db_path = os.path.join(project_root, "Data_And_Config", "destination_index.db")
+        self.db_path = db_path
+        self.fuzzy_threshold = fuzzy_threshold
+        self.limit = limit
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS destinations (
+                id INTEGER PRIMARY KEY,
+                display_name TEXT NOT NULL,
+                subdistrict TEXT,
+                district TEXT,
+                city TEXT,
+                province TEXT,
+                zip_code TEXT,
+                search_text TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS vocabulary (
+                word TEXT PRIMARY KEY,
+                gram_count INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS vocabulary_grams (
+                gram TEXT NOT NULL,
+                word TEXT NOT NULL,
+                PRIMARY KEY (gram, word)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS searched_keywords (
+                keyword TEXT PRIMARY KEY,
+                searched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        try:
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS destinations_fts USING fts5("
+                "search_text, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            )
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: fall back to LIKE prefix matching
+            self.has_fts = False
+        self._conn.commit()
+
+    @staticmethod
+    def _trigrams(word: str) -> set:
+        padded = f"#{word}#"
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    @staticmethod
+    def _coerce(item: Dict[str, Any]) -> Dict[str, Any]:
+        """Accept both raw API items and format_location_options results"""
+        return {
+            "id": int(item["id"]),
+            "display_name": item.get("display_name") or item.get("label", ""),
+            "subdistrict": item.get("subdistrict") or item.get("subdistrict_name", ""),
+            "district": item.get("district") or item.get("district_name", ""),
+            "city": item.get("city") or item.get("city_name", ""),
+            "province": item.get("province") or item.get("province_name", ""),
+            "zip_code": str(item.get("zip_code") or "")
+        }
+
+    def add_locations(self, locations: Iterable[Dict[str, Any]], keyword: Optional[str] = None) -> int:
+        """
+        Insert or update catalog entries
+
+        Args:
+            locations: Formatted location options or raw API destination items
+            keyword (str, optional): Search keyword these locations were returned for; once recorded,
+                the catalog answers that keyword without calling the API
+
+        Returns:
+            Number of upserted locations
+        """
+        count = 0
+        with self._lock:
+            for item in locations:
+                location = self._coerce(item)
+                search_text = normalize_keyword(" ".join([
+                    location["display_name"], location["subdistrict"], location["district"],
+                    location["city"], location["province"], location["zip_code"]
+                ]))
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO destinations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        location["id"], location["display_name"], location["subdistrict"],
+                        location["district"], location["city"], location["province"],
+                        location["zip_code"], search_text
+                    )
+                )
+                if self.has_fts:
+                    self._conn.execute("DELETE FROM destinations_fts WHERE rowid = ?", (location["id"],))
+                    self._conn.execute(
+                        "INSERT INTO destinations_fts (rowid, search_text) VALUES (?, ?)",
+                        (location["id"], search_text)
+                    )
+                for word in set(search_text.split()):
+                    if word.isdigit():
+                        continue
+                    grams = self._trigrams(word)
+                    inserted = self._conn.execute(
+                        "INSERT OR IGNORE INTO vocabulary VALUES (?, ?)", (word, len(grams))
+                    ).rowcount
+                    if inserted:
+                        self._conn.executemany(
+                            "INSERT OR IGNORE INTO vocabulary_grams VALUES (?, ?)",
+                            [(gram, word) for gram in grams]
+                        )
+                count += 1
+
+            if keyword is not None and normalize_keyword(keyword):
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO searched_keywords VALUES (?, ?)",
+                    (normalize_keyword(keyword), time.time())
+                )
+            self._conn.commit()
+        return count
+
+    def import_dump(self, path: str, complete: bool = True) -> int:
+        """
+        Bulk-import destinations from a JSON, JSONL or CSV dump
+
+        Args:
+            path (str): Dump file; JSON may be a list or an API response with a "data" list
+            complete (bool): Mark the catalog as covering every destination, so any
+                keyword with matches is answered locally
+
+        Returns:
+            Number of imported locations
+        """
+        batch = []
+        count = 0
+        for item in self._read_dump(path):
+            batch.append(item)
+            if len(batch) >= 1000:
+                count += self.add_locations(batch)
+                batch = []
+        if batch:
+            count += self.add_locations(batch)
+
+        if complete:
+            with self._lock:
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('complete', '1')")
+                self._conn.commit()
+        return count
+
+    def _read_dump(self, path: str) -> Iterator[Dict[str, Any]]:
+        if path.endswith(".csv"):
+            with open(path, newline="", encoding="utf-8") as f:
+                yield from csv.DictReader(f)
+        elif path.endswith(".jsonl"):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            yield from (data.get("data", []) if isinstance(data, dict) else data)
+
+    def _is_complete(self) -> bool:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'complete'").fetchone()
+        return row is not None and row[0] == "1"
+
+    def _match(self, words: List[str], limit: int) -> List[tuple]:
+        if self.has_fts:
+            query = " ".join(f'"{word}"*' for word in words)
+            return self._conn.execute(
+                "SELECT d.id, d.display_name, d.subdistrict, d.district, d.city, d.province, d.zip_code "
+                "FROM destinations_fts JOIN destinations d ON d.id = destinations_fts.rowid "
+                "WHERE destinations_fts MATCH ? ORDER BY bm25(destinations_fts) LIMIT ?",
+                (query, limit)
+            ).fetchall()
+
+        conditions = " AND ".join("(' ' || search_text) LIKE ?" for _ in words)
+        return self._conn.execute(
+            "SELECT id, display_name, subdistrict, district, city, province, zip_code "
+            f"FROM destinations WHERE {conditions} LIMIT ?",
+            [f"% {word}%" for word in words] + [limit]
+        ).fetchall()
+
+    def _correct_word(self, word: str) -> Optional[str]:
+        """Return the closest catalog word by trigram similarity, or None below the threshold"""
+        grams = self._trigrams(word)
+        placeholders = ",".join("?" for _ in grams)
+        rows = self._conn.execute(
+            f"SELECT g.word, COUNT(*), v.gram_count FROM vocabulary_grams g "
+            f"JOIN vocabulary v ON v.word = g.word WHERE g.gram IN ({placeholders}) GROUP BY g.word",
+            list(grams)
+        ).fetchall()
+
+        best_word, best_score = None, 0.0
+        for candidate, shared, gram_count in rows:
+            score = shared / (len(grams) + gram_count - shared)
+            if score > best_score:
+                best_word, best_score = candidate, score
+        return best_word if best_score >= self.fuzzy_threshold else None
+
+    def search(self, keyword: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Look up destinations in the local catalog
+
+        Tries prefix/full-text matching first, then corrects misspelled words against
+        the catalog vocabulary. Unless the catalog was bulk-imported as complete, only
+        keywords previously resolved through the API are answered, so a partially
+        built catalog never hides locations the API would return.
+
+        Args:
+            keyword (str): Location keyword typed by the user
+            limit (int, optional): Maximum number of results
+
+        Returns:
+            List of location options in the format_location_options shape, empty on a miss
+        """
+        query = normalize_keyword(keyword)
+        words = query.split()
+        if not words:
+            return []
+
+        limit = limit or self.limit
+        with self._lock:
+            rows = self._match(words, limit)
+            if not rows:
+                corrected = [self._correct_word(word) or word for word in words]
+                if corrected != words:
+                    words = corrected
+                    rows = self._match(words, limit)
+
+            authoritative = self._is_complete() or self._conn.execute(
+                "SELECT 1 FROM searched_keywords WHERE keyword = ?", (" ".join(words),)
+            ).fetchone() is not None
+
+            if not rows or not authoritative:
+                self._misses += 1
+                return []
+            self._hits += 1
+
+        return [
+            {
+                "id": row[0],
+                "display_name": row[1],
+                "subdistrict": row[2],
+                "district": row[3],
+                "city": row[4],
+                "province": row[5],
+                "zip_code": row[6]
+            }
+            for row in rows
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return catalog size and lookup counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "destinations": self._conn.execute("SELECT COUNT(*) FROM destinations").fetchone()[0],
+                "keywords": self._conn.execute("SELECT COUNT(*) FROM searched_keywords").fetchone()[0],
+                "complete": self._is_complete(),
+                "full_text": self.has_fts,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
+
+_index: Optional[DestinationIndex] = None
+_index_lock = threading.Lock()
+
+def get_destination_index() -> Optional[DestinationIndex]:
+    """Return the process-wide destination index, or None when disabled through DESTINATION_INDEX_ENABLED"""
+    global _index
+    if os.getenv("DESTINATION_INDEX_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = DestinationIndex(db_path=os.getenv("DESTINATION_INDEX_PATH") or None)
+    return _index
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the offline destination catalog")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    import_parser = subparsers.add_parser("import", help="Bulk-import a JSON, JSONL or CSV dump")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--partial", action="store_true", help="Dump does not cover every destination")
+    search_parser = subparsers.add_parser("search", help="Look up a keyword in the catalog")
+    search_parser.add_argument("keyword")
+    args = parser.parse_args()
+
+    index = DestinationIndex(db_path=os.getenv("DESTINATION_INDEX_PATH") or None)
+    if args.command == "import":
+        print(f"✅ Imported {index.import_dump(args.path, complete=not args.partial)} destinations")
+    else:
+        for location in index.search(args.keyword):
+            print(f"{location['id']} - {location['display_name']}")
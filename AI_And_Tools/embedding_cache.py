@@ -0,0 +1,162 @@
+from array import array
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Hashable
+import re
+import sqlite3
+import threading
+import time
+import os
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a knowledge base query so trivially different inputs share a cache entry
+
+    Args:
+        query (str): Raw user message
+
+    Returns:
+        Lowercased query with collapsed whitespace and surrounding punctuation removed
+    """
+    text = re.sub(r"\s+", " ", query.lower()).strip()
+    return text.strip(" .,!?;:'\"")
+
+class EmbeddingCache:
+    """Bounded LRU cache of query embeddings with an optional persistent SQLite tier"""
+
+    def __init__(self, max_entries: int = 512, db_path: Optional[str] = None, model_name: str = ""):
+        """
+        Args:
+            max_entries (int): Embeddings kept in memory
+            db_path (str, optional): SQLite file for the on-disk tier; memory only when None
+            model_name (str): Embedding model identity, so vectors from different models never mix
+        """
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.model_name = model_name
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        self._conn = None
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    model TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (model, query)
+                )
+            """)
+            self._conn.commit()
+
+    def get(self, query: str) -> Optional[List[float]]:
+        """
+        Look up the embedding of a normalized query, promoting disk hits into memory
+
+        Returns:
+            Embedding vector, or None on a miss
+        """
+        with self._lock:
+            vector = self._entries.get(query)
+            if vector is not None:
+                self._entries.move_to_end(query)
+                self._hits += 1
+                return list(vector)
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?",
+                    (self.model_name, query)
+                ).fetchone()
+                if row is not None:
+                    vector = array("d")
+                    vector.frombytes(row[0])
+                    self._remember(query, vector)
+                    self._disk_hits += 1
+                    return list(vector)
+
+            self._misses += 1
+            return None
+
+    def set(self, query: str, vector: List[float]):
+        """Store the embedding of a normalized query in memory and, if enabled, on disk"""
+        packed = array("d", vector)
+        with self._lock:
+            self._remember(query, packed)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?, ?)",
+                    (self.model_name, query, packed.tobytes(), time.time())
+                )
+                self._conn.commit()
+
+    def _remember(self, query: str, vector: array):
+        self._entries[query] = vector
+        self._entries.move_to_end(query)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return memory and disk hit counters"""
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": (self._hits + self._disk_hits) / lookups if lookups else 0.0,
+                "db_path": self.db_path
+            }
+
+class RetrievalCache:
+    """Bounded LRU cache of retrieval results; cleared whenever the vector store changes"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, key: Hashable) -> Optional[List[Any]]:
+        """Return a copy of the cached result list, or None on a miss"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return list(result)
+
+    def set(self, key: Hashable, result: List[Any]):
+        with self._lock:
+            self._entries[key] = list(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0
+            }
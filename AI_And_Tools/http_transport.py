@@ -0,0 +1,287 @@
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, Optional
+from urllib.parse import urlencode
+from tracing import SPAN_KIND_CLIENT, get_tracer
+import asyncio
+import threading
+import weakref
+import os
+
+class HTTPTransport:
+    """Pooled, keep-alive HTTP transport shared by all RajaOngkir calls"""
+
+    def __init__(
+        self,
+        pool_size: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 15.0,
+        max_retries: int = 3,
+        backoff_factor: float = 0.3
+    ):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+            pool_block=False
+        )
+
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[tuple] = None
+    ) -> requests.Response:
+        """
+        Send a GET request through the shared connection pool
+
+        Args:
+            url (str): Full request URL
+            params (dict, optional): Query string parameters
+            headers (dict, optional): Extra request headers
+            timeout (tuple, optional): (connect, read) timeout override in seconds
+
+        Returns:
+            requests.Response from the upstream server
+        """
+        with self._lock:
+            self._requests += 1
+        with get_tracer().span("http.get", kind=SPAN_KIND_CLIENT, **_request_attributes(url, params)) as span:
+            try:
+                response = self.session.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    timeout=timeout or (self.connect_timeout, self.read_timeout)
+                )
+            except requests.exceptions.RequestException:
+                with self._lock:
+                    self._errors += 1
+                raise
+            _record_response(span, response)
+            return response
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return request counters and per-host connection pool statistics"""
+        pools = {}
+        pool_manager = self.adapter.poolmanager
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests_sent": pool.num_requests,
+                "free_slots": pool.pool.qsize() if pool.pool is not None else 0,
+                "max_size": pool.pool.maxsize if pool.pool is not None else self.pool_size
+            }
+
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "errors": self._errors,
+                "pool_size": self.pool_size,
+                "timeout": {"connect": self.connect_timeout, "read": self.read_timeout},
+                "retries": {"max_retries": self.max_retries, "backoff_factor": self.backoff_factor},
+                "pools": pools
+            }
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+class AsyncHTTPTransport:
+    """Pooled asyncio HTTP transport with the same pool, timeout and retry settings"""
+
+    RETRY_STATUSES = (429, 502, 503, 504)
+
+    def __init__(
+        self,
+        pool_size: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 15.0,
+        max_retries: int = 3,
+        backoff_factor: float = 0.3
+    ):
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        # httpx clients are bound to the event loop that created them,
+        # so keep one pooled client per running loop
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._errors = 0
+
+    def _get_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size
+                ),
+                timeout=httpx.Timeout(
+                    self.read_timeout,
+                    connect=self.connect_timeout,
+                    pool=self.connect_timeout + self.read_timeout
+                ),
+                headers={"Connection": "keep-alive"}
+            )
+            self._clients[loop] = client
+        return client
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """
+        Send a GET request through the pooled client of the running event loop
+
+        Args:
+            url (str): Full request URL
+            params (dict, optional): Query string parameters
+            headers (dict, optional): Extra request headers
+
+        Returns:
+            httpx.Response from the upstream server
+        """
+        client = self._get_client()
+        # requests silently drops None-valued headers, httpx rejects them
+        if headers:
+            headers = {key: value for key, value in headers.items() if value is not None}
+        with self._lock:
+            self._requests += 1
+
+        with get_tracer().span("http.get", kind=SPAN_KIND_CLIENT, **_request_attributes(url, params)) as span:
+            attempt = 0
+            while True:
+                try:
+                    response = await client.get(url, params=_encode_params(params), headers=headers)
+                    if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                        span.set_attribute("http.retries", attempt)
+                        _record_response(span, response)
+                        return response
+                except httpx.TransportError:
+                    if attempt >= self.max_retries:
+                        with self._lock:
+                            self._errors += 1
+                        raise
+
+                with self._lock:
+                    self._retries += 1
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                attempt += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return request counters for the async transport"""
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "retries": self._retries,
+                "errors": self._errors,
+                "pool_size": self.pool_size,
+                "open_clients": len([c for c in self._clients.values() if not c.is_closed]),
+                "timeout": {"connect": self.connect_timeout, "read": self.read_timeout}
+            }
+
+    async def aclose(self):
+        """Close the pooled client of the running event loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+def _encode_params(params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Encode booleans the way requests does so both transports send identical queries"""
+    if params is None:
+        return None
+    return {key: str(value) if isinstance(value, bool) else value for key, value in params.items()}
+
+def _request_attributes(url: str, params: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Span attributes of a request; the API key travels in headers and is never recorded"""
+    return {
+        "http.method": "GET",
+        "http.url": url,
+        "http.request_bytes": len(urlencode(_encode_params(params) or {}))
+    }
+
+def _record_response(span, response):
+    span.set_attributes({
+        "http.status_code": response.status_code,
+        "http.response_bytes": len(response.content)
+    })
+    if response.status_code >= 400:
+        span.record_error(f"HTTP {response.status_code}")
+
+def _transport_settings() -> Dict[str, Any]:
+    return {
+        "pool_size": int(os.getenv("RAJAONGKIR_POOL_SIZE", "20")),
+        "connect_timeout": float(os.getenv("RAJAONGKIR_CONNECT_TIMEOUT", "3.05")),
+        "read_timeout": float(os.getenv("RAJAONGKIR_READ_TIMEOUT", "15")),
+        "max_retries": int(os.getenv("RAJAONGKIR_MAX_RETRIES", "3")),
+        "backoff_factor": float(os.getenv("RAJAONGKIR_BACKOFF_FACTOR", "0.3"))
+    }
+
+_transport: Optional[HTTPTransport] = None
+_async_transport: Optional[AsyncHTTPTransport] = None
+_transport_lock = threading.Lock()
+
+def get_transport() -> HTTPTransport:
+    """Return the process-wide transport, creating it from environment settings on first use"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HTTPTransport(**_transport_settings())
+    return _transport
+
+def get_async_transport() -> AsyncHTTPTransport:
+    """Return the process-wide async transport, creating it from environment settings on first use"""
+    global _async_transport
+    if _async_transport is None:
+        with _transport_lock:
+            if _async_transport is None:
+                _async_transport = AsyncHTTPTransport(**_transport_settings())
+    return _async_transport
+
+def get_transport_stats() -> Dict[str, Any]:
+    """Return pool statistics for the process-wide transports"""
+    stats = get_transport().get_stats()
+    if _async_transport is not None:
+        stats["async"] = _async_transport.get_stats()
+    return stats
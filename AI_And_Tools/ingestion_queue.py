@@ -0,0 +1,171 @@
+from collections import deque
+from langchain_core.documents import Document
+from typing import Callable, Dict, Any, List, Optional
+import threading
+import time
+
+class IngestionQueue:
+    """
+    Write-behind buffer for knowledge base documents
+
+    Callers enqueue documents and return immediately; a background worker writes them in
+    batches of batch_size (one embedding forward pass each) once enough are pending or the
+    oldest has waited flush_interval seconds, then calls on_flush once per drain.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List[Document]], None],
+        on_flush: Callable[[], None],
+        batch_size: int = 64,
+        flush_interval: float = 2.0
+    ):
+        """
+        Args:
+            write_batch: Embeds and stores one batch, e.g. vectorstore.add_documents
+            on_flush: Called after the pending documents were written, e.g. to persist the store
+            batch_size (int): Documents per write_batch call
+            flush_interval (float): Maximum seconds a document waits before it is written
+        """
+        self.write_batch = write_batch
+        self.on_flush = on_flush
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._oldest_at: Optional[float] = None
+        self._enqueued = 0
+        self._written = 0
+        self._unpersisted = 0
+        self._batches = 0
+        self._failures = 0
+        self._flushes = 0
+        self._flush_requested = False
+        self._closed = False
+        self._last_error: Optional[str] = None
+
+        self._worker = threading.Thread(target=self._run, name="knowledge-ingestion", daemon=True)
+        self._worker.start()
+
+    def put(self, documents: List[Document]):
+        """Enqueue documents for a later batched write"""
+        if not documents:
+            return
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Ingestion queue is closed")
+            if not self._pending:
+                self._oldest_at = time.monotonic()
+            self._pending.extend(documents)
+            self._enqueued += len(documents)
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write everything enqueued so far and wait for it
+
+        Args:
+            timeout (float, optional): Seconds to wait, forever when None
+
+        Returns:
+            True when all documents enqueued before the call were written and persisted,
+            False on timeout or when a write or on_flush failed (the worker keeps retrying)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            target = self._enqueued
+            failures = self._failures
+            self._flush_requested = True
+            self._condition.notify_all()
+            while self._written < target:
+                if self._failures > failures:
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None and remaining <= 0) or not self._worker.is_alive():
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def close(self, timeout: Optional[float] = 30):
+        """Flush pending documents and stop the worker; safe to call more than once"""
+        with self._condition:
+            if self._closed:
+                return
+        self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._worker.join(timeout)
+
+    def _due(self) -> bool:
+        if not self._pending and not self._unpersisted:
+            return False
+        if self._flush_requested or self._closed or len(self._pending) >= self.batch_size:
+            return True
+        return time.monotonic() - self._oldest_at >= self.flush_interval
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._due():
+                    if self._closed:
+                        return
+                    self._flush_requested = False
+                    self._condition.notify_all()
+                    timeout = None
+                    if self._pending or self._unpersisted:
+                        timeout = max(0.0, self.flush_interval - (time.monotonic() - self._oldest_at))
+                    self._condition.wait(timeout)
+                documents = list(self._pending)
+                self._pending.clear()
+                self._oldest_at = None
+
+            self._drain(documents)
+
+    def _drain(self, documents: List[Document]):
+        written = 0
+        try:
+            for start in range(0, len(documents), self.batch_size):
+                batch = documents[start:start + self.batch_size]
+                self.write_batch(batch)
+                written += len(batch)
+                with self._condition:
+                    self._unpersisted += len(batch)
+                    self._batches += 1
+            self.on_flush()
+            with self._condition:
+                # Documents only count as written once on_flush has persisted them
+                self._written += self._unpersisted
+                self._unpersisted = 0
+                self._flushes += 1
+                self._last_error = None
+                self._condition.notify_all()
+        except Exception as e:
+            print(f"❌ Knowledge ingestion failed, retrying later: {str(e)}")
+            with self._condition:
+                # Put unwritten documents back in front and back off for one interval; written
+                # but unpersisted ones stay in the store and only need on_flush to be retried
+                self._pending.extendleft(reversed(documents[written:]))
+                self._oldest_at = time.monotonic()
+                self._last_error = str(e)
+                self._failures += 1
+                self._condition.notify_all()
+                self._condition.wait(self.flush_interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return queue depth and write counters"""
+        with self._condition:
+            return {
+                "pending": len(self._pending),
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "unpersisted": self._unpersisted,
+                "batches": self._batches,
+                "flushes": self._flushes,
+                "failures": self._failures,
+                "batch_size": self.batch_size,
+                "flush_interval": self.flush_interval,
+                "last_error": self._last_error
+            }
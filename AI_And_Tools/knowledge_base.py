@@ -1,56 +1,250 @@
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-from typing import List
+from embedding_cache import EmbeddingCache, RetrievalCache, normalize_query
+from vector_backends import VECTOR_BACKENDS, default_persist_directory, open_vector_store, similarity_search_with_similarity
+from ingestion_queue import IngestionQueue
+from knowledge_ingestion import MANIFEST_FILE, KnowledgeIngestionPipeline, format_report
+from token_counter import count_tokens
+from tracing import get_tracer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import atexit
+import hashlib
 import os
+import re
+import threading
+import time
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BACKENDS = ("huggingface", "onnx")
+
+PRELOAD_MODES = ("background", "lazy", "eager")
+
+# Replies this short are slot answers ("ya", "1kg", "berapa?") rather than questions
+SHORT_REPLY_WORDS = 3
+
+# Queries about these topics are answered from the knowledge base rather than the API,
+# so they are worth waiting for the model to finish loading
+KNOWLEDGE_TOPICS = (
+    "courier", "kurir", "service", "layanan", "jne", "ninja", "sap", "lion", "cod",
+    "insurance", "asuransi", "guideline", "estimate", "perkiraan", "small package",
+    "medium package", "large package", "misspel", "spelling", "coverage", "etd",
+    "how long", "berapa lama"
+)
+
+def requires_retrieval(query: str) -> bool:
+    """Return True when a query asks about shipping knowledge rather than a plain quote"""
+    lowered = query.lower()
+    return any(topic in lowered for topic in KNOWLEDGE_TOPICS)
+
+def chunk_key(doc: Document) -> str:
+    """Return a backend-independent id for a retrieved chunk, derived from its text"""
+    return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()[:16]
+
+def should_skip_retrieval(query: str) -> bool:
+    """
+    Return True for short slot-filling replies where retrieved context would not help
+
+    "ya", "1kg", "berapa?" or "Surabaya" answer the assistant's last question; a short
+    reply that still mentions a knowledge topic (e.g. "cod?") is not skipped.
+    """
+    words = re.findall(r"\w+", normalize_query(query))
+    return len(words) <= SHORT_REPLY_WORDS and not requires_retrieval(query)
 
 class ShippingKnowledgeBase:
     """RAG knowledge base for shipping-related information"""
     
-    def __init__(self, persist_directory: str = None):
+    def __init__(
+        self,
+        persist_directory: str = None,
+        preload: str = None,
+        vector_backend: str = None,
+        embedding_backend: str = None,
+        embeddings: Any = None
+    ):
+        """
+        Args:
+            persist_directory (str, optional): Vector store directory, defaults to
+                Data_And_Config/chroma_db or Data_And_Config/numpy_store
+            preload (str, optional): "background" loads the model in a daemon thread, "lazy" on
+                first use and "eager" right away; defaults to KNOWLEDGE_BASE_PRELOAD
+            vector_backend (str, optional): "chroma" or "numpy"; defaults to KNOWLEDGE_VECTOR_BACKEND
+            embedding_backend (str, optional): "huggingface" (PyTorch) or "onnx" (int8 ONNX export);
+                defaults to KNOWLEDGE_EMBEDDING_BACKEND
+            embeddings (Embeddings, optional): Ready embeddings to use instead of loading a model,
+                e.g. a deterministic stand-in for benchmarks
+        """
+        self.embedding_backend = (embedding_backend or os.getenv("KNOWLEDGE_EMBEDDING_BACKEND", "huggingface")).lower()
+        if self.embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(
+                f"embedding_backend must be one of {', '.join(EMBEDDING_BACKENDS)}, got {self.embedding_backend!r}"
+            )
+        self.vector_backend = (vector_backend or os.getenv("KNOWLEDGE_VECTOR_BACKEND", "chroma")).lower()
+        if self.vector_backend not in VECTOR_BACKENDS:
+            raise ValueError(f"vector_backend must be one of {', '.join(VECTOR_BACKENDS)}, got {self.vector_backend!r}")
         if persist_directory is None:
-            # Default to Data & Config/chroma_db relative to project root
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            persist_directory = os.path.join(project_root, "Data_And_Config", "chroma_db")
+            # Default to Data & Config/<store> relative to project root
+            persist_directory = default_persist_directory(self.vector_backend)
         self.persist_directory = persist_directory
         
-        print("🔄 Initializing embeddings model...")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': False}
+        self.preload = (preload or os.getenv("KNOWLEDGE_BASE_PRELOAD", "background")).lower()
+        if self.preload not in PRELOAD_MODES:
+            raise ValueError(f"preload must be one of {', '.join(PRELOAD_MODES)}, got {self.preload!r}")
+        
+        self.timings = {}
+        self.embedding_cache = EmbeddingCache(
+            max_entries=int(os.getenv("KNOWLEDGE_QUERY_CACHE_SIZE", "512")),
+            db_path=os.getenv("KNOWLEDGE_QUERY_CACHE_PATH") or None,
+            # Quantized vectors differ slightly, so each backend keeps its own cache entries
+            model_name=f"{EMBEDDING_MODEL}:{self.embedding_backend}" if embeddings is None else type(embeddings).__name__
         )
+        self.retrieval_cache = RetrievalCache(
+            max_entries=int(os.getenv("KNOWLEDGE_RESULT_CACHE_SIZE", "256"))
+        )
+        # Chunks less similar to the query than this (cosine) are never injected
+        self.min_relevance = float(os.getenv("KNOWLEDGE_MIN_RELEVANCE", "0.3"))
+        self._embeddings = None
+        self._provided_embeddings = embeddings
+        self._text_splitter = None
+        self._vectorstore = None
+        self._load_lock = threading.Lock()
+        self._loader = None
+        self._ingestion_queue = None
+        self._ingestion_lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.last_sync_report = None
+        
+        if self.preload == "eager":
+            self.ensure_loaded()
+        elif self.preload == "background":
+            self.start_background_load()
+    
+    @property
+    def embeddings(self):
+        self.ensure_loaded()
+        return self._embeddings
+    
+    @property
+    def text_splitter(self):
+        self.ensure_loaded()
+        return self._text_splitter
+    
+    @property
+    def vectorstore(self):
+        self.ensure_loaded()
+        return self._vectorstore
+    
+    def is_ready(self) -> bool:
+        """Return True once the embedding model and vector store are loaded"""
+        return self._vectorstore is not None
+    
+    def start_background_load(self):
+        """Start loading the model and vector store in a daemon thread, once"""
+        with self._load_lock:
+            if self._loader is not None or self.is_ready():
+                return
+            self._loader = threading.Thread(target=self._background_load, name="knowledge-base-loader", daemon=True)
+            self._loader.start()
+    
+    def _background_load(self):
+        try:
+            self.ensure_loaded()
+        except Exception as e:
+            # The next caller of ensure_loaded retries and sees the error
+            print(f"❌ Knowledge base failed to load in background: {str(e)}")
+    
+    def ensure_loaded(self):
+        """Load the embedding model and vector store, blocking until they are ready"""
+        if self.is_ready():
+            return
+        with self._load_lock:
+            if not self.is_ready():
+                self._load()
+    
+    def _load(self):
+        started = time.perf_counter()
+        
+        # Heavy imports are deferred so importing this module stays cheap
+        mark = time.perf_counter()
+        if self._provided_embeddings is None and self.embedding_backend == "onnx":
+            from onnx_embeddings import OnnxMiniLMEmbeddings
+        elif self._provided_embeddings is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        self.timings["imports"] = time.perf_counter() - mark
+        
+        print(f"🔄 Initializing {self.embedding_backend} embeddings model...")
+        mark = time.perf_counter()
+        if self._provided_embeddings is not None:
+            self._embeddings = self._provided_embeddings
+        elif self.embedding_backend == "onnx":
+            self._embeddings = OnnxMiniLMEmbeddings(
+                model_dir=os.getenv("KNOWLEDGE_ONNX_MODEL_DIR") or None,
+                quantized=os.getenv("KNOWLEDGE_ONNX_QUANTIZED", "true").lower() not in ("0", "false", "no")
+            )
+        else:
+            self._embeddings = HuggingFaceEmbeddings(
+                model_name=EMBEDDING_MODEL,
+                model_kwargs={'device': 'cpu'},
+                encode_kwargs={'normalize_embeddings': False}
+            )
+        self.timings["model_load"] = time.perf_counter() - mark
         print("✅ Embeddings model loaded!")
         
-        self.text_splitter = RecursiveCharacterTextSplitter(
+        self._text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200
         )
         
         # Initialize or load existing vector store
-        print("🔄 Initializing vector store...")
-        self.vectorstore = self._initialize_vectorstore()
+        print(f"🔄 Initializing {self.vector_backend} vector store...")
+        mark = time.perf_counter()
+        vectorstore = open_vector_store(self.vector_backend, self.persist_directory, self._embeddings)
+        self.timings["store_open"] = time.perf_counter() - mark
+        
+        # Embed only new or changed chunks of the built-in corpus and external sources
+        mark = time.perf_counter()
+        self._sync(vectorstore)
+        self.timings["sync"] = time.perf_counter() - mark
+        self.timings["total"] = time.perf_counter() - started
+        self._vectorstore = vectorstore
         print("✅ Vector store ready!")
+        print(
+            f"⏱️ Knowledge base loaded in {self.timings['total']:.2f}s "
+            f"(imports {self.timings['imports']:.2f}s, model load {self.timings['model_load']:.2f}s, "
+            f"store open {self.timings['store_open']:.2f}s, sync {self.timings['sync']:.2f}s)"
+        )
     
-    def _initialize_vectorstore(self):
-        """Initialize vector store with shipping knowledge"""
-        # Check if database already exists
-        if os.path.exists(self.persist_directory):
-            return Chroma(
-                persist_directory=self.persist_directory,
-                embedding_function=self.embeddings
-            )
+    def sync_knowledge(self) -> dict:
+        """
+        Re-sync the built-in corpus and KNOWLEDGE_SOURCES_DIR into the vector store
         
-        # Create new database with initial knowledge
-        documents = self._create_initial_documents()
-        vectorstore = Chroma.from_documents(
-            documents=documents,
-            embedding=self.embeddings,
-            persist_directory=self.persist_directory
-        )
-        vectorstore.persist()
-        return vectorstore
+        Returns:
+            Report with chunks, embedded, skipped and deleted counts
+        """
+        return self._sync(self.vectorstore)
+    
+    def _sync(self, vectorstore) -> dict:
+        with self._sync_lock:
+            started = time.perf_counter()
+            pipeline = KnowledgeIngestionPipeline(
+                vectorstore,
+                self._text_splitter,
+                os.path.join(self.persist_directory, MANIFEST_FILE),
+                batch_size=int(os.getenv("KNOWLEDGE_INGEST_BATCH_SIZE", "64"))
+            )
+            report = pipeline.sync_documents("builtin", self._create_initial_documents())
+            
+            sources_dir = os.getenv("KNOWLEDGE_SOURCES_DIR") or os.path.join(
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data_And_Config", "knowledge"
+            )
+            if os.path.isdir(sources_dir):
+                pipeline.sync_directory(sources_dir, report)
+            
+            if report["embedded"] or report["deleted"]:
+                self.retrieval_cache.clear()
+            report["seconds"] = time.perf_counter() - started
+            self.last_sync_report = report
+            print(format_report(report))
+            return report
     
     def _create_initial_documents(self) -> List[Document]:
         """Create initial documents for the knowledge base"""
@@ -188,27 +382,175 @@ class ShippingKnowledgeBase:
             documents.append(doc)
         
         # Split documents into smaller chunks
-        split_docs = self.text_splitter.split_documents(documents)
+        split_docs = self._text_splitter.split_documents(documents)
         return split_docs
     
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a query, reusing the cached vector for repeated normalized queries"""
+        normalized = normalize_query(query)
+        vector = self.embedding_cache.get(normalized)
+        if vector is None:
+            vector = self.embeddings.embed_query(normalized)
+            self.embedding_cache.set(normalized, vector)
+        return vector
+    
     def search_knowledge(self, query: str, k: int = 3) -> List[Document]:
         """Search for relevant knowledge based on query"""
-        return self.vectorstore.similarity_search(query, k=k)
+        return [doc for doc, _ in self.search_knowledge_with_scores(query, k)]
     
-    def add_knowledge(self, content: str, metadata: dict):
-        """Add new knowledge to the database"""
-        doc = Document(page_content=content, metadata=metadata)
-        split_docs = self.text_splitter.split_documents([doc])
+    def search_knowledge_with_scores(self, query: str, k: int = 3) -> List[Tuple[Document, float]]:
+        """Search for relevant knowledge and return (document, cosine similarity) pairs"""
+        key = (normalize_query(query), k)
+        results = self.retrieval_cache.get(key)
+        if results is None:
+            results = similarity_search_with_similarity(self.vectorstore, self.embed_query(query), k=k)
+            self.retrieval_cache.set(key, results)
+        return results
+    
+    def add_knowledge(self, content: str, metadata: dict, wait: bool = False):
+        """
+        Add new knowledge to the database
+        
+        Documents are queued and embedded in batches by a background worker, which
+        persists the store once per flush instead of once per call.
         
-        self.vectorstore.add_documents(split_docs)
+        Args:
+            content (str): Knowledge text
+            metadata (dict): Document metadata
+            wait (bool): Block until the document is embedded and persisted
+        """
+        doc = Document(page_content=content, metadata=metadata)
+        queue = self._get_ingestion_queue()
+        queue.put([doc])
+        if wait:
+            queue.flush()
+    
+    def flush_knowledge(self, timeout: Optional[float] = None) -> bool:
+        """Write all queued knowledge now; returns False if the timeout expired or the write failed first"""
+        if self._ingestion_queue is None:
+            return True
+        return self._ingestion_queue.flush(timeout)
+    
+    def close(self):
+        """Flush queued knowledge and stop the ingestion worker"""
+        if self._ingestion_queue is not None:
+            self._ingestion_queue.close()
+    
+    def _get_ingestion_queue(self) -> IngestionQueue:
+        if self._ingestion_queue is None:
+            with self._ingestion_lock:
+                if self._ingestion_queue is None:
+                    self._ingestion_queue = IngestionQueue(
+                        write_batch=self._write_batch,
+                        on_flush=self._after_flush,
+                        batch_size=int(os.getenv("KNOWLEDGE_INGEST_BATCH_SIZE", "64")),
+                        flush_interval=float(os.getenv("KNOWLEDGE_INGEST_FLUSH_INTERVAL", "2.0"))
+                    )
+                    # Queued documents must reach the store before the process exits
+                    atexit.register(self.close)
+        return self._ingestion_queue
+    
+    def _write_batch(self, documents: List[Document]):
+        split_docs = self.text_splitter.split_documents(documents)
+        batch_size = self._ingestion_queue.batch_size
+        # One add call is one embedding forward pass, so keep chunks per call bounded
+        for start in range(0, len(split_docs), batch_size):
+            self.vectorstore.add_documents(split_docs[start:start + batch_size])
+    
+    def _after_flush(self):
         self.vectorstore.persist()
+        # Cached results may now miss the new chunks; query embeddings stay valid
+        self.retrieval_cache.clear()
+    
+    def get_ingestion_stats(self) -> dict:
+        """Return ingestion queue depth and write counters"""
+        if self._ingestion_queue is None:
+            return {"pending": 0, "enqueued": 0, "written": 0}
+        return self._ingestion_queue.get_stats()
+    
+    def get_cache_stats(self) -> dict:
+        """Return query-embedding and retrieval cache statistics"""
+        return {
+            "embeddings": self.embedding_cache.get_stats(),
+            "retrieval": self.retrieval_cache.get_stats()
+        }
+    
+    def get_context_for_query(self, query: str, wait: bool = True) -> str:
+        """
+        Get relevant context for a shipping query
+        
+        Args:
+            query (str): User query
+            wait (bool): Block until the knowledge base is loaded; when False and it is
+                still loading, return an empty context so the turn can proceed without it
+        
+        Returns:
+            Context text, or an empty string when skipped
+        """
+        return self.retrieve_context(query, wait=wait)["context"]
+    
+    def retrieve_context(
+        self,
+        query: str,
+        wait: bool = True,
+        exclude: Optional[Iterable[str]] = None,
+        k: int = 3
+    ) -> Dict[str, Any]:
+        """
+        Retrieve context for a query, leaving out weak matches and chunks already shown
+        
+        Args:
+            query (str): User query
+            wait (bool): Block until the knowledge base is loaded; when False and it is
+                still loading, return an empty context so the turn can proceed without it
+            exclude (iterable, optional): chunk_key() values the conversation already holds
+            k (int): Chunks retrieved before filtering
+        
+        Returns:
+            Dict with the context text, chunk_ids of the injected chunks, counts of
+            retrieved, below_threshold and already_seen chunks, and the context tokens
+            injected and saved by filtering
+        """
+        with get_tracer().span("knowledge.retrieve", query_bytes=len(query), wait=wait) as span:
+            report = self._retrieve_context(query, wait, exclude, k)
+            span.set_attributes({
+                "retrieved": report["retrieved"],
+                "injected": len(report["chunk_ids"]),
+                "below_threshold": report["below_threshold"],
+                "already_seen": report["already_seen"],
+                "context_bytes": len(report["context"]),
+                "context_tokens": report["tokens"],
+                "saved_tokens": report["saved_tokens"]
+            })
+            return report
     
-    def get_context_for_query(self, query: str) -> str:
-        """Get relevant context for a shipping query"""
-        relevant_docs = self.search_knowledge(query, k=3)
+    def _retrieve_context(self, query: str, wait: bool, exclude: Optional[Iterable[str]], k: int) -> Dict[str, Any]:
+        report = {
+            "context": "", "chunk_ids": [], "retrieved": 0, "below_threshold": 0,
+            "already_seen": 0, "tokens": 0, "saved_tokens": 0
+        }
+        if not wait and not self.is_ready():
+            self.start_background_load()
+            return report
         
-        context = "Relevant shipping knowledge:\n\n"
-        for doc in relevant_docs:
-            context += f"- {doc.page_content}\n\n"
+        exclude = set(exclude or ())
+        kept = []
+        for doc, score in self.search_knowledge_with_scores(query, k=k):
+            report["retrieved"] += 1
+            if score < self.min_relevance:
+                report["below_threshold"] += 1
+            elif chunk_key(doc) in exclude:
+                report["already_seen"] += 1
+            else:
+                kept.append(doc)
+                continue
+            report["saved_tokens"] += count_tokens(f"- {doc.page_content}\n\n")
         
-        return context
+        if kept:
+            context = "Relevant shipping knowledge:\n\n"
+            for doc in kept:
+                context += f"- {doc.page_content}\n\n"
+            report["context"] = context
+            report["chunk_ids"] = [chunk_key(doc) for doc in kept]
+            report["tokens"] = count_tokens(context)
+        return report
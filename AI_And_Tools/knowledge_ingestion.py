@@ -0,0 +1,252 @@
+"""
+Incremental, content-hashed ingestion into the knowledge base vector store
+
+Every chunk is identified by a hash of its source, text and metadata. A manifest next to
+the store records which chunks each source produced, so a sync only embeds new or changed
+chunks and deletes the ones that disappeared. Markdown and text guides in a directory are
+streamed file by file and skipped entirely when their content hash is unchanged.
+
+Usage:
+    python AI_And_Tools/knowledge_ingestion.py sync --directory Data_And_Config/knowledge
+"""
+
+from langchain_core.documents import Document
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+import argparse
+import hashlib
+import json
+import os
+
+MANIFEST_FILE = "ingestion_manifest.json"
+SOURCE_EXTENSIONS = (".md", ".markdown", ".txt")
+FILE_SOURCE_PREFIX = "file:"
+
+def chunk_hash(source: str, content: str, metadata: Dict[str, Any]) -> str:
+    """Return a stable id for a chunk of a source"""
+    payload = json.dumps([source, content, metadata], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def file_hash(path: str) -> str:
+    """Hash a file in blocks so large sources are never read at once"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_sections(path: str, max_chars: int = 20000) -> Iterator[str]:
+    """
+    Stream a text file as sections of at most roughly max_chars, broken at blank lines
+
+    Sections are split again by the text splitter, so this only bounds memory use.
+    """
+    section = []
+    size = 0
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            section.append(line)
+            size += len(line)
+            if size >= max_chars and not line.strip():
+                yield "".join(section)
+                section, size = [], 0
+    if section:
+        yield "".join(section)
+
+class KnowledgeIngestionPipeline:
+    """Syncs sources into a vector store, embedding only chunks whose hash is new"""
+
+    def __init__(self, vectorstore, text_splitter, manifest_path: str, batch_size: int = 64):
+        """
+        Args:
+            vectorstore: LangChain vector store supporting ids, delete() and get()
+            text_splitter: Splitter turning source documents into chunks
+            manifest_path (str): JSON file recording the chunks of every source
+            batch_size (int): Chunks embedded per add_documents call
+        """
+        self.vectorstore = vectorstore
+        self.text_splitter = text_splitter
+        self.manifest_path = manifest_path
+        self.batch_size = batch_size
+        self.manifest = self._load_manifest()
+        self._dirty = False
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        return {"version": 1, "sources": {}}
+
+    def _save_manifest(self):
+        # Persist the store first so the manifest never lists chunks the store lost
+        if self._dirty:
+            self.vectorstore.persist()
+            self._dirty = False
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok=True)
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    def _new_report(self) -> Dict[str, Any]:
+        return {"sources": 0, "chunks": 0, "embedded": 0, "skipped": 0, "deleted": 0}
+
+    def _adopt_existing(self, hashes: Set[str]) -> Dict[str, str]:
+        """
+        Map chunk hashes to ids already in the store
+
+        Stores seeded before the manifest existed use random ids; matching their stored
+        hash metadata (or their content for the built-in corpus) avoids re-embedding them.
+        """
+        if self.manifest.get("adopted"):
+            return {}
+        self.manifest["adopted"] = True
+        existing = self.vectorstore.get()
+        adopted = {}
+        for store_id, content, metadata in zip(existing["ids"], existing["documents"], existing["metadatas"]):
+            metadata = dict(metadata or {})
+            stored_hash = metadata.pop("content_hash", None)
+            source = metadata.pop("source", "builtin")
+            candidate = stored_hash or chunk_hash(source, content, metadata)
+            if candidate in hashes:
+                adopted[candidate] = store_id
+        return adopted
+
+    def _sync_chunks(self, source: str, chunks: Iterable[Document], report: Dict[str, Any]) -> Dict[str, str]:
+        """Embed unseen chunks of a source in batches and return its hash-to-id map"""
+        known = dict(self.manifest["sources"].get(source, {}).get("chunks", {}))
+        current = {}
+        pending = []
+        for chunk in chunks:
+            digest = chunk_hash(source, chunk.page_content, chunk.metadata)
+            if digest in current:
+                continue
+            report["chunks"] += 1
+            current[digest] = known.get(digest)
+            if current[digest] is None:
+                pending.append((digest, chunk))
+
+        # Chunks written by an older store without a manifest keep their ids
+        if pending and not known:
+            adopted = self._adopt_existing({digest for digest, _ in pending})
+            for digest, store_id in adopted.items():
+                current[digest] = store_id
+            pending = [(digest, chunk) for digest, chunk in pending if digest not in adopted]
+
+        report["skipped"] += len(current) - len(pending)
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            documents = [
+                Document(page_content=chunk.page_content, metadata=dict(chunk.metadata, source=source, content_hash=digest))
+                for digest, chunk in batch
+            ]
+            # The hash doubles as the store id, so a lost manifest never duplicates chunks
+            self.vectorstore.add_documents(documents, ids=[digest for digest, _ in batch])
+            self._dirty = True
+            report["embedded"] += len(batch)
+            for digest, _ in batch:
+                current[digest] = digest
+
+        removed = [store_id for digest, store_id in known.items() if digest not in current]
+        if removed:
+            self.vectorstore.delete(ids=removed)
+            self._dirty = True
+            report["deleted"] += len(removed)
+        return current
+
+    def sync_documents(self, source: str, documents: List[Document], report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Make the store hold exactly the chunks of these documents for the source
+
+        Args:
+            source (str): Source name, e.g. "builtin"
+            documents (list): Unsplit source documents
+
+        Returns:
+            Report with chunks, embedded, skipped and deleted counts
+        """
+        report = report or self._new_report()
+        chunks = self.text_splitter.split_documents(documents)
+        self.manifest["sources"][source] = {"fingerprint": None, "chunks": self._sync_chunks(source, chunks, report)}
+        report["sources"] += 1
+        self._save_manifest()
+        return report
+
+    def sync_directory(self, directory: str, report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Sync every markdown/text file under a directory; files that were removed lose their chunks
+
+        Args:
+            directory (str): Folder with courier guides, tariff notes and similar sources
+
+        Returns:
+            Report with chunks, embedded, skipped and deleted counts
+        """
+        report = report or self._new_report()
+        seen = set()
+        for root, _, files in os.walk(directory):
+            for name in sorted(files):
+                if not name.lower().endswith(SOURCE_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                source = FILE_SOURCE_PREFIX + os.path.relpath(path, directory).replace(os.sep, "/")
+                seen.add(source)
+                self._sync_file(source, path, report)
+                # Saved per file so an interrupted sync does not re-embed finished files
+                self._save_manifest()
+
+        for source in [source for source in self.manifest["sources"] if source.startswith(FILE_SOURCE_PREFIX)]:
+            if source not in seen:
+                removed = list(self.manifest["sources"].pop(source)["chunks"].values())
+                if removed:
+                    self.vectorstore.delete(ids=removed)
+                    self._dirty = True
+                    report["deleted"] += len(removed)
+        self._save_manifest()
+        return report
+
+    def _sync_file(self, source: str, path: str, report: Dict[str, Any]):
+        fingerprint = file_hash(path)
+        entry = self.manifest["sources"].get(source)
+        report["sources"] += 1
+        if entry and entry.get("fingerprint") == fingerprint:
+            report["chunks"] += len(entry["chunks"])
+            report["skipped"] += len(entry["chunks"])
+            return
+
+        metadata = {"type": "external", "category": os.path.splitext(os.path.basename(path))[0]}
+
+        def chunks():
+            for section in read_sections(path):
+                yield from self.text_splitter.split_documents([Document(page_content=section, metadata=metadata)])
+
+        self.manifest["sources"][source] = {
+            "fingerprint": fingerprint,
+            "chunks": self._sync_chunks(source, chunks(), report)
+        }
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Return a one-line summary of a sync report"""
+    return (
+        f"📚 Knowledge sync: {report['chunks']} chunks from {report['sources']} sources, "
+        f"{report['embedded']} embedded, {report['skipped']} skipped, {report['deleted']} deleted"
+        + (f" in {report['seconds']:.2f}s" if "seconds" in report else "")
+    )
+
+def main():
+    # Imported here because knowledge_base imports this module
+    from knowledge_base import ShippingKnowledgeBase
+
+    parser = argparse.ArgumentParser(description="Sync knowledge sources into the vector store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sync_parser = subparsers.add_parser("sync", help="Embed new or changed chunks and delete removed ones")
+    sync_parser.add_argument("--directory", help="Source directory (default: KNOWLEDGE_SOURCES_DIR)")
+
+    args = parser.parse_args()
+    if args.command == "sync":
+        if args.directory:
+            os.environ["KNOWLEDGE_SOURCES_DIR"] = args.directory
+        # Loading the knowledge base runs the sync and prints its report
+        ShippingKnowledgeBase(preload="eager")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Quantized ONNX embeddings for sentence-transformers/all-MiniLM-L6-v2 on CPU
+
+Runs an int8-quantized ONNX export of the same model through onnxruntime and the
+Rust tokenizer, so the app never imports torch. Export the model once with:
+
+    python AI_And_Tools/onnx_embeddings.py export
+
+which needs torch, transformers and onnx (only on the machine doing the export).
+"""
+
+from langchain_core.embeddings import Embeddings
+from typing import List
+import argparse
+import os
+import numpy as np
+
+DEFAULT_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+def default_model_dir() -> str:
+    """Return Data_And_Config/onnx_minilm relative to the project root"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(project_root, "Data_And_Config", "onnx_minilm")
+
+class OnnxMiniLMEmbeddings(Embeddings):
+    """LangChain embeddings running an exported MiniLM with mean pooling and L2 normalization"""
+
+    def __init__(
+        self,
+        model_dir: str = None,
+        quantized: bool = True,
+        max_length: int = 256,
+        batch_size: int = 32,
+        threads: int = 0
+    ):
+        """
+        Args:
+            model_dir (str, optional): Directory produced by export_onnx_model
+            quantized (bool): Use the int8 model, falling back to fp32 when it is missing
+            max_length (int): Token limit per text, as in the sentence-transformers model
+            batch_size (int): Texts per inference call in embed_documents
+            threads (int): onnxruntime intra-op threads, 0 lets onnxruntime decide
+        """
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        self.model_dir = model_dir or default_model_dir()
+        self.batch_size = batch_size
+
+        model_path = os.path.join(self.model_dir, QUANTIZED_MODEL_FILE if quantized else MODEL_FILE)
+        if quantized and not os.path.exists(model_path):
+            model_path = os.path.join(self.model_dir, MODEL_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"No ONNX model in {self.model_dir}; run: python AI_And_Tools/onnx_embeddings.py export"
+            )
+        self.model_path = model_path
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=self.tokenizer.token_to_id("[PAD]") or 0, pad_token="[PAD]")
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            inputs["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Mean pooling over real tokens, then L2 normalization, as in the sentence-transformers pipeline
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.extend(self._embed(texts[start:start + self.batch_size]).tolist())
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0].tolist()
+
+def export_onnx_model(output_dir: str = None, model_name: str = DEFAULT_MODEL_NAME, quantize: bool = True) -> str:
+    """
+    Export the Hugging Face model to ONNX and quantize its weights to int8
+
+    Args:
+        output_dir (str, optional): Target directory, defaults to Data_And_Config/onnx_minilm
+        model_name (str): Hugging Face model id
+        quantize (bool): Also write model_quantized.onnx with dynamic int8 quantization
+
+    Returns:
+        Output directory
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    output_dir = output_dir or default_model_dir()
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"🔄 Exporting {model_name} to ONNX...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["Ongkir dari Jakarta ke Surabaya"], return_tensors="pt")
+    input_names = ["input_ids", "attention_mask", "token_type_ids"]
+    model_path = os.path.join(output_dir, MODEL_FILE)
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]},
+            opset_version=14
+        )
+    # Fast tokenizers write tokenizer.json, which the tokenizers library loads directly
+    tokenizer.save_pretrained(output_dir)
+    print(f"✅ Wrote {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = os.path.join(output_dir, QUANTIZED_MODEL_FILE)
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        print(f"✅ Wrote {quantized_path}")
+
+    return output_dir
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the ONNX MiniLM embedding model")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export and quantize the model")
+    export_parser.add_argument("--output", help="Output directory (default: Data_And_Config/onnx_minilm)")
+    export_parser.add_argument("--model", default=DEFAULT_MODEL_NAME, help="Hugging Face model id")
+    export_parser.add_argument("--no-quantize", action="store_true", help="Only write the fp32 model")
+
+    args = parser.parse_args()
+    if args.command == "export":
+        export_onnx_model(args.output, args.model, quantize=not args.no_quantize)
+
+if __name__ == "__main__":
+    main()
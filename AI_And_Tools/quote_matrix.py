@@ -0,0 +1,184 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+import asyncio
+import itertools
+import time
+import os
+from rajaongkir_api import RajaOngkirAPI, AsyncRajaOngkirAPI
+
+SERVICE_GROUPS = ("calculate_reguler", "calculate_cargo", "calculate_instant")
+
+class QuoteMatrix:
+    """Concurrent N origins × M destinations × weights shipping quotes"""
+
+    def __init__(
+        self,
+        api: Optional[AsyncRajaOngkirAPI] = None,
+        max_concurrency: int = None,
+        sync_api: Optional[RajaOngkirAPI] = None
+    ):
+        self.api = api or AsyncRajaOngkirAPI()
+        # Blocking callers go through the pooled sync session: running aquote in a new event
+        # loop per call would open (and leak) a fresh async connection pool every time
+        self.sync_api = sync_api or RajaOngkirAPI()
+        # Upstream request rate is capped by the API client's per-endpoint limiter, so cached
+        # cells are not held back; the semaphore only bounds requests in flight
+        self.max_concurrency = max_concurrency or int(os.getenv("QUOTE_MATRIX_CONCURRENCY", "8"))
+
+    async def aquote(
+        self,
+        origin_ids: List[int],
+        destination_ids: List[int],
+        weights: List[float],
+        item_value: float,
+        cod: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Quote every origin/destination/weight combination with bounded concurrency
+
+        Args:
+            origin_ids (list): Origin location IDs
+            destination_ids (list): Destination location IDs
+            weights (list): Package weights in grams
+            item_value (float): Value of the item being shipped
+            cod (bool): Cash on delivery option
+
+        Returns:
+            Dict with the matrix axes, one cell per combination (errors are reported
+            per cell instead of failing the batch) and a summary
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def quote_cell(origin_id, destination_id, weight):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await self.api.calculate_shipping_cost(
+                        shipper_destination_id=int(origin_id),
+                        receiver_destination_id=int(destination_id),
+                        weight=int(weight),
+                        item_value=int(item_value),
+                        cod=cod
+                    )
+                except Exception as e:
+                    result = _error_result(e)
+                return _build_cell(origin_id, destination_id, weight, result, started)
+
+        started = time.perf_counter()
+        cells = await asyncio.gather(*[
+            quote_cell(origin_id, destination_id, weight)
+            for origin_id, destination_id, weight in itertools.product(origin_ids, destination_ids, weights)
+        ])
+        return _build_matrix(origin_ids, destination_ids, weights, item_value, cod, cells, started)
+
+    def quote(
+        self,
+        origin_ids: List[int],
+        destination_ids: List[int],
+        weights: List[float],
+        item_value: float,
+        cod: bool = False
+    ) -> Dict[str, Any]:
+        """Blocking counterpart of aquote, quoting cells on a bounded thread pool with the sync client"""
+        def quote_cell(combination):
+            origin_id, destination_id, weight = combination
+            started = time.perf_counter()
+            try:
+                result = self.sync_api.calculate_shipping_cost(
+                    shipper_destination_id=int(origin_id),
+                    receiver_destination_id=int(destination_id),
+                    weight=int(weight),
+                    item_value=int(item_value),
+                    cod=cod
+                )
+            except Exception as e:
+                result = _error_result(e)
+            return _build_cell(origin_id, destination_id, weight, result, started)
+
+        started = time.perf_counter()
+        combinations = list(itertools.product(origin_ids, destination_ids, weights))
+        workers = max(1, min(self.max_concurrency, len(combinations)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="quote-matrix") as pool:
+            cells = list(pool.map(quote_cell, combinations))
+        return _build_matrix(origin_ids, destination_ids, weights, item_value, cod, cells, started)
+
+def _error_result(error: Exception) -> Dict[str, Any]:
+    return {"meta": {"message": str(error), "code": 500, "status": "error"}, "data": {}}
+
+def _build_cell(origin_id: int, destination_id: int, weight: float, result: Dict[str, Any], started: float) -> Dict[str, Any]:
+    """Turn one calculate_shipping_cost response into a matrix cell"""
+    cell = {
+        "origin_id": int(origin_id),
+        "destination_id": int(destination_id),
+        "weight": weight,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+    meta = result.get("meta", {})
+    if meta.get("status") != "success":
+        cell.update({"status": "error", "error": meta.get("message", "Unknown error"), "options": []})
+        return cell
+
+    options = []
+    data = result.get("data") or {}
+    for group in SERVICE_GROUPS:
+        for option in data.get(group) or []:
+            options.append(dict(option, service_type=group.replace("calculate_", "")))
+    cell.update({
+        "status": "ok",
+        "options": options,
+        "cheapest": min(options, key=lambda option: option["grandtotal"]) if options else None
+    })
+    return cell
+
+def _build_matrix(
+    origin_ids: List[int],
+    destination_ids: List[int],
+    weights: List[float],
+    item_value: float,
+    cod: bool,
+    cells: List[Dict[str, Any]],
+    started: float
+) -> Dict[str, Any]:
+    failed = sum(1 for cell in cells if cell["status"] == "error")
+    return {
+        "origin_ids": [int(origin_id) for origin_id in origin_ids],
+        "destination_ids": [int(destination_id) for destination_id in destination_ids],
+        "weights": list(weights),
+        "item_value": item_value,
+        "cod": cod,
+        "cells": cells,
+        "summary": {
+            "total": len(cells),
+            "succeeded": len(cells) - failed,
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+    }
+
+def format_quote_matrix(matrix: Dict[str, Any]) -> str:
+    """
+    Format a quote matrix into readable text listing the cheapest option per cell
+
+    Args:
+        matrix: Result of QuoteMatrix.quote / aquote
+
+    Returns:
+        Formatted string with one line per origin/destination/weight combination
+    """
+    summary = matrix["summary"]
+    result_text = f"Shipping Quote Matrix ({summary['succeeded']}/{summary['total']} routes quoted):\n\n"
+
+    for cell in matrix["cells"]:
+        route = f"{cell['origin_id']} → {cell['destination_id']} ({cell['weight']:,.0f} g)"
+        if cell["status"] == "error":
+            result_text += f"• {route}: Error - {cell['error']}\n"
+        elif not cell["cheapest"]:
+            result_text += f"• {route}: No shipping options available\n"
+        else:
+            cheapest = cell["cheapest"]
+            result_text += (
+                f"• {route}: cheapest {cheapest['shipping_name']} - {cheapest['service_name']} "
+                f"Rp {cheapest['grandtotal']:,} ({len(cell['options'])} options)\n"
+            )
+
+    return result_text
@@ -1,12 +1,29 @@
+import httpx
 import requests
 from typing import Dict, List, Optional, Any
+import asyncio
 import json
+import time
 import os
+from http_transport import HTTPTransport, AsyncHTTPTransport, get_transport, get_async_transport
+from destination_cache import DestinationCache, get_destination_cache, normalize_keyword
+from tariff_cache import TariffCache, get_tariff_cache
+from resilience import get_endpoint_guard
+from single_flight import get_single_flight
 
 class RajaOngkirAPI:
     """API client for Rajaongkir shipping price service"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        transport: Optional[HTTPTransport] = None,
+        destination_cache: Optional[DestinationCache] = None,
+        tariff_cache: Optional[TariffCache] = None
+    ):
+        # Reuse the process-wide pooled session and caches unless they are injected
+        self.transport = transport or get_transport()
+        self.destination_cache = destination_cache or get_destination_cache()
+        self.tariff_cache = tariff_cache or get_tariff_cache()
         self.base_url = os.getenv("RAJAONGKIR_BASE_URL")
         self.api_key = os.getenv("RAJAONGKIR_API_KEY")
         self.headers = {
@@ -24,15 +41,36 @@ class RajaOngkirAPI:
         Returns:
             Dict containing search results with location data
         """
+        cache_key = normalize_keyword(keyword) or keyword
+        cached = self.destination_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Concurrent identical searches share one upstream call
+        return get_single_flight().do(("search", cache_key), lambda: self._search_upstream(cache_key))
+    
+    def _search_upstream(self, cache_key: str) -> Dict[str, Any]:
+        """Send a destination search to the API behind the rate limiter and circuit breaker"""
+        guard = get_endpoint_guard("search")
+        wait, rejection = guard.admit()
+        if rejection:
+            return self._fallback_response(rejection, self.destination_cache.get(cache_key, allow_stale=True), [])
+        if wait:
+            time.sleep(wait)
+        
         try:
             url = f"{self.base_url}/tariff/api/v1/destination/search"
-            params = {"keyword": keyword}
+            params = {"keyword": cache_key}
             
-            response = requests.get(url, params=params, headers=self.headers)
+            response = self.transport.get(url, params=params, headers=self.headers)
             response.raise_for_status()
+            guard.record()
             
-            return response.json()
+            result = response.json()
+            self.destination_cache.set(cache_key, result)
+            return result
         except requests.exceptions.RequestException as e:
+            guard.record(e)
             return {
                 "meta": {"message": f"Error searching destination: {str(e)}", "code": 500, "status": "error"},
                 "data": []
@@ -63,32 +101,81 @@ class RajaOngkirAPI:
         Returns:
             Dict containing shipping cost calculations
         """
+        cache_args = (
+            shipper_destination_id, receiver_destination_id, weight, item_value,
+            cod, origin_pin_point, destination_pin_point
+        )
+        if self.tariff_cache is not None:
+            cached = self.tariff_cache.get(*cache_args)
+            if cached is not None:
+                return cached
+        
+        # Concurrent identical calculations share one upstream call
+        payload = self._build_calculate_payload(*cache_args)
+        flight_key = ("calculate",) + tuple(sorted(payload.items()))
+        return get_single_flight().do(flight_key, lambda: self._calculate_upstream(cache_args, payload))
+    
+    def _calculate_upstream(self, cache_args: tuple, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a cost calculation to the API behind the rate limiter and circuit breaker"""
+        guard = get_endpoint_guard("calculate")
+        wait, rejection = guard.admit()
+        if rejection:
+            stale = self.tariff_cache.get(*cache_args, allow_stale=True) if self.tariff_cache is not None else None
+            return self._fallback_response(rejection, stale, {})
+        if wait:
+            time.sleep(wait)
+        
         try:
             url = f"{self.base_url}/tariff/api/v1/calculate"
             
-            payload = {
-                "shipper_destination_id": shipper_destination_id,
-                "receiver_destination_id": receiver_destination_id,
-                "weight": weight,
-                "item_value": item_value,
-                "cod": cod
-            }
-            
-            if origin_pin_point:
-                payload["origin_pin_point"] = origin_pin_point
-            if destination_pin_point:
-                payload["destination_pin_point"] = destination_pin_point
-            
-            response = requests.get(url, params=payload, headers=self.headers)
+            response = self.transport.get(url, params=payload, headers=self.headers)
             response.raise_for_status()
+            guard.record()
             
-            return response.json()
+            result = response.json()
+            if self.tariff_cache is not None:
+                self.tariff_cache.set(*cache_args, result)
+            return result
         except requests.exceptions.RequestException as e:
+            guard.record(e)
             return {
                 "meta": {"message": f"Error calculating shipping cost: {str(e)}", "code": 500, "status": "error"},
                 "data": {}
             }
     
+    def _fallback_response(self, rejection: Dict[str, Any], stale: Optional[Dict[str, Any]], empty_data: Any) -> Dict[str, Any]:
+        """Serve stale cached data when the rate limiter or circuit breaker rejects a request"""
+        if stale is not None:
+            stale.setdefault("meta", {})["stale"] = True
+            return stale
+        return dict(rejection, data=empty_data)
+    
+    def _build_calculate_payload(
+        self,
+        shipper_destination_id: int,
+        receiver_destination_id: int,
+        weight: float,
+        item_value: float,
+        cod: bool = False,
+        origin_pin_point: Optional[str] = None,
+        destination_pin_point: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the query parameters for a cost calculation request"""
+        payload = {
+            "shipper_destination_id": shipper_destination_id,
+            "receiver_destination_id": receiver_destination_id,
+            "weight": weight,
+            "item_value": item_value,
+            "cod": cod
+        }
+        
+        if origin_pin_point:
+            payload["origin_pin_point"] = origin_pin_point
+        if destination_pin_point:
+            payload["destination_pin_point"] = destination_pin_point
+        
+        return payload
+    
     def format_location_options(self, search_results: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Format search results into user-friendly location options
@@ -178,3 +265,129 @@ class RajaOngkirAPI:
             result_text += "No shipping options available for this route."
         
         return result_text
+
+class AsyncRajaOngkirAPI(RajaOngkirAPI):
+    """Asyncio API client for Rajaongkir with the same API surface as RajaOngkirAPI"""
+    
+    def __init__(
+        self,
+        transport: Optional[AsyncHTTPTransport] = None,
+        destination_cache: Optional[DestinationCache] = None,
+        tariff_cache: Optional[TariffCache] = None
+    ):
+        super().__init__(destination_cache=destination_cache, tariff_cache=tariff_cache)
+        # Requests go through the process-wide async pool unless a transport is injected
+        self.async_transport = transport or get_async_transport()
+    
+    async def search_destination(self, keyword: str) -> Dict[str, Any]:
+        """
+        Search for destination locations based on keyword without blocking the event loop
+        
+        Args:
+            keyword (str): Search term for location (city, district, etc.)
+            
+        Returns:
+            Dict containing search results with location data
+        """
+        cache_key = normalize_keyword(keyword) or keyword
+        cached = self.destination_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        # Concurrent identical searches share one upstream call
+        return await get_single_flight().ado(("search", cache_key), lambda: self._search_upstream(cache_key))
+    
+    async def _search_upstream(self, cache_key: str) -> Dict[str, Any]:
+        """Send a destination search to the API behind the rate limiter and circuit breaker"""
+        guard = get_endpoint_guard("search")
+        wait, rejection = guard.admit()
+        if rejection:
+            return self._fallback_response(rejection, self.destination_cache.get(cache_key, allow_stale=True), [])
+        if wait:
+            await asyncio.sleep(wait)
+        
+        try:
+            url = f"{self.base_url}/tariff/api/v1/destination/search"
+            params = {"keyword": cache_key}
+            
+            response = await self.async_transport.get(url, params=params, headers=self.headers)
+            response.raise_for_status()
+            guard.record()
+            
+            result = response.json()
+            self.destination_cache.set(cache_key, result)
+            return result
+        except (httpx.HTTPError, ValueError) as e:
+            # ValueError covers a 200 response whose body is not JSON, as the sync client's JSONDecodeError does
+            guard.record(e)
+            return {
+                "meta": {"message": f"Error searching destination: {str(e)}", "code": 500, "status": "error"},
+                "data": []
+            }
+    
+    async def calculate_shipping_cost(
+        self,
+        shipper_destination_id: int,
+        receiver_destination_id: int,
+        weight: float,
+        item_value: float,
+        cod: bool = False,
+        origin_pin_point: Optional[str] = None,
+        destination_pin_point: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Calculate shipping costs between two locations without blocking the event loop
+        
+        Args:
+            shipper_destination_id (int): Origin location ID
+            receiver_destination_id (int): Destination location ID
+            weight (float): Package weight in grams
+            item_value (float): Value of the item being shipped
+            cod (bool): Cash on delivery option
+            origin_pin_point (str, optional): Specific origin coordinates
+            destination_pin_point (str, optional): Specific destination coordinates
+            
+        Returns:
+            Dict containing shipping cost calculations
+        """
+        cache_args = (
+            shipper_destination_id, receiver_destination_id, weight, item_value,
+            cod, origin_pin_point, destination_pin_point
+        )
+        if self.tariff_cache is not None:
+            cached = self.tariff_cache.get(*cache_args)
+            if cached is not None:
+                return cached
+        
+        # Concurrent identical calculations share one upstream call
+        payload = self._build_calculate_payload(*cache_args)
+        flight_key = ("calculate",) + tuple(sorted(payload.items()))
+        return await get_single_flight().ado(flight_key, lambda: self._calculate_upstream(cache_args, payload))
+    
+    async def _calculate_upstream(self, cache_args: tuple, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a cost calculation to the API behind the rate limiter and circuit breaker"""
+        guard = get_endpoint_guard("calculate")
+        wait, rejection = guard.admit()
+        if rejection:
+            stale = self.tariff_cache.get(*cache_args, allow_stale=True) if self.tariff_cache is not None else None
+            return self._fallback_response(rejection, stale, {})
+        if wait:
+            await asyncio.sleep(wait)
+        
+        try:
+            url = f"{self.base_url}/tariff/api/v1/calculate"
+            
+            response = await self.async_transport.get(url, params=payload, headers=self.headers)
+            response.raise_for_status()
+            guard.record()
+            
+            result = response.json()
+            if self.tariff_cache is not None:
+                self.tariff_cache.set(*cache_args, result)
+            return result
+        except (httpx.HTTPError, ValueError) as e:
+            guard.record(e)
+            return {
+                "meta": {"message": f"Error calculating shipping cost: {str(e)}", "code": 500, "status": "error"},
+                "data": {}
+            }
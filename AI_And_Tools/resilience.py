@@ -0,0 +1,219 @@
+from typing import Dict, Any, Optional, Tuple
+import threading
+import time
+import os
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._granted = 0
+        self._throttled = 0
+        self._rejected = 0
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """
+        Reserve one token
+
+        Args:
+            max_wait (float): Longest acceptable wait in seconds
+
+        Returns:
+            Seconds to wait before sending the request, or None if the wait would exceed max_wait
+        """
+        if not self.rate:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                self._rejected += 1
+                return None
+
+            # Tokens may go negative: later callers queue up behind this reservation
+            self._tokens -= 1
+            self._granted += 1
+            if wait:
+                self._throttled += 1
+            return wait
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "granted": self._granted,
+                "throttled": self._throttled,
+                "rejected": self._rejected
+            }
+
+class CircuitBreaker:
+    """Closed/open/half-open circuit breaker driven by consecutive upstream failures"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+        self._successes = 0
+        self._failures = 0
+        self._rejected = 0
+        self._times_opened = 0
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent; after reset_timeout a single trial request is let through"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == self.OPEN and now - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self._state == self.CLOSED:
+                return True
+            # A trial that never reported back is abandoned after reset_timeout
+            if self._state == self.HALF_OPEN and (
+                not self._trial_in_flight or now - self._trial_started >= self.reset_timeout
+            ):
+                self._trial_in_flight = True
+                self._trial_started = now
+                return True
+
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._successes += 1
+            self._consecutive_failures = 0
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give back a half-open trial slot that was granted but never used"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "open_for": round(time.monotonic() - self._opened_at, 1) if self._state == self.OPEN else 0.0,
+                "times_opened": self._times_opened,
+                "successes": self._successes,
+                "failures": self._failures,
+                "rejected": self._rejected
+            }
+
+class EndpointGuard:
+    """Rate limiter and circuit breaker for one API endpoint"""
+
+    def __init__(self, name: str, limiter: TokenBucket, breaker: CircuitBreaker, max_wait: float):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_wait = max_wait
+
+    def admit(self) -> Tuple[float, Optional[Dict[str, Any]]]:
+        """
+        Check the breaker, then reserve a rate-limit token for an admitted request
+
+        Returns:
+            (wait, error): seconds to wait before sending the request, and an error
+            response when the request must not be sent at all
+        """
+        # An open circuit must not consume tokens meant for requests that will actually be sent
+        if not self.breaker.allow_request():
+            return 0.0, self._error_response(503, f"RajaOngkir {self.name} endpoint is temporarily unavailable (circuit open)")
+
+        wait = self.limiter.reserve(self.max_wait)
+        if wait is None:
+            self.breaker.release_trial()
+            return 0.0, self._error_response(429, f"RajaOngkir {self.name} rate limit exceeded, please retry shortly")
+        return wait, None
+
+    def record(self, error: Optional[Exception] = None):
+        """Feed the outcome of a request to the breaker; client errors (4xx except 429) do not count"""
+        if error is None:
+            self.breaker.record_success()
+            return
+
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if status is None or status >= 500 or status == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _error_response(self, code: int, message: str) -> Dict[str, Any]:
+        return {"meta": {"message": message, "code": code, "status": "error"}}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rate_limiter": self.limiter.get_stats(),
+            "circuit_breaker": self.breaker.get_stats(),
+            "max_wait": self.max_wait
+        }
+
+def _endpoint_setting(endpoint: str, name: str, default: str) -> str:
+    """Read RAJAONGKIR_<ENDPOINT>_<NAME>, falling back to RAJAONGKIR_<NAME> and then the default"""
+    return os.getenv(f"RAJAONGKIR_{endpoint.upper()}_{name}") or os.getenv(f"RAJAONGKIR_{name}", default)
+
+_guards: Dict[str, EndpointGuard] = {}
+_guards_lock = threading.Lock()
+
+def get_endpoint_guard(endpoint: str) -> EndpointGuard:
+    """Return the process-wide guard for an endpoint ("search" or "calculate")"""
+    guard = _guards.get(endpoint)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.get(endpoint)
+            if guard is None:
+                guard = EndpointGuard(
+                    name=endpoint,
+                    limiter=TokenBucket(
+                        rate=float(_endpoint_setting(endpoint, "RATE_LIMIT", "10")),
+                        burst=int(_endpoint_setting(endpoint, "RATE_BURST", "20"))
+                    ),
+                    breaker=CircuitBreaker(
+                        failure_threshold=int(_endpoint_setting(endpoint, "FAILURE_THRESHOLD", "5")),
+                        reset_timeout=float(_endpoint_setting(endpoint, "RESET_TIMEOUT", "30"))
+                    ),
+                    max_wait=float(_endpoint_setting(endpoint, "RATE_MAX_WAIT", "5"))
+                )
+                _guards[endpoint] = guard
+    return guard
+
+def get_resilience_stats() -> Dict[str, Any]:
+    """Return rate limiter and circuit breaker state for every endpoint, for monitoring"""
+    return {name: guard.get_stats() for name, guard in list(_guards.items())}
@@ -1,7 +1,32 @@
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 from typing import Dict, List, Any, Optional
-from rajaongkir_api import RajaOngkirAPI
+from rajaongkir_api import RajaOngkirAPI, AsyncRajaOngkirAPI
+from destination_index import get_destination_index
+from quote_matrix import QuoteMatrix, format_quote_matrix
+from tracing import traced
+
+def find_locations(keyword: str) -> List[Dict[str, Any]]:
+    """Resolve a keyword from the offline destination index, falling back to the API on a miss"""
+    index = get_destination_index()
+    locations = index.search(keyword) if index is not None else []
+    if not locations:
+        api = RajaOngkirAPI()
+        locations = api.format_location_options(api.search_destination(keyword))
+        if locations and index is not None:
+            index.add_locations(locations, keyword=keyword)
+    return locations
+
+async def afind_locations(keyword: str) -> List[Dict[str, Any]]:
+    """Async variant of find_locations"""
+    index = get_destination_index()
+    locations = index.search(keyword) if index is not None else []
+    if not locations:
+        api = AsyncRajaOngkirAPI()
+        locations = api.format_location_options(await api.search_destination(keyword))
+        if locations and index is not None:
+            index.add_locations(locations, keyword=keyword)
+    return locations
 
 class SearchDestinationInput(BaseModel):
     """Input schema for destination search tool"""
@@ -17,6 +42,14 @@ class CalculateShippingInput(BaseModel):
     origin_pin_point: Optional[str] = Field(default=None, description="Specific origin coordinates (optional)")
     destination_pin_point: Optional[str] = Field(default=None, description="Specific destination coordinates (optional)")
 
+class QuoteMatrixInput(BaseModel):
+    """Input schema for the batch quoting tool"""
+    origin_ids: List[int] = Field(description="Origin location IDs from destination search")
+    destination_ids: List[int] = Field(description="Destination location IDs from destination search")
+    weights: List[float] = Field(description="Package weights in grams to quote for every route")
+    item_value: float = Field(description="Value of the item being shipped in Rupiah")
+    cod: bool = Field(default=False, description="Cash on delivery option (true/false)")
+
 class SearchDestinationTool(BaseTool):
     """Tool for searching destination locations"""
     name: str = "search_destination"
@@ -27,25 +60,36 @@ class SearchDestinationTool(BaseTool):
     """
     args_schema: type[BaseModel] = SearchDestinationInput
     
+    @traced("tool.search_destination", error_prefix="Error")
     def _run(self, keyword: str) -> str:
         """Execute the destination search"""
         try:
-            api = RajaOngkirAPI()
-            result = api.search_destination(keyword)
-            locations = api.format_location_options(result)
-            
-            if not locations:
-                return f"No locations found for '{keyword}'. Please try a different spelling or use a more general term (e.g., city name instead of specific address)."
-            
-            response = f"Found {len(locations)} location(s) for '{keyword}':\n\n"
-            for i, location in enumerate(locations, 1):
-                response += f"{i}. ID: {location['id']} - {location['display_name']}\n"
-                response += f"{location['subdistrict']}, {location['district']}, {location['city']}, {location['province']}\n"
-                response += f"ZIP: {location['zip_code']}\n\n"
-            
-            return response
+            locations = find_locations(keyword)
+            return self._format_response(keyword, locations)
         except Exception as e:
             return f"Error searching for location: {str(e)}"
+    
+    @traced("tool.search_destination", error_prefix="Error")
+    async def _arun(self, keyword: str) -> str:
+        """Execute the destination search without blocking the event loop"""
+        try:
+            locations = await afind_locations(keyword)
+            return self._format_response(keyword, locations)
+        except Exception as e:
+            return f"Error searching for location: {str(e)}"
+    
+    def _format_response(self, keyword: str, locations: List[Dict[str, Any]]) -> str:
+        """Format location options into the text returned to the agent"""
+        if not locations:
+            return f"No locations found for '{keyword}'. Please try a different spelling or use a more general term (e.g., city name instead of specific address)."
+        
+        response = f"Found {len(locations)} location(s) for '{keyword}':\n\n"
+        for i, location in enumerate(locations, 1):
+            response += f"{i}. ID: {location['id']} - {location['display_name']}\n"
+            response += f"{location['subdistrict']}, {location['district']}, {location['city']}, {location['province']}\n"
+            response += f"ZIP: {location['zip_code']}\n\n"
+        
+        return response
 
 class CalculateShippingTool(BaseTool):
     """Tool for calculating shipping costs"""
@@ -57,6 +101,7 @@ class CalculateShippingTool(BaseTool):
     """
     args_schema: type[BaseModel] = CalculateShippingInput
     
+    @traced("tool.calculate_shipping_cost", error_prefix="Error")
     def _run(
         self,
         shipper_destination_id: int,
@@ -83,10 +128,82 @@ class CalculateShippingTool(BaseTool):
             return api.format_shipping_results(result)
         except Exception as e:
             return f"Error calculating shipping cost: {str(e)}"
+    
+    @traced("tool.calculate_shipping_cost", error_prefix="Error")
+    async def _arun(
+        self,
+        shipper_destination_id: int,
+        receiver_destination_id: int,
+        weight: float,
+        item_value: float,
+        cod: bool = False,
+        origin_pin_point: Optional[str] = None,
+        destination_pin_point: Optional[str] = None
+    ) -> str:
+        """Execute the shipping cost calculation without blocking the event loop"""
+        try:
+            api = AsyncRajaOngkirAPI()
+            result = await api.calculate_shipping_cost(
+                shipper_destination_id=int(shipper_destination_id),
+                receiver_destination_id=int(receiver_destination_id),
+                weight=int(weight),
+                item_value=int(item_value),
+                cod=cod,
+                origin_pin_point=origin_pin_point,
+                destination_pin_point=destination_pin_point
+            )
+            
+            return api.format_shipping_results(result)
+        except Exception as e:
+            return f"Error calculating shipping cost: {str(e)}"
+
+class QuoteMatrixTool(BaseTool):
+    """Tool for quoting many routes and weights at once"""
+    name: str = "calculate_shipping_matrix"
+    description: str = """
+    Calculate shipping costs for several origins, destinations and weights in one call. Use this tool
+    instead of repeated calculate_shipping_cost calls when the user wants to compare more than one
+    route or weight. Every origin is quoted to every destination for every weight; failed routes are
+    reported individually. Returns the cheapest option for each combination.
+    """
+    args_schema: type[BaseModel] = QuoteMatrixInput
+    
+    @traced("tool.calculate_shipping_matrix", error_prefix="Error")
+    def _run(
+        self,
+        origin_ids: List[int],
+        destination_ids: List[int],
+        weights: List[float],
+        item_value: float,
+        cod: bool = False
+    ) -> str:
+        """Execute the batch quote"""
+        try:
+            matrix = QuoteMatrix().quote(origin_ids, destination_ids, weights, item_value, cod)
+            return format_quote_matrix(matrix)
+        except Exception as e:
+            return f"Error calculating shipping matrix: {str(e)}"
+    
+    @traced("tool.calculate_shipping_matrix", error_prefix="Error")
+    async def _arun(
+        self,
+        origin_ids: List[int],
+        destination_ids: List[int],
+        weights: List[float],
+        item_value: float,
+        cod: bool = False
+    ) -> str:
+        """Execute the batch quote without blocking the event loop"""
+        try:
+            matrix = await QuoteMatrix().aquote(origin_ids, destination_ids, weights, item_value, cod)
+            return format_quote_matrix(matrix)
+        except Exception as e:
+            return f"Error calculating shipping matrix: {str(e)}"
 
 def create_shipping_tools():
     """Create and return all shipping-related tools"""
     return [
         SearchDestinationTool(),
-        CalculateShippingTool()
+        CalculateShippingTool(),
+        QuoteMatrixTool()
     ]
@@ -0,0 +1,126 @@
+from typing import Dict, Any, Callable, Awaitable, Hashable, Optional
+import asyncio
+import copy
+import threading
+
+class _Call:
+    """An in-flight synchronous call that followers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Deduplicates identical in-flight calls so concurrent callers share one upstream request"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._futures: Dict[Hashable, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._calls_total = 0
+        self._executed = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all threads calling with the same key at the same time
+
+        Args:
+            key: Identity of the request, e.g. ("search", keyword)
+            fn: Function performing the upstream call
+
+        Returns:
+            The result of fn; followers receive a copy of the leader's result
+        """
+        with self._lock:
+            self._calls_total += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executed += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn once for all coroutines on the running event loop calling with the same key
+
+        Args:
+            key: Identity of the request, e.g. ("search", keyword)
+            fn: Coroutine function performing the upstream call
+
+        Returns:
+            The result of fn; followers receive a copy of the leader's result
+        """
+        loop_key = (id(asyncio.get_running_loop()), key)
+        with self._lock:
+            self._calls_total += 1
+            future = self._futures.get(loop_key)
+            leader = future is None
+            if leader:
+                future = self._futures[loop_key] = asyncio.get_running_loop().create_future()
+                self._executed += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            # Shield so a cancelled follower does not cancel the shared call
+            result = await asyncio.shield(future)
+            return copy.deepcopy(result)
+
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            with self._lock:
+                del self._futures[loop_key]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return how many calls were executed upstream and how many were coalesced"""
+        with self._lock:
+            return {
+                "calls": self._calls_total,
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls) + len(self._futures)
+            }
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide single-flight group shared by all API clients"""
+    global _single_flight
+    if _single_flight is None:
+        with _single_flight_lock:
+            if _single_flight is None:
+                _single_flight = SingleFlight()
+    return _single_flight
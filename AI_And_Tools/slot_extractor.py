@@ -0,0 +1,214 @@
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+NUMBER = r"\d+(?:[.,]\d+)*"
+
+WEIGHT_UNITS = {
+    "kg": 1000, "kgs": 1000, "kilo": 1000, "kilos": 1000, "kilogram": 1000, "kilograms": 1000,
+    "ons": 100,
+    "g": 1, "gr": 1, "gram": 1, "grams": 1, "gramme": 1
+}
+
+VALUE_MULTIPLIERS = {
+    "rb": 1_000, "ribu": 1_000, "k": 1_000, "rebu": 1_000,
+    "jt": 1_000_000, "juta": 1_000_000, "mio": 1_000_000, "million": 1_000_000
+}
+
+COD_PATTERN = r"\bcod\b|bayar di tempat|cash on delivery"
+NEGATIONS = {
+    "tanpa", "non", "bukan", "tidak", "tak", "gak", "nggak", "ga", "enggak", "jangan",
+    "no", "not", "without", "dont"
+}
+
+ORIGIN_MARKERS = {"dari", "from", "asal"}
+DESTINATION_MARKERS = {"ke", "to", "menuju", "tujuan", "kekota"}
+
+# "to" after these is an infinitive ("want to know", "how to use"), not a destination
+INFINITIVE_CUES = {
+    "want", "wants", "wanted", "need", "needs", "how", "like", "going", "trying", "try", "able",
+    "have", "has", "wish", "plan", "planning", "hope", "what", "where", "when", "is", "are", "used"
+}
+
+# "ke" or "to" followed by these names a recipient or a place type, not a city ("ke teman di Surabaya")
+RECIPIENT_WORDS = {
+    "teman", "temen", "kawan", "saudara", "keluarga", "pacar", "orang", "ibu", "bapak", "mama", "papa",
+    "kakak", "adik", "rumah", "kantor", "alamat", "customer", "pelanggan", "pembeli", "toko",
+    "friend", "friends", "family", "mom", "dad", "mother", "father", "home", "office", "address",
+    "customers", "buyer", "me", "you", "him", "her", "them", "us"
+}
+
+# Words that end a location phrase or can never be part of one
+STOPWORDS = {
+    "ke", "to", "menuju", "tujuan", "dari", "from", "asal", "berat", "weight", "weighing", "nilai", "value",
+    "harga", "worth", "seharga", "dengan", "with", "for", "untuk", "and", "dan", "rp", "idr", "rupiah",
+    "cod", "send", "ship", "kirim", "mengirim", "deliver", "paket", "package", "barang", "item", "a", "an",
+    "the", "my", "berapa", "how", "much", "ongkir", "ongkos", "biaya", "cost", "price", "shipping", "pakai",
+    "via", "pake", "yang", "is", "it", "of", "sebesar", "bayar", "di", "tempat", "please", "tolong", "dong",
+    "ya", "kak", "gan", "what", "whats", "s", "be", "will", "would", "know", "use", "get", "check", "see", "find"
+} | set(WEIGHT_UNITS) | set(VALUE_MULTIPLIERS)
+
+def parse_number(text: str) -> float:
+    """
+    Parse Indonesian and English number formats
+
+    "1,5" and "2.5" are decimals, while "1.000", "500,000" and "1.250.000"
+    use thousands separators.
+
+    Args:
+        text (str): Number as written by the user
+
+    Returns:
+        Parsed value as float
+    """
+    separators = re.findall(r"[.,]", text)
+    if not separators:
+        return float(text)
+
+    groups = re.split(r"[.,]", text)
+    # Several separators, or a single one followed by exactly three digits, mark thousands
+    if len(separators) > 1 and len(set(separators)) == 1 or (len(separators) == 1 and len(groups[-1]) == 3):
+        return float("".join(groups))
+    if len(set(separators)) == 2:
+        # "1.250,50" or "1,250.50": the last separator is the decimal point
+        decimal = separators[-1]
+        thousands = "," if decimal == "." else "."
+        return float(text.replace(thousands, "").replace(decimal, "."))
+    return float(text.replace(",", "."))
+
+def _extract_weight(text: str) -> Optional[float]:
+    units = "|".join(sorted(WEIGHT_UNITS, key=len, reverse=True))
+    match = re.search(rf"({NUMBER})\s*({units})\b", text)
+    if not match:
+        return None
+    return parse_number(match.group(1)) * WEIGHT_UNITS[match.group(2)]
+
+def _extract_item_value(text: str) -> Optional[float]:
+    multipliers = "|".join(sorted(VALUE_MULTIPLIERS, key=len, reverse=True))
+    patterns = [
+        # "Rp 500.000", "Rp1,5jt", "IDR 200rb"
+        rf"(?:rp\.?|idr)\s*({NUMBER})\s*({multipliers})?\b",
+        # "500rb", "1jt", "1,5 juta", "200k"
+        rf"\b({NUMBER})\s*({multipliers})\b",
+        # "500000 rupiah"
+        rf"\b({NUMBER})\s*(?:rupiah)\b()",
+        # "nilai 500000", "worth 100000", "harga 250.000"
+        rf"\b(?:nilai|nilainya|value|worth|harga|harganya|seharga|sebesar|valued at)\s*(?:of\s*)?({NUMBER})\s*({multipliers})?\b"
+    ]
+    for pattern in patterns:
+        match = re.search(pattern, text)
+        if match:
+            value = parse_number(match.group(1))
+            multiplier = match.group(2)
+            return value * VALUE_MULTIPLIERS[multiplier] if multiplier else value
+    return None
+
+def _extract_cod(text: str) -> Optional[bool]:
+    """
+    Decide whether COD is wanted from every COD mention in the text
+
+    A negation in the two words before a mention ("tanpa COD", "non-cod", "no COD")
+    declines it. A negation right after one ("bisa cod gak?") turns the mention into
+    a question, and conflicting mentions cannot be settled, so both give None.
+    """
+    verdicts = set()
+    for match in re.finditer(COD_PATTERN, text):
+        before = re.findall(r"[a-z]+", re.split(r"[.,;:!?]", text[:match.start()])[-1])[-2:]
+        after = re.findall(r"[a-z]+", re.split(r"[.,;:!?]", text[match.end():])[0])[:2]
+        if NEGATIONS & set(before):
+            verdicts.add(False)
+        elif NEGATIONS & set(after):
+            return None
+        else:
+            verdicts.add(True)
+    return verdicts.pop() if len(verdicts) == 1 else None
+
+def mentions_cod(text: str) -> bool:
+    """Return True if the text refers to COD at all, whether or not the intent is clear"""
+    return re.search(COD_PATTERN, text.lower()) is not None
+
+def _location_phrase(words: List[str]) -> List[str]:
+    phrase = []
+    for word in words:
+        if word in STOPWORDS or not word.isalpha() or len(phrase) == 3:
+            break
+        phrase.append(word)
+    return phrase
+
+def _is_marker(tokens: List[str], i: int, markers: set) -> bool:
+    """Return True if tokens[i] is a marker introducing a place rather than an infinitive or a recipient"""
+    if tokens[i] not in markers:
+        return False
+    if i > 0 and tokens[i - 1] in INFINITIVE_CUES:
+        return False
+    return i + 1 >= len(tokens) or tokens[i + 1] not in RECIPIENT_WORDS
+
+def _location_before(tokens: List[str], markers: set) -> Optional[str]:
+    """Return the location phrase right before a destination marker, as in Jakarta ke Surabaya"""
+    for i in range(len(tokens)):
+        if _is_marker(tokens, i, markers):
+            words = _location_phrase(reversed(tokens[:i]))
+            if words:
+                return " ".join(reversed(words))
+    return None
+
+def _location_after(tokens: List[str], markers: set, start: int = 0) -> Optional[Tuple[str, int]]:
+    """Return the first non-empty location phrase following one of the markers and the index after it"""
+    for i in range(start, len(tokens)):
+        if not _is_marker(tokens, i, markers):
+            continue
+        words = _location_phrase(tokens[i + 1:])
+        if words:
+            return " ".join(words), i + 1 + len(words)
+    return None
+
+def extract_shipping_slots(text: str) -> Dict[str, Any]:
+    """
+    Extract shipping parameters from Indonesian or English free text
+
+    Args:
+        text (str): User message, e.g. "kirim 1,5 kg dari Jakarta ke Surabaya nilai 500rb"
+
+    Returns:
+        Dict with any of origin, destination, weight (grams), item_value (Rupiah) and cod;
+        cod is left out when COD is mentioned but it is unclear whether it is wanted
+    """
+    lowered = text.lower()
+    info = {}
+
+    weight = _extract_weight(lowered)
+    if weight is not None:
+        info["weight"] = weight
+
+    # Remove the weight expression so its number is not read as an item value
+    without_weight = re.sub(
+        rf"{NUMBER}\s*(?:{'|'.join(sorted(WEIGHT_UNITS, key=len, reverse=True))})\b", " ", lowered
+    )
+    item_value = _extract_item_value(without_weight)
+    if item_value is not None:
+        info["item_value"] = item_value
+
+    # "n't" becomes a separate "not" so "don't want COD" reads as a negation
+    cod = _extract_cod(lowered.replace("n't", " not"))
+    if cod is not None:
+        info["cod"] = cod
+
+    tokens = re.findall(r"[a-z]+|\d+(?:[.,]\d+)*|[^\sa-z\d]", lowered)
+    origin_match = _location_after(tokens, ORIGIN_MARKERS)
+    origin = origin_match[0] if origin_match else _location_before(tokens, DESTINATION_MARKERS)
+    destination = None
+    # "from Jakarta to Surabaya": the marker right after the origin phrase is the most reliable one
+    if origin_match and origin_match[1] < len(tokens) and _is_marker(tokens, origin_match[1], DESTINATION_MARKERS):
+        destination = _location_after(tokens, DESTINATION_MARKERS, origin_match[1])
+    destination = destination or _location_after(tokens, DESTINATION_MARKERS)
+    if destination:
+        destination = destination[0]
+    if origin:
+        info["origin"] = origin
+    if destination:
+        info["destination"] = destination
+
+    return info
+
+def has_all_slots(info: Dict[str, Any]) -> bool:
+    """Return True when every parameter needed for a quote was extracted"""
+    return all(info.get(slot) for slot in ("origin", "destination", "weight", "item_value"))
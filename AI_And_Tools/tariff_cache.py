@@ -0,0 +1,272 @@
+from typing import Dict, Any, Optional
+import json
+import math
+import sqlite3
+import threading
+import time
+import os
+
+class TariffCache:
+    """Persistent SQLite cache for shipping cost calculations keyed by route and weight bracket"""
+
+    def __init__(
+        self,
+        db_path: str = None,
+        ttl: float = 43200,
+        weight_bracket: int = 0,
+        weight_tolerance: int = 300,
+        stale_retention: float = 604800,
+        purge_every: int = 500
+    ):
+        """
+        Args:
+            db_path (str, optional): SQLite file, defaults to Data_And_Config/tariff_cache.db
+            ttl (float): Seconds an entry is served as fresh
+            weight_bracket (int): Bracket size in grams, 0 to key on the exact weight
+            weight_tolerance (int): Grams above a bracket boundary still billed in the lower bracket
+            stale_retention (float): Seconds an expired entry is kept as an outage fallback before it is deleted
+            purge_every (int): Writes between purges of entries past their retention
+        """
+        if db_path is None:
+            # Default to Data_And_Config/tariff_cache.db relative to project root
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            db_path = os.path.join(project_root, "Data_And_Config", "tariff_cache.db")
+        self.db_path = db_path
+        self.ttl = ttl
+        self.weight_bracket = weight_bracket
+        self.weight_tolerance = weight_tolerance
+        self.stale_retention = stale_retention
+        self.purge_every = purge_every
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes_since_purge = 0
+        self._purged = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tariffs (
+                cache_key TEXT PRIMARY KEY,
+                shipper_destination_id INTEGER NOT NULL,
+                receiver_destination_id INTEGER NOT NULL,
+                weight_bucket INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tariffs_route ON tariffs (shipper_destination_id, receiver_destination_id)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tariffs_expires ON tariffs (expires_at)")
+        self._conn.commit()
+        # Every route and weight adds a row, so drop the ones nobody can be served any more
+        self.purge_expired()
+
+    def bucket_weight(self, weight: float) -> int:
+        """
+        Map a weight in grams to its billing bracket
+
+        With a 1000g bracket and 300g tolerance, 1000g and 1010g share bracket 1
+        while 1301g falls into bracket 2, matching per-kg courier billing.
+
+        Args:
+            weight (float): Package weight in grams
+
+        Returns:
+            Bracket number, or the exact weight when bucketing is disabled
+        """
+        if not self.weight_bracket:
+            return int(math.ceil(weight))
+        return max(1, math.ceil((weight - self.weight_tolerance) / self.weight_bracket))
+
+    def _make_key(
+        self,
+        shipper_destination_id: int,
+        receiver_destination_id: int,
+        weight: float,
+        item_value: float,
+        cod: bool,
+        origin_pin_point: Optional[str],
+        destination_pin_point: Optional[str]
+    ) -> str:
+        return json.dumps([
+            int(shipper_destination_id),
+            int(receiver_destination_id),
+            self.bucket_weight(weight),
+            self.weight_bracket,
+            int(item_value),
+            bool(cod),
+            origin_pin_point,
+            destination_pin_point
+        ])
+
+    def get(
+        self,
+        shipper_destination_id: int,
+        receiver_destination_id: int,
+        weight: float,
+        item_value: float,
+        cod: bool = False,
+        origin_pin_point: Optional[str] = None,
+        destination_pin_point: Optional[str] = None,
+        allow_stale: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached calculation for the given route and parameters
+
+        Args:
+            allow_stale (bool): Also return expired entries, e.g. while the API is unavailable
+
+        Returns:
+            Cached API response, or None on a miss or expired entry
+        """
+        key = self._make_key(
+            shipper_destination_id, receiver_destination_id, weight, item_value,
+            cod, origin_pin_point, destination_pin_point
+        )
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response FROM tariffs WHERE cache_key = ? AND expires_at > ?",
+                (key, 0.0 if allow_stale else time.time())
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return json.loads(row[0])
+
+    def set(
+        self,
+        shipper_destination_id: int,
+        receiver_destination_id: int,
+        weight: float,
+        item_value: float,
+        cod: bool,
+        origin_pin_point: Optional[str],
+        destination_pin_point: Optional[str],
+        response: Dict[str, Any],
+        ttl: Optional[float] = None
+    ):
+        """
+        Store a successful calculation; error responses are ignored
+
+        Args:
+            response (dict): Raw API response from cost calculation
+            ttl (float, optional): Per-entry expiry in seconds, defaults to the cache TTL
+        """
+        if response.get("meta", {}).get("status") != "success":
+            return
+
+        key = self._make_key(
+            shipper_destination_id, receiver_destination_id, weight, item_value,
+            cod, origin_pin_point, destination_pin_point
+        )
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tariffs VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    int(shipper_destination_id),
+                    int(receiver_destination_id),
+                    self.bucket_weight(weight),
+                    json.dumps(response),
+                    now,
+                    now + (self.ttl if ttl is None else ttl)
+                )
+            )
+            self._conn.commit()
+            self._writes_since_purge += 1
+            purge = self.purge_every and self._writes_since_purge >= self.purge_every
+        if purge:
+            self.purge_expired()
+
+    def invalidate(
+        self,
+        shipper_destination_id: Optional[int] = None,
+        receiver_destination_id: Optional[int] = None
+    ) -> int:
+        """
+        Remove cached tariffs for a route, an origin, a destination, or everything
+
+        Args:
+            shipper_destination_id (int, optional): Only remove entries from this origin
+            receiver_destination_id (int, optional): Only remove entries to this destination
+
+        Returns:
+            Number of removed entries
+        """
+        conditions = []
+        params = []
+        if shipper_destination_id is not None:
+            conditions.append("shipper_destination_id = ?")
+            params.append(int(shipper_destination_id))
+        if receiver_destination_id is not None:
+            conditions.append("receiver_destination_id = ?")
+            params.append(int(receiver_destination_id))
+
+        query = "DELETE FROM tariffs"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        with self._lock:
+            removed = self._conn.execute(query, params).rowcount
+            self._conn.commit()
+        return removed
+
+    def purge_expired(self, retention: Optional[float] = None) -> int:
+        """
+        Delete entries that expired more than retention seconds ago
+
+        Args:
+            retention (float, optional): Grace period for stale fallbacks, defaults to stale_retention
+
+        Returns:
+            Number of removed entries
+        """
+        cutoff = time.time() - (self.stale_retention if retention is None else retention)
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM tariffs WHERE expires_at < ?", (cutoff,)).rowcount
+            self._conn.commit()
+            self._writes_since_purge = 0
+            self._purged += removed
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the number of stored entries"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM tariffs").fetchone()[0]
+            lookups = self._hits + self._misses
+            return {
+                "entries": entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "purged": self._purged,
+                "weight_bracket": self.weight_bracket,
+                "db_path": self.db_path
+            }
+
+_cache: Optional[TariffCache] = None
+_cache_lock = threading.Lock()
+
+def get_tariff_cache() -> Optional[TariffCache]:
+    """Return the process-wide tariff cache, or None when disabled through TARIFF_CACHE_ENABLED"""
+    global _cache
+    if os.getenv("TARIFF_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TariffCache(
+                    db_path=os.getenv("TARIFF_CACHE_PATH") or None,
+                    ttl=float(os.getenv("TARIFF_CACHE_TTL", "43200")),
+                    weight_bracket=int(os.getenv("TARIFF_CACHE_WEIGHT_BRACKET", "0")),
+                    weight_tolerance=int(os.getenv("TARIFF_CACHE_WEIGHT_TOLERANCE", "300")),
+                    stale_retention=float(os.getenv("TARIFF_CACHE_STALE_RETENTION", "604800"))
+                )
+    return _cache
@@ -0,0 +1,66 @@
+from typing import Any, Iterable
+import threading
+
+# Role and separator tokens every chat message adds on top of its content
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_lock = threading.Lock()
+_encoding_loaded = False
+
+def _get_encoding():
+    """Return the tiktoken encoding, or None when tiktoken or its BPE file is unavailable"""
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception:
+                # tiktoken downloads its vocabulary on first use; offline we estimate instead
+                _encoding = None
+            _encoding_loaded = True
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text
+
+    Uses tiktoken's cl100k_base vocabulary, which is close to Mistral's tokenizer for
+    budgeting purposes, and falls back to roughly four characters per token.
+
+    Args:
+        text (str): Text to count
+
+    Returns:
+        Token count
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def count_message_tokens(messages: Iterable[Any]) -> int:
+    """
+    Count the tokens of chat messages, including the per-message overhead
+
+    Args:
+        messages: LangChain messages or plain strings
+
+    Returns:
+        Token count
+    """
+    total = 0
+    for message in messages:
+        content = getattr(message, "content", message)
+        if not isinstance(content, str):
+            content = str(content)
+        total += count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        tool_calls = getattr(message, "tool_calls", None)
+        if tool_calls:
+            total += count_tokens(str(tool_calls))
+    return total
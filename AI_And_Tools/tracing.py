@@ -0,0 +1,432 @@
+"""
+Lightweight per-stage tracing for chat turns
+
+Spans nest through a context variable, so a chat turn, its retrieval, each LLM call, each
+tool run and each HTTP request form one trace. Finished traces are handed to exporters on a
+background thread: JSON lines, OTLP/JSON (to a file or an OTLP/HTTP collector such as
+http://localhost:4318/v1/traces) or an in-memory list for benchmarks.
+
+Enable with TRACING_ENABLED=true; see Data_And_Config/.env.example for the exporter settings.
+"""
+
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+from token_counter import count_message_tokens
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from uuid import UUID
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import threading
+import time
+import requests
+
+SERVICE_NAME = "shipping-price-checker"
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    """One timed stage of a trace with its attributes"""
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], kind: int, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.kind = kind
+        self.attributes = dict(attributes)
+        self.status = STATUS_OK
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self._started = time.perf_counter()
+        self.duration = None
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_error(self, message: str):
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def end(self):
+        """Finish the span and hand it to the tracer; ending twice has no effect"""
+        if self.end_ns is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        self.end_ns = self.start_ns + int(self.duration * 1e9)
+        self.tracer._finish(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the span as a flat JSON-lines record"""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_unix_nano": self.start_ns,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": "error" if self.status == STATUS_ERROR else "ok",
+            "status_message": self.status_message or None,
+            "attributes": self.attributes
+        }
+
+class _NoopSpan:
+    """Stand-in returned while tracing is disabled"""
+
+    trace_id = span_id = parent_id = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        pass
+
+    def record_error(self, message: str):
+        pass
+
+    def end(self):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+class JsonLinesExporter:
+    """Appends one JSON object per span to a file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}
+
+class OtlpJsonExporter:
+    """
+    Exports traces as OTLP/JSON ExportTraceServiceRequest records
+
+    Records are POSTed to an OTLP/HTTP collector endpoint and/or appended, one per line,
+    to a file readable by the collector's otlpjsonfile receiver.
+    """
+
+    def __init__(self, endpoint: Optional[str] = None, path: Optional[str] = None, service_name: str = SERVICE_NAME):
+        self.endpoint = endpoint
+        self.path = path
+        self.service_name = service_name
+        self._warned = False
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def to_request(self, spans: List[Span]) -> Dict[str, Any]:
+        """Convert spans to an ExportTraceServiceRequest body"""
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": SERVICE_NAME},
+                    "spans": [
+                        {
+                            "traceId": span.trace_id,
+                            "spanId": span.span_id,
+                            **({"parentSpanId": span.parent_id} if span.parent_id else {}),
+                            "name": span.name,
+                            "kind": span.kind,
+                            "startTimeUnixNano": str(span.start_ns),
+                            "endTimeUnixNano": str(span.end_ns),
+                            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+                            "status": {"code": span.status, **({"message": span.status_message} if span.status_message else {})}
+                        }
+                        for span in spans
+                    ]
+                }]
+            }]
+        }
+
+    def export(self, spans: List[Span]):
+        body = self.to_request(spans)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(body) + "\n")
+        if self.endpoint:
+            try:
+                response = requests.post(self.endpoint, json=body, timeout=2)
+                response.raise_for_status()
+            except requests.exceptions.RequestException as e:
+                if not self._warned:
+                    print(f"⚠️ Trace export to {self.endpoint} failed: {str(e)}")
+                    self._warned = True
+
+class InMemoryExporter:
+    """Keeps the most recent finished spans in memory, e.g. for benchmarks"""
+
+    def __init__(self, max_spans: int = 100000):
+        self.max_spans = max_spans
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        with self._lock:
+            self.spans.extend(spans)
+            del self.spans[:-self.max_spans]
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+class Tracer:
+    """Creates spans and exports each trace once its root span has ended"""
+
+    def __init__(self, exporters: Optional[List[Any]] = None):
+        self.exporters = list(exporters or [])
+        self._lock = threading.Lock()
+        self._open_traces: Dict[str, List[Span]] = {}
+        self._queue: queue.Queue = queue.Queue()
+        self._worker = None
+        self._exported = 0
+        self._export_errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def add_exporter(self, exporter: Any):
+        """Start sending traces to another exporter; the first one enables tracing"""
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter: Any):
+        self.exporters.remove(exporter)
+
+    def start_span(self, name: str, kind: int = SPAN_KIND_INTERNAL, parent: Optional[Span] = None, **attributes: Any):
+        """
+        Start a span without making it current; call end() on it
+
+        Args:
+            name (str): Stage name, e.g. "llm.call"
+            kind (int): SPAN_KIND_INTERNAL or SPAN_KIND_CLIENT
+            parent (Span, optional): Parent span, defaults to the current span
+
+        Returns:
+            Span, or a no-op span while tracing is disabled
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = parent or _current_span.get()
+        return Span(self, name, parent if isinstance(parent, Span) else None, kind, attributes)
+
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Iterator[Any]:
+        """Run the block inside a span that is current for nested spans"""
+        current = self.start_span(name, kind, **attributes)
+        if current is NOOP_SPAN:
+            yield current
+            return
+        token = _current_span.set(current)
+        try:
+            yield current
+        except BaseException as e:
+            current.record_error(f"{type(e).__name__}: {str(e)}")
+            raise
+        finally:
+            _current_span.reset(token)
+            current.end()
+
+    def _finish(self, span: Span):
+        with self._lock:
+            trace = self._open_traces.setdefault(span.trace_id, [])
+            trace.append(span)
+            if span.parent_id is not None:
+                return
+            del self._open_traces[span.trace_id]
+        self._ensure_worker()
+        self._queue.put(trace)
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="trace-export", daemon=True)
+                    self._worker.start()
+                    atexit.register(self.flush, 5)
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                for exporter in list(self.exporters):
+                    try:
+                        exporter.export(trace)
+                    except Exception as e:
+                        self._export_errors += 1
+                        print(f"⚠️ Trace export failed: {str(e)}")
+                self._exported += len(trace)
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every finished trace was exported; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return exporter names and export counters"""
+        return {
+            "enabled": self.enabled,
+            "exporters": [type(exporter).__name__ for exporter in self.exporters],
+            "exported_spans": self._exported,
+            "export_errors": self._export_errors,
+            "pending_traces": self._queue.qsize(),
+            "open_traces": len(self._open_traces)
+        }
+
+def _exporters_from_env() -> List[Any]:
+    if os.getenv("TRACING_ENABLED", "false").lower() not in ("1", "true", "yes"):
+        return []
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    exporters = []
+    for name in os.getenv("TRACING_EXPORTERS", "jsonl").lower().split(","):
+        name = name.strip()
+        if name == "jsonl":
+            exporters.append(JsonLinesExporter(
+                os.getenv("TRACING_JSONL_PATH") or os.path.join(project_root, "Data_And_Config", "traces.jsonl")
+            ))
+        elif name == "otlp":
+            exporters.append(OtlpJsonExporter(
+                endpoint=os.getenv("TRACING_OTLP_ENDPOINT") or None,
+                path=os.getenv("TRACING_OTLP_PATH") or None,
+                service_name=os.getenv("TRACING_SERVICE_NAME", SERVICE_NAME)
+            ))
+        elif name:
+            raise ValueError(f"Unknown tracing exporter {name!r}, use jsonl or otlp")
+    return exporters
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer, configured from the environment on first use"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(_exporters_from_env())
+    return _tracer
+
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any):
+    """Shortcut for get_tracer().span(...)"""
+    return get_tracer().span(name, kind, **attributes)
+
+def current_span() -> Any:
+    """Return the current span, or a no-op span outside any trace"""
+    return _current_span.get() or NOOP_SPAN
+
+def _payload_size(value: Any) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(json.dumps(value, default=str))
+
+def traced(name: str, error_prefix: Optional[str] = None) -> Callable:
+    """
+    Decorate a sync or async function to run inside a span with its payload sizes
+
+    Args:
+        name (str): Span name
+        error_prefix (str, optional): A string result starting with this marks the span as
+            failed, for tools that report errors as text
+    """
+    def decorate(func: Callable) -> Callable:
+        def finish(current, result):
+            current.set_attribute("output_bytes", _payload_size(result))
+            if error_prefix and isinstance(result, str) and result.startswith(error_prefix):
+                current.record_error(result.splitlines()[0])
+            return result
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                tracer = get_tracer()
+                if not tracer.enabled:
+                    return await func(*args, **kwargs)
+                with tracer.span(name, input_bytes=_payload_size(kwargs)) as current:
+                    return finish(current, await func(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = get_tracer()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name, input_bytes=_payload_size(kwargs)) as current:
+                return finish(current, func(*args, **kwargs))
+        return wrapper
+    return decorate
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records one span per LLM call of an agent run, with message counts, sizes and tokens"""
+
+    def __init__(self):
+        self._spans: Dict[UUID, Any] = {}
+        self._iterations = 0
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any) -> None:
+        self._iterations += 1
+        prompt = messages[0] if messages else []
+        self._spans[run_id] = get_tracer().start_span(
+            "llm.call",
+            kind=SPAN_KIND_CLIENT,
+            iteration=self._iterations,
+            messages=len(prompt),
+            prompt_bytes=sum(_payload_size(getattr(message, "content", "")) for message in prompt),
+            prompt_tokens=count_message_tokens(prompt)
+        )
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        current = self._spans.pop(run_id, None)
+        if current is None:
+            return
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None) or {}
+                current.set_attributes({
+                    "response_bytes": _payload_size(getattr(generation, "text", "") or ""),
+                    "tool_calls": len(getattr(message, "tool_calls", None) or []),
+                    "reported_prompt_tokens": usage.get("input_tokens"),
+                    "completion_tokens": usage.get("output_tokens")
+                })
+        current.end()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        current = self._spans.pop(run_id, None)
+        if current is not None:
+            current.record_error(f"{type(error).__name__}: {str(error)}")
+            current.end()
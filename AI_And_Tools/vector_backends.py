@@ -0,0 +1,240 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import os
+import threading
+import uuid
+import numpy as np
+
+VECTOR_BACKENDS = ("chroma", "numpy")
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact cosine-similarity vector store backed by a contiguous NumPy matrix
+
+    Embeddings are L2-normalized on insert so top-k is a single matrix-vector product.
+    The matrix is saved as embeddings.npy (opened memory-mapped) next to documents.json.
+    """
+
+    MATRIX_FILE = "embeddings.npy"
+    DOCUMENTS_FILE = "documents.json"
+
+    def __init__(self, embedding_function: Embeddings, persist_directory: Optional[str] = None):
+        self.embedding_function = embedding_function
+        self.persist_directory = persist_directory
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[dict] = []
+
+        if persist_directory and self.exists(persist_directory):
+            self._load()
+
+    @classmethod
+    def exists(cls, persist_directory: str) -> bool:
+        """Return True when a saved store is present in the directory"""
+        return os.path.exists(os.path.join(persist_directory, cls.MATRIX_FILE))
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    def _load(self):
+        # Memory-mapped so opening the store costs no copy until rows are touched
+        self._matrix = np.load(os.path.join(self.persist_directory, self.MATRIX_FILE), mmap_mode="r")
+        with open(os.path.join(self.persist_directory, self.DOCUMENTS_FILE), encoding="utf-8") as f:
+            saved = json.load(f)
+        self._ids = saved["ids"]
+        self._texts = saved["texts"]
+        self._metadatas = saved["metadatas"]
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        """Embed and append texts; an id that already exists is replaced"""
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = self._normalize(np.asarray(self.embedding_function.embed_documents(texts), dtype=np.float32))
+
+        with self._lock:
+            self._delete_ids(set(ids))
+            if self._matrix is None or len(self._ids) == 0:
+                self._matrix = vectors
+            else:
+                self._matrix = np.concatenate([self._matrix, vectors])
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """Remove documents by id"""
+        if not ids:
+            return False
+        with self._lock:
+            return self._delete_ids(set(ids))
+
+    def _delete_ids(self, ids: set) -> bool:
+        keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in ids]
+        if len(keep) == len(self._ids):
+            return False
+        self._matrix = np.ascontiguousarray(self._matrix[keep])
+        self._ids = [self._ids[i] for i in keep]
+        self._texts = [self._texts[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+        return True
+
+    def get(self, ids: Optional[List[str]] = None) -> Dict[str, List[Any]]:
+        """Return stored ids, documents and metadatas, in the shape of Chroma's get()"""
+        with self._lock:
+            wanted = None if ids is None else set(ids)
+            rows = [i for i, doc_id in enumerate(self._ids) if wanted is None or doc_id in wanted]
+            return {
+                "ids": [self._ids[i] for i in rows],
+                "documents": [self._texts[i] for i in rows],
+                "metadatas": [dict(self._metadatas[i]) for i in rows]
+            }
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        """
+        Return the k most similar documents with their cosine similarity
+
+        Args:
+            embedding (list): Query embedding
+            k (int): Number of results
+
+        Returns:
+            (document, similarity) pairs, most similar first
+        """
+        with self._lock:
+            if self._matrix is None or len(self._ids) == 0:
+                return []
+            query = self._normalize(np.asarray(embedding, dtype=np.float32))
+            scores = self._matrix @ query
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (
+                    Document(page_content=self._texts[i], metadata=dict(self._metadatas[i]), id=self._ids[i]),
+                    float(scores[i])
+                )
+                for i in top
+            ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def persist(self):
+        """Atomically write the matrix and documents to the persist directory"""
+        if not self.persist_directory:
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        with self._lock:
+            matrix = self._matrix if self._matrix is not None else np.zeros((0, 0), dtype=np.float32)
+            matrix_path = os.path.join(self.persist_directory, self.MATRIX_FILE)
+            documents_path = os.path.join(self.persist_directory, self.DOCUMENTS_FILE)
+            # np.save appends .npy unless the name already ends with it
+            with open(matrix_path + ".tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+            with open(documents_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"ids": self._ids, "texts": self._texts, "metadatas": self._metadatas}, f)
+            os.replace(documents_path + ".tmp", documents_path)
+            os.replace(matrix_path + ".tmp", matrix_path)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        *,
+        ids: Optional[List[str]] = None,
+        persist_directory: Optional[str] = None,
+        **kwargs: Any
+    ) -> "NumpyVectorStore":
+        store = cls(embedding_function=embedding, persist_directory=persist_directory)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+def default_persist_directory(backend: str) -> str:
+    """Return Data_And_Config/<store> for the backend, relative to the project root"""
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    name = "chroma_db" if backend == "chroma" else "numpy_store"
+    return os.path.join(project_root, "Data_And_Config", name)
+
+def open_vector_store(backend: str, persist_directory: str, embeddings: Embeddings) -> VectorStore:
+    """
+    Open the persisted vector store, creating an empty one on first use
+
+    Args:
+        backend (str): "chroma" or "numpy"
+        persist_directory (str): Directory holding the store
+        embeddings: Embedding function shared with the knowledge base
+
+    Returns:
+        LangChain-compatible vector store
+    """
+    if backend == "numpy":
+        return NumpyVectorStore(embedding_function=embeddings, persist_directory=persist_directory)
+
+    if backend != "chroma":
+        raise ValueError(f"vector backend must be one of {', '.join(VECTOR_BACKENDS)}, got {backend!r}")
+
+    # Imported here so the numpy backend never pays for the Chroma client
+    from langchain_community.vectorstores import Chroma
+
+    return Chroma(
+        persist_directory=persist_directory,
+        embedding_function=embeddings
+    )
+
+def similarity_search_with_similarity(vectorstore: VectorStore, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+    """
+    Return the k nearest documents with their cosine similarity, whatever the backend
+
+    Chroma reports distances in its collection's space; the MiniLM embeddings (PyTorch
+    and ONNX) are unit length, so every space converts back to cosine similarity.
+
+    Args:
+        vectorstore: Store returned by open_vector_store
+        embedding (list): Query embedding
+        k (int): Number of results
+
+    Returns:
+        (document, similarity) pairs, most similar first
+    """
+    if isinstance(vectorstore, NumpyVectorStore):
+        return vectorstore.similarity_search_by_vector_with_score(embedding, k)
+
+    results = vectorstore.similarity_search_by_vector_with_relevance_scores(embedding, k=k)
+    space = (getattr(vectorstore._collection, "metadata", None) or {}).get("hnsw:space", "l2")
+    if space in ("cosine", "ip"):
+        return [(doc, 1 - distance) for doc, distance in results]
+    # Squared L2 distance between unit vectors is 2 - 2 * cosine
+    return [(doc, 1 - distance / 2) for doc, distance in results]
@@ -0,0 +1,469 @@
+"""
+End-to-end benchmark of ShippingAssistant against local stand-ins for RajaOngkir and Mistral
+
+Every scenario replays scripted conversations through the real assistant, agent executor,
+tools, RajaOngkirAPI client and caches. Only the network services are replaced: a local
+fake RajaOngkir server (configurable latency, jitter and error injection) and a
+deterministic scripted chat model (see fakes.py). Per turn the benchmark records the
+latency and the route that answered it (fast path, answer cache or agent), and from the
+tracing spans a per-stage breakdown (retrieval, LLM calls, tools, HTTP).
+
+Scenarios:
+    single_quote          Fully specified quote, answered by the fast path
+    clarification_dialog  Four-turn dialog in which the agent asks for weight and item value
+    bulk_matrix           One origin, three destinations and two weights via calculate_shipping_matrix
+    faq                   Generic questions, answered by the agent once and then by the answer cache
+
+Usage:
+    python Benchmarks/e2e_benchmark.py --iterations 30
+    python Benchmarks/e2e_benchmark.py --save-baseline
+    python Benchmarks/e2e_benchmark.py --api-latency-ms 80 --api-error-rate 0.05 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARKS)
+sys.path.append(os.path.join(PROJECT_ROOT, "AI_And_Tools"))
+sys.path.append(os.path.join(PROJECT_ROOT, "Core_Application"))
+
+from fakes import CITIES, FakeRajaOngkirServer, HashingEmbeddings, ScriptedChatModel
+
+DEFAULT_BASELINE = os.path.join(BENCHMARKS, "baseline.json")
+
+# Metrics compared with the baseline and whether a higher value is worse
+COMPARED_METRICS = {
+    "latency_p50_ms": True,
+    "latency_p95_ms": True,
+    "latency_p99_ms": True,
+    "throughput_turns_per_s": False,
+    "rss_mb": True,
+}
+
+# Latency changes smaller than this are timer noise, however large in relative terms (e.g. cache hits)
+MIN_LATENCY_CHANGE_MS = 1.0
+
+ERROR_REPLY_PREFIX = "I apologize, but I encountered an error"
+
+# A turn is the user's text and the scripted model replies for it, one per agent step
+Turn = Tuple[str, List[Any]]
+
+def route(i: int) -> Tuple[Tuple[int, str, str], Tuple[int, str, str]]:
+    """Return a distinct origin and destination for iteration i, cycling through the catalog"""
+    origin = CITIES[i % len(CITIES)]
+    destination = CITIES[(i * 7 + 3) % len(CITIES)]
+    if destination == origin:
+        destination = CITIES[(i + 1) % len(CITIES)]
+    return origin, destination
+
+def single_quote(i: int) -> List[Turn]:
+    origin, destination = route(i)
+    return [(f"Kirim {1 + i % 5}kg dari {origin[1]} ke {destination[1]}, nilai barang {100 + 50 * (i % 4)}rb", [])]
+
+def clarification_dialog(i: int) -> List[Turn]:
+    origin, destination = route(i)
+    weight, value = 1 + i % 4, 150 + 25 * (i % 6)
+    return [
+        (f"I want to send a package from {origin[1]} to {destination[1]}", [
+            [("search_destination", {"keyword": origin[1]}), ("search_destination", {"keyword": destination[1]})],
+            f"I found {origin[1]} (ID {origin[0]}) and {destination[1]} (ID {destination[0]}). How heavy is the package?"
+        ]),
+        (f"It weighs {weight}kg", ["Thanks. What is the value of the item in Rupiah?"]),
+        (f"The item is worth {value}rb", [
+            [("calculate_shipping_cost", {
+                "shipper_destination_id": origin[0], "receiver_destination_id": destination[0],
+                "weight": weight * 1000, "item_value": value * 1000
+            })],
+            "Here are the shipping options. SiCepat REG is the cheapest, JNE YES arrives the next day."
+        ]),
+        ("Can I use COD for this shipment?", [
+            "Yes, COD is available with JNE REG, SiCepat REG and J&T EZ for this route; a 3% fee applies."
+        ]),
+    ]
+
+def bulk_matrix(i: int) -> List[Turn]:
+    origin = CITIES[i % len(CITIES)]
+    destinations = [CITIES[(i + offset) % len(CITIES)] for offset in (3, 8, 13)]
+    names = [city[1] for city in destinations]
+    return [(f"Compare shipping from {origin[1]} to {names[0]}, {names[1]} and {names[2]} for 1kg and 5kg packages", [
+        [("search_destination", {"keyword": city[1]}) for city in [origin] + destinations],
+        [("calculate_shipping_matrix", {
+            "origin_ids": [origin[0]], "destination_ids": [city[0] for city in destinations],
+            "weights": [1000, 5000], "item_value": 100000
+        })],
+        "Here is the comparison; I assumed an item value of Rp 100,000. Cargo services only apply to the 5kg package."
+    ])]
+
+FAQ_QUESTIONS = [
+    ("Which courier is best for heavy items?", "For heavy items, cargo services such as JNE JTR or Lion REGPACK are the cheapest."),
+    ("How long does delivery take within Java?", "Regular services within Java usually take 2-3 days, JNE YES arrives the next day."),
+    ("What should I declare as the value of electronics?", "Declare the purchase price so insurance covers the full value."),
+    ("Do couriers accept cash on delivery?", "JNE REG, SiCepat REG and J&T EZ support COD for an extra fee."),
+    ("How do I measure the weight of my package?", "Weigh the packed parcel; couriers bill per started kilogram."),
+]
+
+def faq(i: int) -> List[Turn]:
+    question, answer = FAQ_QUESTIONS[i % len(FAQ_QUESTIONS)]
+    return [(question, [answer])]
+
+SCENARIOS: Dict[str, Callable[[int], List[Turn]]] = {
+    "single_quote": single_quote,
+    "clarification_dialog": clarification_dialog,
+    "bulk_matrix": bulk_matrix,
+    "faq": faq,
+}
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def rss_mb() -> float:
+    """Return the current resident set size, or the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def configure_environment(workdir: str, use_caches: bool = True):
+    """
+    Point the application at the fake server's defaults and keep every persistent cache in workdir
+
+    Values already set in the environment win, except for caches disabled with use_caches=False.
+    Must run before the application modules are first used.
+    """
+    defaults = {
+        "MISTRAL_API_KEY": "benchmark",
+        "RAJAONGKIR_API_KEY": "benchmark",
+        # The client-side limiter protects the real API; against the fake it would only measure itself
+        "RAJAONGKIR_RATE_LIMIT": "1000",
+        "RAJAONGKIR_RATE_BURST": "1000",
+        "TARIFF_CACHE_PATH": os.path.join(workdir, "tariff_cache.db"),
+        "DESTINATION_INDEX_PATH": os.path.join(workdir, "destination_index.db"),
+        "KNOWLEDGE_SOURCES_DIR": os.path.join(workdir, "knowledge"),
+        "KNOWLEDGE_QUERY_CACHE_PATH": "",
+        "TRACING_ENABLED": "false",
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+    if not use_caches:
+        os.environ.update({
+            "TARIFF_CACHE_ENABLED": "false",
+            "DESTINATION_INDEX_ENABLED": "false",
+            "DESTINATION_CACHE_TTL": "0",
+            "DESTINATION_CACHE_NEGATIVE_TTL": "0",
+            "ANSWER_CACHE_ENABLED": "false",
+        })
+
+def create_registry(model: ScriptedChatModel, workdir: str, embeddings: str = "fake", vector_backend: str = "numpy"):
+    """
+    Build a resource registry whose LLM is the scripted model
+
+    Args:
+        model (ScriptedChatModel): Stand-in for ChatMistralAI
+        workdir (str): Directory for the benchmark's vector store
+        embeddings (str): "fake" for HashingEmbeddings, "model" for KNOWLEDGE_EMBEDDING_BACKEND
+        vector_backend (str): Vector store backend for the knowledge base
+
+    Returns:
+        ResourceRegistry with the knowledge base loaded
+    """
+    from knowledge_base import ShippingKnowledgeBase
+    from resources import ResourceRegistry
+
+    registry = ResourceRegistry()
+    registry.get("llm", lambda: model)
+    registry.get("knowledge_base", lambda: ShippingKnowledgeBase(
+        os.path.join(workdir, f"{vector_backend}_store"),
+        preload="eager",
+        vector_backend=vector_backend,
+        embeddings=HashingEmbeddings() if embeddings == "fake" else None
+    ))
+    return registry
+
+def run_turn(assistant, text: str, mode: str) -> Tuple[float, str]:
+    """Send one user turn and return its latency in seconds and the reply"""
+    started = time.perf_counter()
+    if mode == "async":
+        output = asyncio.run(assistant.achat(text))
+    else:
+        output = assistant.chat(text)
+    return time.perf_counter() - started, output
+
+def run_dialog(registry, turns: List[Turn], mode: str) -> List[Dict[str, Any]]:
+    """Replay one conversation with a new assistant and return a record per turn"""
+    from shipping_assistant import ShippingAssistant
+
+    assistant = ShippingAssistant(registry)
+    records = []
+    for text, _ in turns:
+        seconds, output = run_turn(assistant, text, mode)
+        usage = assistant.last_turn_usage
+        records.append({
+            "seconds": seconds,
+            "route": usage.get("route", "error"),
+            "llm_calls": usage.get("llm_calls", 0),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "failed": output.startswith(ERROR_REPLY_PREFIX),
+        })
+    return records
+
+def stage_breakdown(spans: List[Dict[str, Any]], turns: int) -> Dict[str, Dict[str, float]]:
+    """Aggregate span durations by stage name; concurrent tool and HTTP spans overlap"""
+    durations = defaultdict(list)
+    errors = Counter()
+    for span in spans:
+        durations[span["name"]].append(span["duration_ms"])
+        errors[span["name"]] += span["status"] == "error"
+    return {
+        name: {
+            "count": len(values),
+            "per_turn": len(values) / turns,
+            "mean_ms": statistics.mean(values),
+            "p95_ms": percentile(values, 95),
+            "ms_per_turn": sum(values) / turns,
+            "errors": errors[name],
+        }
+        for name, values in sorted(durations.items())
+    }
+
+def run_scenario(name: str, registry, model: ScriptedChatModel, server: FakeRajaOngkirServer, exporter, args) -> Dict[str, Any]:
+    """Run warmup and measured iterations of a scenario and summarize them"""
+    from tracing import get_tracer
+
+    build = SCENARIOS[name]
+    dialogs = []
+    for i in range(args.warmup + args.iterations):
+        turns = build(i)
+        for text, steps in turns:
+            model.add_script(text, steps)
+        dialogs.append(turns)
+
+    for turns in dialogs[:args.warmup]:
+        run_dialog(registry, turns, args.mode)
+    get_tracer().flush(10)
+    exporter.clear()
+    api_before = server.get_stats()
+    rss_before = rss_mb()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda turns: run_dialog(registry, turns, args.mode), dialogs[args.warmup:]))
+    elapsed = time.perf_counter() - started
+
+    get_tracer().flush(10)
+    spans = [span.to_dict() for span in exporter.spans]
+    exporter.clear()
+    api_after = server.get_stats()
+
+    records = [record for dialog in results for record in dialog]
+    latencies = [record["seconds"] * 1000 for record in records]
+    return {
+        "dialogs": len(results),
+        "turns": len(records),
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        "latency_p99_ms": percentile(latencies, 99),
+        "latency_mean_ms": statistics.mean(latencies),
+        "latency_max_ms": max(latencies),
+        "dialog_mean_ms": statistics.mean(sum(record["seconds"] for record in dialog) * 1000 for dialog in results),
+        "throughput_turns_per_s": len(records) / elapsed,
+        "throughput_dialogs_per_s": len(results) / elapsed,
+        "rss_mb": rss_mb(),
+        "rss_delta_mb": rss_mb() - rss_before,
+        "routes": dict(Counter(record["route"] for record in records)),
+        "llm_calls_per_turn": sum(record["llm_calls"] for record in records) / len(records),
+        "prompt_tokens_per_turn": sum(record["prompt_tokens"] for record in records) / len(records),
+        "failed_turns": sum(record["failed"] for record in records),
+        "api_requests": {key: api_after[key] - api_before[key] for key in api_after},
+        "stages": stage_breakdown(spans, len(records)),
+    }
+
+def config_differences(baseline: Dict[str, Any], report: Dict[str, Any]) -> List[str]:
+    """Describe every benchmark option whose value differs between the baseline and this run"""
+    recorded, current = baseline.get("config", {}), report["config"]
+    return [
+        f"{key} {recorded.get(key)!r} vs {current.get(key)!r}"
+        for key in sorted(set(recorded) | set(current))
+        if recorded.get(key) != current.get(key)
+    ]
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Print the change of every compared metric against a baseline recorded with the same options
+
+    Returns:
+        Descriptions of the metrics that got worse by more than tolerance
+    """
+    regressions = []
+    print(f"\n{'scenario':<22}{'metric':<24}{'baseline':>12}{'current':>12}{'change':>10}")
+    for scenario, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(scenario)
+        if previous is None:
+            print(f"{scenario:<22}(not in baseline)")
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS.items():
+            before, after = previous.get(metric), current[metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            worse = change > tolerance if higher_is_worse else change < -tolerance
+            if metric.endswith("_ms") and abs(after - before) < MIN_LATENCY_CHANGE_MS:
+                worse = False
+            marker = " ❌" if worse else ""
+            print(f"{scenario:<22}{metric:<24}{before:>12.2f}{after:>12.2f}{change:>+10.1%}{marker}")
+            if worse:
+                regressions.append(f"{scenario} {metric} {change:+.1%}")
+    return regressions
+
+def print_report(report: Dict[str, Any]):
+    for name, result in report["scenarios"].items():
+        routes = ", ".join(f"{route} {count}" for route, count in sorted(result["routes"].items()))
+        print(f"\n📊 {name}: {result['dialogs']} dialog(s), {result['turns']} turn(s) ({routes})")
+        print(
+            f"   latency p50 {result['latency_p50_ms']:.1f} ms | p95 {result['latency_p95_ms']:.1f} ms | "
+            f"p99 {result['latency_p99_ms']:.1f} ms | max {result['latency_max_ms']:.1f} ms"
+        )
+        print(
+            f"   throughput {result['throughput_turns_per_s']:.1f} turns/s | RSS {result['rss_mb']:.0f} MB "
+            f"({result['rss_delta_mb']:+.1f}) | {result['llm_calls_per_turn']:.2f} LLM calls and "
+            f"{result['prompt_tokens_per_turn']:.0f} prompt tokens per turn | {result['failed_turns']} failed"
+        )
+        if result["stages"]:
+            print(f"   {'stage':<32}{'per turn':>9}{'mean ms':>10}{'p95 ms':>10}{'ms/turn':>10}{'errors':>8}")
+            for stage, stats in result["stages"].items():
+                print(
+                    f"   {stage:<32}{stats['per_turn']:>9.2f}{stats['mean_ms']:>10.2f}"
+                    f"{stats['p95_ms']:>10.2f}{stats['ms_per_turn']:>10.2f}{stats['errors']:>8}"
+                )
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end ShippingAssistant benchmark against local stand-ins")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenarios to run")
+    parser.add_argument("--iterations", type=int, default=20, help="Measured dialogs per scenario")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured dialogs per scenario run first")
+    parser.add_argument("--concurrency", type=int, default=1, help="Dialogs replayed at the same time")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync", help="chat() or achat()")
+    parser.add_argument("--api-latency-ms", type=float, default=20.0, help="Fake RajaOngkir response delay")
+    parser.add_argument("--api-jitter-ms", type=float, default=0.0, help="Extra random RajaOngkir delay")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="Share of RajaOngkir requests that fail")
+    parser.add_argument("--api-error-status", type=int, default=503, help="HTTP status of injected errors")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Scripted model delay per call")
+    parser.add_argument("--embeddings", choices=("fake", "model"), default="fake",
+                        help="Hashing stand-in, or the model selected by KNOWLEDGE_EMBEDDING_BACKEND")
+    parser.add_argument("--vector-backend", choices=("numpy", "chroma"), default="numpy")
+    parser.add_argument("--no-cache", action="store_true", help="Disable tariff, destination and answer caches")
+    parser.add_argument("--no-stages", action="store_true", help="Skip tracing, and with it the per-stage breakdown")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for latency jitter and error injection")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results to --baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative change reported as a regression")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the assistant's console output and logs")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as workdir, FakeRajaOngkirServer(
+        latency_ms=args.api_latency_ms, jitter_ms=args.api_jitter_ms, error_rate=args.api_error_rate,
+        error_status=args.api_error_status, seed=args.seed
+    ) as server:
+        configure_environment(workdir, use_caches=not args.no_cache)
+        os.environ["RAJAONGKIR_BASE_URL"] = server.url
+        from tracing import InMemoryExporter, get_tracer
+
+        exporter = InMemoryExporter()
+        if not args.no_stages:
+            get_tracer().add_exporter(exporter)
+
+        model = ScriptedChatModel(latency_ms=args.llm_latency_ms)
+        if args.verbose:
+            logging.basicConfig(level=logging.INFO, format="%(message)s")
+        output = None if args.verbose else open(os.devnull, "w")
+        with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+            started = time.perf_counter()
+            registry = create_registry(model, workdir, args.embeddings, args.vector_backend)
+            startup_seconds = time.perf_counter() - started
+
+        report = {
+            "config": {
+                "iterations": args.iterations,
+                "warmup": args.warmup,
+                "concurrency": args.concurrency,
+                "mode": args.mode,
+                "api_latency_ms": args.api_latency_ms,
+                "api_jitter_ms": args.api_jitter_ms,
+                "api_error_rate": args.api_error_rate,
+                "api_error_status": args.api_error_status,
+                "llm_latency_ms": args.llm_latency_ms,
+                "embeddings": args.embeddings,
+                "vector_backend": args.vector_backend,
+                "caches": not args.no_cache,
+                "stages": not args.no_stages,
+                "seed": args.seed,
+            },
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "startup_seconds": startup_seconds,
+            "scenarios": {},
+        }
+        for name in names:
+            print(f"🔄 Running {name}...")
+            with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+                report["scenarios"][name] = run_scenario(name, registry, model, server, exporter, args)
+        if output:
+            output.close()
+
+    print(f"\n⏱️ Resources ready in {report['startup_seconds']:.2f}s")
+    print_report(report)
+
+    exit_code = 0
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Baseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        # Numbers from other options (latencies, iterations, caches...) are not comparable at all
+        differences = config_differences(baseline, report)
+        if differences:
+            print(
+                f"\n❌ Not compared: {args.baseline} was recorded with other options ({'; '.join(differences)}). "
+                f"Rerun with the baseline's options or record a new baseline with --save-baseline"
+            )
+            exit_code = 2
+        else:
+            regressions = compare_with_baseline(report, baseline, args.tolerance)
+            if regressions:
+                print(f"\n❌ {len(regressions)} regression(s) beyond {args.tolerance:.0%}: {'; '.join(regressions)}")
+                exit_code = 1
+            else:
+                print(f"\n✅ No regressions beyond {args.tolerance:.0%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+    sys.exit(exit_code)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Compare the PyTorch and quantized ONNX embedding backends of the knowledge base
+
+Each backend runs in its own interpreter so import time and peak RSS are measured
+in isolation. The parent then checks retrieval quality: for every query, the top-k
+chunks found with ONNX vectors must match the ones found with PyTorch vectors.
+
+Usage:
+    python AI_And_Tools/onnx_embeddings.py export
+    python Benchmarks/embedding_benchmark.py --repeats 50 --min-overlap 0.9
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+AI_AND_TOOLS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AI_And_Tools")
+sys.path.append(AI_AND_TOOLS)
+
+import numpy as np
+
+BACKENDS = ("huggingface", "onnx")
+
+QUERIES = [
+    "Which courier is best for heavy items?",
+    "Can I use COD?",
+    "How much does a book weigh?",
+    "ongkir dari jakarta ke surabaya",
+    "How long does delivery take?",
+    "What value should I declare for electronics?",
+    "Is Jogja the same as Yogyakarta?",
+    "cheapest shipping to Medan",
+    "small package estimate",
+    "JNE city to city service",
+]
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def run_worker(backend: str, repeats: int):
+    """Load one backend, time it and print corpus and query vectors as JSON"""
+    baseline_rss = peak_rss_mb()
+    started = time.perf_counter()
+    from knowledge_base import ShippingKnowledgeBase
+
+    with tempfile.TemporaryDirectory() as workdir:
+        kb = ShippingKnowledgeBase(workdir, preload="eager", vector_backend="numpy", embedding_backend=backend)
+        startup_seconds = time.perf_counter() - started
+        texts = [doc.page_content for doc in kb._create_initial_documents()]
+
+    started = time.perf_counter()
+    corpus_vectors = kb.embeddings.embed_documents(texts)
+    corpus_seconds = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            started = time.perf_counter()
+            kb.embeddings.embed_query(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    print(json.dumps({
+        "metrics": {
+            "imports_seconds": kb.timings["imports"],
+            "model_load_seconds": kb.timings["model_load"],
+            "startup_seconds": startup_seconds,
+            "corpus_embed_seconds": corpus_seconds,
+            "query_ms_p50": statistics.median(latencies),
+            "query_ms_p95": percentile(latencies, 95),
+            "peak_rss_mb": peak_rss_mb(),
+            "rss_growth_mb": peak_rss_mb() - baseline_rss,
+        },
+        "texts": texts,
+        "corpus": corpus_vectors,
+        "queries": [kb.embeddings.embed_query(query) for query in QUERIES],
+    }))
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int):
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return [list(np.argsort(-scores)[:k]) for scores in queries @ corpus.T]
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare PyTorch and ONNX embedding backends")
+    parser.add_argument("--repeats", type=int, default=20, help="Times each query is embedded")
+    parser.add_argument("-k", type=int, default=3, help="Results per query for the quality check")
+    parser.add_argument("--min-overlap", type=float, default=0.9, help="Fail when top-k overlap is lower")
+    parser.add_argument("--json", help="Also write the results to this file")
+    parser.add_argument("--worker", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.repeats)
+        return
+
+    runs = {}
+    for backend in BACKENDS:
+        print(f"🔄 Benchmarking {backend}...")
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", backend, "--repeats", str(args.repeats)],
+            capture_output=True, text=True, check=True
+        )
+        runs[backend] = json.loads(output.stdout.strip().splitlines()[-1])
+
+    reference, candidate = runs["huggingface"], runs["onnx"]
+    reference_top = top_k(np.array(reference["corpus"]), np.array(reference["queries"]), args.k)
+    candidate_top = top_k(np.array(candidate["corpus"]), np.array(candidate["queries"]), args.k)
+    overlap = statistics.mean(
+        len(set(expected) & set(found)) / args.k for expected, found in zip(reference_top, candidate_top)
+    )
+    query_cosine = statistics.mean(
+        float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+        for a, b in zip(reference["queries"], candidate["queries"])
+    )
+
+    print(f"\n📊 {len(reference['texts'])} chunks, {len(QUERIES)} queries x {args.repeats}\n")
+    print(f"{'metric':<22}{'huggingface':>14}{'onnx':>14}")
+    for metric in reference["metrics"]:
+        print(f"{metric:<22}{reference['metrics'][metric]:>14.3f}{candidate['metrics'][metric]:>14.3f}")
+    print(f"\nTop-{args.k} overlap with the PyTorch backend: {overlap:.1%}")
+    print(f"Mean query-vector cosine similarity: {query_cosine:.4f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "backends": {backend: run["metrics"] for backend, run in runs.items()},
+                "topk_overlap": overlap,
+                "query_cosine": query_cosine
+            }, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+
+    if overlap < args.min_overlap:
+        print(f"❌ Retrieval quality check failed: overlap below {args.min_overlap:.0%}")
+        sys.exit(1)
+    print("✅ Retrieval quality check passed")
+
+if __name__ == "__main__":
+    main()
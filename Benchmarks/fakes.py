@@ -0,0 +1,321 @@
+"""
+Local stand-ins for the external services, used by the benchmarks
+
+- FakeRajaOngkirServer: HTTP server speaking the RajaOngkir search and calculate endpoints
+  over a fixed city catalog, with configurable latency, jitter and error injection
+- ScriptedChatModel: deterministic tool-calling chat model that replays per-question scripts
+- HashingEmbeddings: dependency-free bag-of-words embeddings for the knowledge base
+
+Everything is deterministic for a given seed, so runs can be compared with a baseline.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AI_And_Tools"))
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import Field
+from token_counter import count_message_tokens, count_tokens
+
+# (id, city, province); ids are what the scripted dialogs pass to the calculate tools
+CITIES = [
+    (31555, "Jakarta Pusat", "DKI Jakarta"),
+    (66772, "Surabaya", "Jawa Timur"),
+    (40115, "Bandung", "Jawa Barat"),
+    (20111, "Medan", "Sumatera Utara"),
+    (50131, "Semarang", "Jawa Tengah"),
+    (55211, "Yogyakarta", "DI Yogyakarta"),
+    (80111, "Denpasar", "Bali"),
+    (90111, "Makassar", "Sulawesi Selatan"),
+    (30111, "Palembang", "Sumatera Selatan"),
+    (25111, "Padang", "Sumatera Barat"),
+    (70111, "Banjarmasin", "Kalimantan Selatan"),
+    (75111, "Samarinda", "Kalimantan Timur"),
+    (95111, "Manado", "Sulawesi Utara"),
+    (65111, "Malang", "Jawa Timur"),
+    (57111, "Surakarta", "Jawa Tengah"),
+    (35111, "Bandar Lampung", "Lampung"),
+    (78111, "Pontianak", "Kalimantan Barat"),
+    (28111, "Pekanbaru", "Riau"),
+    (99111, "Jayapura", "Papua"),
+    (83111, "Mataram", "Nusa Tenggara Barat"),
+]
+
+SEARCH_PATH = "/tariff/api/v1/destination/search"
+CALCULATE_PATH = "/tariff/api/v1/calculate"
+
+# (shipping_name, service_name, rate per kg, base fee, etd, COD)
+REGULAR_SERVICES = [
+    ("JNE", "REG", 9000, 2000, "2-3 day", True),
+    ("JNE", "YES", 18000, 4000, "1 day", False),
+    ("SiCepat", "REG", 8500, 1500, "2-3 day", True),
+    ("J&T", "EZ", 8000, 2500, "2-4 day", True),
+    ("SAP", "UDRREG", 7500, 3000, "3-5 day", False),
+]
+CARGO_SERVICES = [
+    ("JNE", "JTR", 5000, 40000, "4-7 day", False),
+    ("Lion", "REGPACK", 4500, 35000, "5-8 day", False),
+]
+
+def _location(city_id: int, city: str, province: str) -> Dict[str, Any]:
+    return {
+        "id": city_id,
+        "label": f"{city.upper()}, {province.upper()}",
+        "subdistrict_name": city.upper(),
+        "district_name": city.upper(),
+        "city_name": city.upper(),
+        "province_name": province.upper(),
+        "zip_code": str(city_id)
+    }
+
+def search_catalog(keyword: str) -> List[Dict[str, Any]]:
+    """Return the catalog locations whose city name contains the keyword"""
+    keyword = keyword.strip().lower()
+    return [_location(*city) for city in CITIES if keyword and keyword in city[1].lower()]
+
+def quote(origin_id: int, destination_id: int, weight: float, item_value: float, cod: bool) -> Dict[str, Any]:
+    """Return deterministic tariffs for a route, priced per started kilogram and by distance"""
+    kilograms = max(1, math.ceil(weight / 1000))
+    distance = 1 + (abs(origin_id - destination_id) % 7000) / 7000
+
+    def option(service, minimum_kilograms=1):
+        name, code, rate, base, etd, is_cod = service
+        cost = int(round((base + rate * max(kilograms, minimum_kilograms) * distance) / 100) * 100)
+        fee = int(item_value * 0.03) if cod and is_cod else 0
+        return {
+            "shipping_name": name,
+            "service_name": code,
+            "weight": weight,
+            "is_cod": is_cod,
+            "shipping_cost": cost,
+            "shipping_cashback": 0,
+            "shipping_cost_net": cost,
+            "grandtotal": cost + fee,
+            "service_fee": fee,
+            "net_income": cost,
+            "etd": etd
+        }
+
+    return {
+        "calculate_reguler": [option(service) for service in REGULAR_SERVICES if not cod or service[5]],
+        "calculate_cargo": [option(service, 10) for service in CARGO_SERVICES] if kilograms >= 5 and not cod else [],
+        "calculate_instant": []
+    }
+
+class FakeRajaOngkirServer:
+    """
+    Local HTTP server answering the RajaOngkir destination search and calculate endpoints
+
+    Every request waits latency_ms plus up to jitter_ms, and a share error_rate of them
+    fails with error_status instead of returning data.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 20.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: int = 0
+    ):
+        """
+        Args:
+            latency_ms (float): Fixed delay added to every response
+            jitter_ms (float): Extra random delay, uniform between 0 and jitter_ms
+            error_rate (float): Share of requests answered with error_status (0 to 1)
+            error_status (int): HTTP status of injected errors; 502-504 and 429 are retried by the client
+            seed (int): Seed for jitter and error injection
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._counts = {"search": 0, "calculate": 0, "not_found": 0, "errors_injected": 0}
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as RAJAONGKIR_BASE_URL"""
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "FakeRajaOngkirServer":
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; with Nagle they would wait for a delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                status, body = fake._respond(self.path)
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-rajaongkir", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeRajaOngkirServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _respond(self, path: str) -> Tuple[int, Dict[str, Any]]:
+        url = urlparse(path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        with self._lock:
+            delay = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self._counts["errors_injected"] += 1
+        time.sleep(delay / 1000)
+
+        if failed:
+            return self.error_status, {"meta": {"message": "Injected error", "code": self.error_status, "status": "error"}, "data": None}
+        if url.path == SEARCH_PATH:
+            locations = search_catalog(params.get("keyword", ""))
+            with self._lock:
+                self._counts["search"] += 1
+                self._counts["not_found"] += not locations
+            return 200, self._success(locations)
+        if url.path == CALCULATE_PATH:
+            with self._lock:
+                self._counts["calculate"] += 1
+            try:
+                data = quote(
+                    int(params["shipper_destination_id"]),
+                    int(params["receiver_destination_id"]),
+                    float(params["weight"]),
+                    float(params["item_value"]),
+                    params.get("cod", "False").lower() == "true"
+                )
+            except (KeyError, ValueError) as e:
+                return 400, {"meta": {"message": f"Invalid parameters: {str(e)}", "code": 400, "status": "error"}, "data": None}
+            return 200, self._success(data)
+        return 404, {"meta": {"message": "Not found", "code": 404, "status": "error"}, "data": None}
+
+    @staticmethod
+    def _success(data: Any) -> Dict[str, Any]:
+        return {"meta": {"message": "Success", "code": 200, "status": "success"}, "data": data}
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+# A script step is either the final answer text or the tool calls of one agent step
+ToolCall = Tuple[str, Dict[str, Any]]
+ScriptStep = Union[str, Sequence[ToolCall]]
+
+USER_QUERY = re.compile(r"User Query: (.*)")
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Deterministic tool-calling chat model
+
+    The reply depends only on the current user question and how many agent steps
+    already ran for it, so one instance can serve any number of concurrent sessions.
+    Questions without a script get default_reply.
+    """
+
+    scripts: Dict[str, List[ScriptStep]] = Field(default_factory=dict)
+    default_reply: str = "I can help you check shipping costs. Where are you shipping from and to?"
+    latency_ms: float = 0.0
+    """Delay before every reply, standing in for model latency"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        # Tool calls come from the scripts, so the tool schemas are not needed
+        return self
+
+    def add_script(self, question: str, steps: List[ScriptStep]):
+        """Register the replies to a question, one per agent step"""
+        self.scripts[question.strip()] = steps
+
+    def _reply(self, messages: List[BaseMessage]) -> AIMessage:
+        position = max(index for index, message in enumerate(messages) if isinstance(message, HumanMessage))
+        content = str(messages[position].content)
+        match = USER_QUERY.search(content)
+        question = (match.group(1) if match else content).strip()
+        # Tool-calling steps already taken for this question are in the scratchpad after it
+        step = sum(isinstance(message, AIMessage) for message in messages[position + 1:])
+        steps = self.scripts.get(question, [])
+        reply = steps[step] if step < len(steps) else self.default_reply
+
+        usage = {"input_tokens": count_message_tokens(messages)}
+        if isinstance(reply, str):
+            usage.update(output_tokens=count_tokens(reply), total_tokens=usage["input_tokens"] + count_tokens(reply))
+            return AIMessage(content=reply, usage_metadata=usage)
+        tool_calls = [
+            {"name": name, "args": dict(args), "id": f"call_{step}_{index}", "type": "tool_call"}
+            for index, (name, args) in enumerate(reply)
+        ]
+        usage.update(output_tokens=count_tokens(json.dumps(tool_calls)))
+        usage["total_tokens"] = usage["input_tokens"] + usage["output_tokens"]
+        return AIMessage(content="", tool_calls=tool_calls, usage_metadata=usage)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+class HashingEmbeddings(Embeddings):
+    """Bag-of-words embeddings hashed into a fixed number of dimensions; no model download"""
+
+    def __init__(self, dimensions: int = 384):
+        self.dimensions = dimensions
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode()).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimensions] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
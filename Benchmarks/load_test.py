@@ -0,0 +1,385 @@
+"""
+Multi-session load test: how many concurrent conversations one process serves
+
+Simulated users each own a ShippingAssistant (one session) and replay a mix of the
+scripted dialogs from e2e_benchmark.py against the local RajaOngkir server and the
+scripted chat model, pausing for a think time between turns. Concurrency is ramped
+through the given levels; every level runs for a fixed duration and records latency
+percentiles, throughput, failed turns and RSS. The saturation point is the first level
+where throughput stops growing with the number of users, p95 latency breaks the SLO or
+too many turns fail. Memory per session is measured separately with tracemalloc.
+
+Usage:
+    python Benchmarks/load_test.py --levels 1,2,4,8,16,32 --duration 20
+    python Benchmarks/load_test.py --mode async --think-time-ms 1000 --report capacity
+    python Benchmarks/load_test.py --mix single_quote=1,clarification_dialog=3 --api-latency-ms 150
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from e2e_benchmark import (
+    ERROR_REPLY_PREFIX, SCENARIOS, configure_environment, create_registry, percentile, rss_mb
+)
+from fakes import FakeRajaOngkirServer, ScriptedChatModel
+
+DEFAULT_MIX = "single_quote=3,clarification_dialog=4,bulk_matrix=1,faq=2"
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse "scenario=weight,..." into scenario weights"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(f"unknown scenario {name!r}, use one of {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+class SimulatedUser:
+    """One user with its own assistant, replaying randomly chosen dialogs until stopped"""
+
+    def __init__(self, user_id: int, registry, model: ScriptedChatModel, mix: Dict[str, float], think_time: float, seed: int):
+        from shipping_assistant import ShippingAssistant
+
+        self.user_id = user_id
+        self.assistant = ShippingAssistant(registry)
+        self.model = model
+        self.mix = mix
+        self.think_time = think_time
+        self.random = random.Random(seed * 100003 + user_id)
+        self.records: List[Dict[str, Any]] = []
+        self.dialogs = 0
+
+    def next_dialog(self):
+        """Pick a scenario by weight, register its scripts and start a new conversation"""
+        name = self.random.choices(list(self.mix), weights=list(self.mix.values()))[0]
+        turns = SCENARIOS[name](self.user_id * 1000 + self.dialogs)
+        for text, steps in turns:
+            self.model.add_script(text, steps)
+        self.dialogs += 1
+        self.assistant.reset_conversation()
+        return name, turns
+
+    def pause(self) -> float:
+        # Think times vary between half and one and a half times the mean
+        return self.think_time * self.random.uniform(0.5, 1.5)
+
+    def record(self, scenario: str, started: float, seconds: float, output: str):
+        self.records.append({
+            "scenario": scenario,
+            "started": started,
+            "seconds": seconds,
+            "route": self.assistant.last_turn_usage.get("route", "error"),
+            "failed": output.startswith(ERROR_REPLY_PREFIX),
+        })
+
+    def run(self, deadline: float):
+        while time.perf_counter() < deadline:
+            scenario, turns = self.next_dialog()
+            for text, _ in turns:
+                if time.perf_counter() >= deadline:
+                    return
+                started = time.perf_counter()
+                output = self.assistant.chat(text)
+                self.record(scenario, started, time.perf_counter() - started, output)
+                time.sleep(self.pause())
+
+    async def arun(self, deadline: float):
+        while time.perf_counter() < deadline:
+            scenario, turns = self.next_dialog()
+            for text, _ in turns:
+                if time.perf_counter() >= deadline:
+                    return
+                started = time.perf_counter()
+                output = await self.assistant.achat(text)
+                self.record(scenario, started, time.perf_counter() - started, output)
+                await asyncio.sleep(self.pause())
+
+def run_level(users: int, registry, model: ScriptedChatModel, args, mix: Dict[str, float]) -> Dict[str, Any]:
+    """Run one concurrency level and summarize the turns started after the warmup"""
+    gc.collect()
+    rss_before = rss_mb()
+    simulated = [
+        SimulatedUser(user_id, registry, model, mix, args.think_time_ms / 1000, args.seed)
+        for user_id in range(users)
+    ]
+
+    # RSS is sampled while the level runs, since sessions grow and shrink with their dialogs
+    peak = [rss_mb()]
+    stop_sampling = threading.Event()
+
+    def sample():
+        while not stop_sampling.wait(0.2):
+            peak[0] = max(peak[0], rss_mb())
+
+    sampler = threading.Thread(target=sample, name="rss-sampler", daemon=True)
+    sampler.start()
+
+    started = time.perf_counter()
+    deadline = started + args.duration
+    measured_from = started + args.warmup_seconds
+    if args.mode == "async":
+        async def run_all():
+            await asyncio.gather(*(user.arun(deadline) for user in simulated))
+        asyncio.run(run_all())
+    else:
+        threads = [
+            threading.Thread(target=user.run, args=(deadline,), name=f"user-{user.user_id}", daemon=True)
+            for user in simulated
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - measured_from
+    stop_sampling.set()
+    sampler.join()
+    peak[0] = max(peak[0], rss_mb())
+
+    records = [record for user in simulated for record in user.records if record["started"] >= measured_from]
+    latencies = [record["seconds"] * 1000 for record in records] or [0.0]
+    by_scenario = {}
+    for scenario in mix:
+        values = [record["seconds"] * 1000 for record in records if record["scenario"] == scenario]
+        if values:
+            by_scenario[scenario] = {"turns": len(values), "p50_ms": percentile(values, 50), "p95_ms": percentile(values, 95)}
+    failed = sum(record["failed"] for record in records)
+    return {
+        "users": users,
+        "turns": len(records),
+        "dialogs": sum(user.dialogs for user in simulated),
+        "throughput_turns_per_s": len(records) / elapsed if elapsed > 0 else 0.0,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        "latency_p99_ms": percentile(latencies, 99),
+        "latency_max_ms": max(latencies),
+        "failed_turns": failed,
+        "error_rate": failed / len(records) if records else 0.0,
+        "routes": dict(Counter(record["route"] for record in records)),
+        "rss_before_mb": rss_before,
+        "rss_peak_mb": peak[0],
+        "rss_per_session_mb": (peak[0] - rss_before) / users,
+        "memory_tokens_per_session": statistics.mean(user.assistant.memory.token_count() for user in simulated),
+        "scenarios": by_scenario,
+    }
+
+def measure_session_memory(registry, model: ScriptedChatModel, sessions: int, mix: Dict[str, float]) -> Dict[str, float]:
+    """
+    Measure the Python heap held by live sessions with tracemalloc
+
+    Every session replays one dialog of each scenario in the mix; the same dialogs run
+    once beforehand so shared caches are already filled and not counted.
+    """
+    from shipping_assistant import ShippingAssistant
+
+    def replay(assistants):
+        for index, assistant in enumerate(assistants):
+            for name in mix:
+                for text, steps in SCENARIOS[name](index):
+                    model.add_script(text, steps)
+                    assistant.chat(text)
+
+    # Model latency does not change what a session holds, so skip it here
+    latency_ms, model.latency_ms = model.latency_ms, 0.0
+    replay([ShippingAssistant(registry) for _ in range(sessions)])
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    assistants = [ShippingAssistant(registry) for _ in range(sessions)]
+    created = tracemalloc.get_traced_memory()[0]
+    replay(assistants)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    model.latency_ms = latency_ms
+    return {
+        "sessions": sessions,
+        "empty_session_kb": (created - before) / sessions / 1024,
+        "session_kb": (after - before) / sessions / 1024,
+        "memory_tokens_per_session": statistics.mean(assistant.memory.token_count() for assistant in assistants),
+    }
+
+def find_saturation(levels: List[Dict[str, Any]], slo_p95_ms: float, max_error_rate: float, min_gain: float) -> Optional[Dict[str, Any]]:
+    """
+    Return the first saturated level and why, or None when every level kept up
+
+    A level is saturated when p95 latency exceeds the SLO, the failed-turn rate exceeds
+    max_error_rate, or throughput grew by less than min_gain times the relative growth
+    in users compared with the previous level.
+    """
+    previous = None
+    for level in levels:
+        reasons = []
+        if level["latency_p95_ms"] > slo_p95_ms:
+            reasons.append(f"p95 {level['latency_p95_ms']:.0f} ms above the {slo_p95_ms:.0f} ms SLO")
+        if level["error_rate"] > max_error_rate:
+            reasons.append(f"{level['error_rate']:.1%} failed turns")
+        if previous and previous["throughput_turns_per_s"] > 0:
+            gain = level["throughput_turns_per_s"] / previous["throughput_turns_per_s"] - 1
+            expected = level["users"] / previous["users"] - 1
+            if gain < min_gain * expected:
+                reasons.append(f"throughput +{gain:.0%} for +{expected:.0%} users")
+        if reasons:
+            return {"users": level["users"], "reasons": reasons, "last_healthy_users": previous["users"] if previous else None}
+        previous = level
+    return None
+
+def markdown_report(report: Dict[str, Any]) -> str:
+    config, memory, saturation = report["config"], report["session_memory"], report["saturation"]
+    lines = [
+        "# Load test report",
+        "",
+        f"{report['timestamp']} on {report['environment']['platform']}, Python {report['environment']['python']}",
+        "",
+        f"- Mode: {config['mode']}, {config['duration']:.0f} s per level ({config['warmup_seconds']:.0f} s warmup), "
+        f"think time {config['think_time_ms']:.0f} ms",
+        f"- Dialog mix: {', '.join(f'{name} {weight:g}' for name, weight in config['mix'].items())}",
+        f"- Stand-ins: RajaOngkir {config['api_latency_ms']:.0f} ms (+{config['api_jitter_ms']:.0f} ms jitter, "
+        f"{config['api_error_rate']:.0%} errors), LLM {config['llm_latency_ms']:.0f} ms per call, "
+        f"{config['embeddings']} embeddings, caches {'on' if config['caches'] else 'off'}",
+        f"- SLO: p95 below {config['slo_p95_ms']:.0f} ms, at most {config['max_error_rate']:.0%} failed turns",
+        "",
+        "| Users | Turns | Turns/s | p50 ms | p95 ms | p99 ms | Failed | Peak RSS MB | RSS MB/session |",
+        "|------:|------:|--------:|-------:|-------:|-------:|-------:|------------:|---------------:|",
+    ]
+    for level in report["levels"]:
+        lines.append(
+            f"| {level['users']} | {level['turns']} | {level['throughput_turns_per_s']:.1f} | "
+            f"{level['latency_p50_ms']:.0f} | {level['latency_p95_ms']:.0f} | {level['latency_p99_ms']:.0f} | "
+            f"{level['error_rate']:.1%} | {level['rss_peak_mb']:.0f} | {level['rss_per_session_mb']:.2f} |"
+        )
+    lines.append("")
+    if saturation:
+        healthy = saturation["last_healthy_users"]
+        lines.append(
+            f"**Saturation at {saturation['users']} concurrent users**: {'; '.join(saturation['reasons'])}. "
+            + (f"Highest healthy level: **{healthy} concurrent user(s)**." if healthy else "Even the lowest level was saturated.")
+        )
+    else:
+        lines.append(f"**No saturation up to {report['levels'][-1]['users']} concurrent users**; extend --levels to find it.")
+    lines += [
+        "",
+        f"Memory per session (tracemalloc, {memory['sessions']} sessions after one dialog of each scenario): "
+        f"{memory['session_kb']:.1f} KB ({memory['empty_session_kb']:.1f} KB when empty), "
+        f"{memory['memory_tokens_per_session']:.0f} conversation-memory tokens. "
+        f"Shared resources after startup: {report['startup_rss_mb']:.0f} MB RSS.",
+        "",
+    ]
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent simulated users and find the saturation point")
+    parser.add_argument("--levels", default="1,2,4,8,16,32", help="Comma-separated concurrent user counts")
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per level")
+    parser.add_argument("--warmup-seconds", type=float, default=2.0, help="Turns started earlier in a level are not measured")
+    parser.add_argument("--think-time-ms", type=float, default=500.0, help="Mean pause between a user's turns")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Scenario weights, e.g. single_quote=3,faq=1")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync",
+                        help="A thread per user calling chat(), or one event loop calling achat()")
+    parser.add_argument("--api-latency-ms", type=float, default=20.0, help="Fake RajaOngkir response delay")
+    parser.add_argument("--api-jitter-ms", type=float, default=10.0, help="Extra random RajaOngkir delay")
+    parser.add_argument("--api-error-rate", type=float, default=0.0, help="Share of RajaOngkir requests that fail")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Scripted model delay per call")
+    parser.add_argument("--embeddings", choices=("fake", "model"), default="fake",
+                        help="Hashing stand-in, or the model selected by KNOWLEDGE_EMBEDDING_BACKEND")
+    parser.add_argument("--no-cache", action="store_true", help="Disable tariff, destination and answer caches")
+    parser.add_argument("--slo-p95-ms", type=float, default=3000.0, help="p95 turn latency considered acceptable")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="Failed-turn share considered acceptable")
+    parser.add_argument("--min-gain", type=float, default=0.5,
+                        help="Throughput must grow by at least this share of the user growth between levels")
+    parser.add_argument("--memory-sessions", type=int, default=20, help="Sessions used for the per-session memory estimate")
+    parser.add_argument("--keep-going", action="store_true", help="Run the remaining levels after saturation")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for dialog choice, think times and error injection")
+    parser.add_argument("--report", default="load_test_report", help="Report path without extension; .md and .json are written")
+    parser.add_argument("--verbose", action="store_true", help="Show the assistant's console output and logs")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+        levels = [int(value) for value in args.levels.split(",") if value.strip()]
+    except ValueError as e:
+        parser.error(str(e))
+
+    with tempfile.TemporaryDirectory() as workdir, FakeRajaOngkirServer(
+        latency_ms=args.api_latency_ms, jitter_ms=args.api_jitter_ms, error_rate=args.api_error_rate, seed=args.seed
+    ) as server:
+        configure_environment(workdir, use_caches=not args.no_cache)
+        os.environ["RAJAONGKIR_BASE_URL"] = server.url
+        model = ScriptedChatModel(latency_ms=args.llm_latency_ms)
+        if args.verbose:
+            logging.basicConfig(level=logging.INFO, format="%(message)s")
+        output = None if args.verbose else open(os.devnull, "w")
+        quiet = lambda: contextlib.redirect_stdout(output) if output else contextlib.nullcontext()
+
+        with quiet():
+            registry = create_registry(model, workdir, args.embeddings)
+        report = {
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "environment": {"python": platform.python_version(), "platform": platform.platform()},
+            "config": {
+                "mode": args.mode,
+                "duration": args.duration,
+                "warmup_seconds": args.warmup_seconds,
+                "think_time_ms": args.think_time_ms,
+                "mix": mix,
+                "api_latency_ms": args.api_latency_ms,
+                "api_jitter_ms": args.api_jitter_ms,
+                "api_error_rate": args.api_error_rate,
+                "llm_latency_ms": args.llm_latency_ms,
+                "embeddings": args.embeddings,
+                "caches": not args.no_cache,
+                "slo_p95_ms": args.slo_p95_ms,
+                "max_error_rate": args.max_error_rate,
+                "seed": args.seed,
+            },
+            "startup_rss_mb": rss_mb(),
+            "levels": [],
+        }
+
+        print(f"🔄 Measuring memory of {args.memory_sessions} sessions...")
+        with quiet():
+            report["session_memory"] = measure_session_memory(registry, model, args.memory_sessions, mix)
+
+        for users in levels:
+            print(f"🔄 {users} concurrent user(s) for {args.duration:.0f}s...")
+            with quiet():
+                level = run_level(users, registry, model, args, mix)
+            report["levels"].append(level)
+            print(
+                f"   {level['throughput_turns_per_s']:.1f} turns/s, p50 {level['latency_p50_ms']:.0f} ms, "
+                f"p95 {level['latency_p95_ms']:.0f} ms, p99 {level['latency_p99_ms']:.0f} ms, "
+                f"{level['error_rate']:.1%} failed, peak RSS {level['rss_peak_mb']:.0f} MB"
+            )
+            saturation = find_saturation(report["levels"], args.slo_p95_ms, args.max_error_rate, args.min_gain)
+            if saturation and not args.keep_going:
+                break
+        report["saturation"] = find_saturation(report["levels"], args.slo_p95_ms, args.max_error_rate, args.min_gain)
+        report["api_requests"] = server.get_stats()
+        if output:
+            output.close()
+
+    markdown = markdown_report(report)
+    with open(f"{args.report}.json", "w") as f:
+        json.dump(report, f, indent=2)
+    with open(f"{args.report}.md", "w") as f:
+        f.write(markdown)
+    print()
+    print(markdown)
+    print(f"✅ Report written to {args.report}.md and {args.report}.json")
+
+if __name__ == "__main__":
+    main()
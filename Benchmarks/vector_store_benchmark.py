@@ -0,0 +1,167 @@
+"""
+Benchmark the Chroma and NumPy vector store backends on the knowledge base corpus
+
+Both stores receive identical embeddings, so the numbers compare only import, build,
+open and top-k search cost, plus how often both backends return the same chunks.
+
+Usage:
+    python Benchmarks/vector_store_benchmark.py --copies 50 --repeats 200
+"""
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+AI_AND_TOOLS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AI_And_Tools")
+sys.path.append(AI_AND_TOOLS)
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from knowledge_base import ShippingKnowledgeBase
+from vector_backends import open_vector_store
+
+QUERIES = [
+    "Which courier is best for heavy items?",
+    "Can I use COD?",
+    "How much does a book weigh?",
+    "ongkir dari jakarta ke surabaya",
+    "How long does delivery take?",
+    "What value should I declare for electronics?",
+    "Is Jogja the same as Yogyakarta?",
+    "cheapest shipping to Medan",
+    "small package estimate",
+    "JNE city to city service",
+]
+
+IMPORT_STATEMENTS = {
+    "chroma": "import chromadb; from langchain_community.vectorstores import Chroma",
+    "numpy": "import vector_backends",
+}
+
+class MemoizedEmbeddings(Embeddings):
+    """
+    Embeds each distinct text once so both stores are timed without model cost
+
+    Vectors are unit length (MiniLM already produces them that way), so Chroma's L2
+    ranking and the NumPy cosine ranking are comparable.
+    """
+
+    def __init__(self, embeddings: Embeddings):
+        self.embeddings = embeddings
+        self._vectors = {}
+
+    def embed_documents(self, texts):
+        missing = [text for text in dict.fromkeys(texts) if text not in self._vectors]
+        if missing:
+            vectors = self.embeddings.embed_documents(missing)
+            self._vectors.update(zip(missing, map(self._unit, vectors)))
+        return [self._vectors[text] for text in texts]
+
+    def embed_query(self, text):
+        if text not in self._vectors:
+            self._vectors[text] = self._unit(self.embeddings.embed_query(text))
+        return self._vectors[text]
+
+    @staticmethod
+    def _unit(vector):
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+def measure_import(backend: str) -> float:
+    """Time the backend imports in a fresh interpreter"""
+    code = f"import time; t = time.perf_counter(); {IMPORT_STATEMENTS[backend]}; print(time.perf_counter() - t)"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [AI_AND_TOOLS, os.getenv("PYTHONPATH")])))
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def benchmark_backend(backend, workdir, embeddings, documents, query_vectors, k, repeats):
+    directory = os.path.join(workdir, backend)
+
+    started = time.perf_counter()
+    store = open_vector_store(backend, directory, embeddings)
+    store.add_documents(documents)
+    store.persist()
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    store = open_vector_store(backend, directory, embeddings)
+    open_seconds = time.perf_counter() - started
+
+    latencies = []
+    results = {}
+    for _ in range(repeats):
+        for query, vector in query_vectors.items():
+            started = time.perf_counter()
+            found = store.similarity_search_by_vector(vector, k=k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            results[query] = [doc.page_content for doc in found]
+
+    return {
+        "import_seconds": measure_import(backend),
+        "build_seconds": build_seconds,
+        "open_seconds": open_seconds,
+        "search_ms_p50": statistics.median(latencies),
+        "search_ms_p95": percentile(latencies, 95),
+        "search_ms_mean": statistics.mean(latencies),
+    }, results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Chroma and NumPy vector store backends")
+    parser.add_argument("--copies", type=int, default=1, help="Replicate the built-in corpus to grow the store")
+    parser.add_argument("--repeats", type=int, default=100, help="Times each query is searched")
+    parser.add_argument("-k", type=int, default=3, help="Results per query")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # The numpy seed store is cheap and gives us the loaded model and splitter
+        kb = ShippingKnowledgeBase(os.path.join(workdir, "seed"), preload="eager", vector_backend="numpy")
+        base_documents = kb._create_initial_documents()
+        documents = [
+            Document(page_content=f"{doc.page_content}\n(copy {copy})" if copy else doc.page_content, metadata=doc.metadata)
+            for copy in range(args.copies)
+            for doc in base_documents
+        ]
+        embeddings = MemoizedEmbeddings(kb.embeddings)
+        embeddings.embed_documents([doc.page_content for doc in documents])
+        query_vectors = {query: embeddings.embed_query(query) for query in QUERIES}
+
+        report = {"documents": len(documents), "queries": len(QUERIES), "k": args.k, "backends": {}}
+        results = {}
+        for backend in ("chroma", "numpy"):
+            print(f"🔄 Benchmarking {backend}...")
+            report["backends"][backend], results[backend] = benchmark_backend(
+                backend, workdir, embeddings, documents, query_vectors, args.k, args.repeats
+            )
+
+    overlaps = [
+        len(set(results["chroma"][query]) & set(results["numpy"][query])) / args.k
+        for query in QUERIES
+    ]
+    report["topk_overlap"] = statistics.mean(overlaps)
+
+    print(f"\n📊 {report['documents']} chunks, {report['queries']} queries x {args.repeats}, k={args.k}\n")
+    print(f"{'metric':<18}{'chroma':>12}{'numpy':>12}")
+    for metric in report["backends"]["chroma"]:
+        chroma = report["backends"]["chroma"][metric]
+        numpy_value = report["backends"]["numpy"][metric]
+        print(f"{metric:<18}{chroma:>12.4f}{numpy_value:>12.4f}")
+    print(f"\nTop-{args.k} overlap between backends: {report['topk_overlap']:.1%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Non-interactive bulk quoting for the Indonesian Shipping Price Checker
+Streams shipments from CSV/JSONL, quotes them concurrently and writes results incrementally
+"""
+
+import asyncio
+import csv
+import itertools
+import json
+import os
+import sys
+from typing import Dict, Any, Iterator, Optional, TextIO
+
+# Add AI & Tools directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AI_And_Tools"))
+
+from dotenv import load_dotenv
+from rajaongkir_api import AsyncRajaOngkirAPI
+from shipping_tools import afind_locations
+from quote_matrix import SERVICE_GROUPS
+
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data_And_Config", ".env"))
+
+CSV_FIELDS = [
+    "row", "id", "origin", "origin_id", "destination", "destination_id", "weight", "item_value", "cod",
+    "status", "error", "options", "cheapest_courier", "cheapest_service", "cheapest_total", "etd"
+]
+
+def read_shipments(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily read shipments from a CSV or JSONL stream
+
+    The format is detected from the first non-empty line: JSON objects mean JSONL,
+    anything else is treated as a CSV header.
+    """
+    lines = iter(stream)
+    for first_line in lines:
+        if first_line.strip():
+            break
+    else:
+        return
+
+    lines = itertools.chain([first_line], lines)
+    if first_line.lstrip().startswith("{"):
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(lines)
+
+def _parse_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y", "ya")
+
+class BulkQuoter:
+    """Quotes streamed shipments concurrently without going through the LLM"""
+
+    def __init__(self, concurrency: int = 8, window: int = None):
+        self.concurrency = concurrency
+        # Rows are processed in bounded windows so memory stays flat for any input size
+        self.window = window or concurrency * 4
+        self.api = AsyncRajaOngkirAPI()
+
+    async def resolve_location(self, row: Dict[str, Any], field: str) -> Optional[int]:
+        """Return the location ID from an explicit *_id column or the first search match"""
+        if row.get(f"{field}_id"):
+            return int(row[f"{field}_id"])
+
+        keyword = str(row.get(field) or "").strip()
+        if not keyword:
+            return None
+
+        locations = await afind_locations(keyword)
+        return int(locations[0]["id"]) if locations else None
+
+    async def quote_row(self, row_number: int, row: Dict[str, Any], semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+        """Resolve both locations and quote a single shipment; errors are reported in the result"""
+        result = {
+            "row": row_number,
+            "id": row.get("id"),
+            "origin": row.get("origin"),
+            "destination": row.get("destination"),
+            "weight": row.get("weight"),
+            "item_value": row.get("item_value"),
+            "cod": _parse_bool(row.get("cod", False))
+        }
+
+        async with semaphore:
+            try:
+                origin_id, destination_id = await asyncio.gather(
+                    self.resolve_location(row, "origin"),
+                    self.resolve_location(row, "destination")
+                )
+                result["origin_id"] = origin_id
+                result["destination_id"] = destination_id
+                if origin_id is None or destination_id is None:
+                    missing = "origin" if origin_id is None else "destination"
+                    result.update({"status": "error", "error": f"Could not resolve {missing} location"})
+                    return result
+
+                response = await self.api.calculate_shipping_cost(
+                    shipper_destination_id=origin_id,
+                    receiver_destination_id=destination_id,
+                    weight=int(float(row["weight"])),
+                    item_value=int(float(row["item_value"])),
+                    cod=result["cod"]
+                )
+            except Exception as e:
+                result.update({"status": "error", "error": str(e)})
+                return result
+
+        meta = response.get("meta", {})
+        if meta.get("status") != "success":
+            result.update({"status": "error", "error": meta.get("message", "Unknown error")})
+            return result
+
+        data = response.get("data") or {}
+        options = [option for group in SERVICE_GROUPS for option in data.get(group) or []]
+        result.update({"status": "ok", "options": len(options)})
+        if options:
+            cheapest = min(options, key=lambda option: option["grandtotal"])
+            result.update({
+                "cheapest_courier": cheapest["shipping_name"],
+                "cheapest_service": cheapest["service_name"],
+                "cheapest_total": cheapest["grandtotal"],
+                "etd": cheapest["etd"]
+            })
+        return result
+
+    async def run(
+        self,
+        input_stream: TextIO,
+        output_stream: TextIO,
+        output_format: str = "jsonl",
+        checkpoint_path: Optional[str] = None
+    ) -> Dict[str, int]:
+        """
+        Quote every shipment from input_stream and write results to output_stream
+
+        Args:
+            input_stream: CSV or JSONL shipments (file or stdin)
+            output_stream: Destination for results, written after every window
+            output_format (str): "jsonl" or "csv"
+            checkpoint_path (str, optional): File recording the input, the last written row and
+                the output size after it; rows up to it are skipped and anything written after it
+                is truncated, so an interrupted run resumes where it stopped. It is ignored when
+                the input file changed and deleted once the whole input was quoted
+
+        Returns:
+            Counters for quoted and failed rows and the row the run resumed from
+        """
+        source = input_identity(input_stream)
+        checkpoint = load_checkpoint(checkpoint_path)
+        if checkpoint["last_row"] and checkpoint["input"] != source:
+            # Left by a run over another (or a since modified) input: start over, dropping its output
+            print(f"⚠️ Ignoring checkpoint {checkpoint_path}: it was written for a different input", file=sys.stderr)
+            checkpoint = {"input": source, "last_row": 0, "offset": 0}
+        last_row = checkpoint["last_row"]
+        if checkpoint["offset"] is not None and output_stream.seekable():
+            # Rows written after the last checkpoint (e.g. interrupted before it was saved) are quoted again;
+            # a file shorter than the checkpoint is not the one it was written for, so it is left alone
+            if checkpoint["offset"] <= output_stream.seek(0, os.SEEK_END):
+                output_stream.seek(checkpoint["offset"])
+                output_stream.truncate()
+        writer = None
+        if output_format == "csv":
+            writer = csv.DictWriter(output_stream, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if last_row == 0:
+                writer.writeheader()
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        stats = {"quoted": 0, "failed": 0, "resumed_from": last_row}
+        rows = enumerate(read_shipments(input_stream), 1)
+
+        while True:
+            batch = list(itertools.islice(rows, self.window))
+            if not batch:
+                break
+            # Rows up to the checkpoint were written by a previous run
+            window = [(row_number, row) for row_number, row in batch if row_number > last_row]
+            if not window:
+                continue
+
+            results = await asyncio.gather(*[self.quote_row(row_number, row, semaphore) for row_number, row in window])
+            for result in results:
+                if writer is not None:
+                    writer.writerow(result)
+                else:
+                    output_stream.write(json.dumps(result) + "\n")
+                stats["quoted" if result["status"] == "ok" else "failed"] += 1
+            output_stream.flush()
+
+            last_row = window[-1][0]
+            save_checkpoint(checkpoint_path, last_row, output_stream.tell() if output_stream.seekable() else None, source)
+            print(f"✅ Processed {last_row} rows ({stats['failed']} failed)", file=sys.stderr)
+
+        # A finished run leaves nothing to resume, so the next run over the same output starts fresh
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return stats
+
+def input_identity(stream: TextIO) -> Optional[Dict[str, Any]]:
+    """Return the path, size and modification time of a file input, or None for stdin and pipes"""
+    try:
+        info = os.fstat(stream.fileno())
+    except (AttributeError, OSError, ValueError):
+        return None
+    name = getattr(stream, "name", None)
+    if not isinstance(name, str) or not os.path.isfile(name):
+        return None
+    return {"path": os.path.abspath(name), "size": info.st_size, "mtime": info.st_mtime}
+
+def load_checkpoint(path: Optional[str]) -> Dict[str, Any]:
+    """Return the checkpointed input, last completed row number and output offset after it (None if unknown)"""
+    if not path or not os.path.exists(path):
+        return {"input": None, "last_row": 0, "offset": None}
+    with open(path, encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    return {
+        "input": checkpoint.get("input"),
+        "last_row": int(checkpoint.get("last_row", 0)),
+        "offset": checkpoint.get("offset")
+    }
+
+def save_checkpoint(path: Optional[str], last_row: int, offset: Optional[int] = None, source: Optional[Dict[str, Any]] = None):
+    """Atomically record the input, the last completed row number and the output offset after it"""
+    if not path:
+        return
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"input": source, "last_row": last_row, "offset": offset}, f)
+    os.replace(temp_path, path)
@@ -1,19 +1,90 @@
 #!/usr/bin/env python3
 """
 Command-line interface for the Indonesian Shipping Price Checker
-Run this for a simple terminal-based chat interface
+Run this for a simple terminal-based chat interface, or with --bulk to quote
+a CSV/JSONL file of shipments without the LLM
 """
 
+import argparse
+import asyncio
+import logging
 import os
 import sys
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from shipping_assistant import create_shipping_assistant
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(description="Indonesian Shipping Price Checker")
+    parser.add_argument("--bulk", metavar="INPUT", help="Quote shipments from a CSV/JSONL file ('-' for stdin) without the chat loop")
+    parser.add_argument("--output", default="-", help="Bulk results file (default: stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Bulk output format (default: from --output extension, else jsonl)")
+    parser.add_argument("--checkpoint", help="Checkpoint file for resuming bulk runs (default: <output>.checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent bulk quotes (default: 8)")
+    return parser.parse_args()
+
+def run_bulk(args):
+    """Stream shipments through the bulk quoter, bypassing the LLM"""
+    from bulk_quote import BulkQuoter
+
+    output_format = args.format or ("csv" if args.output.endswith(".csv") else "jsonl")
+    checkpoint = args.checkpoint or (f"{args.output}.checkpoint" if args.output != "-" else None)
+
+    input_stream = sys.stdin if args.bulk == "-" else open(args.bulk, newline="", encoding="utf-8")
+    # Only a resumed run keeps earlier output; a fresh run must not append to an old file
+    resuming = checkpoint is not None and os.path.exists(checkpoint)
+    output_mode = "a" if resuming else "w"
+    output_stream = sys.stdout if args.output == "-" else open(args.output, output_mode, newline="", encoding="utf-8")
+    try:
+        stats = asyncio.run(BulkQuoter(concurrency=args.concurrency).run(
+            input_stream, output_stream, output_format=output_format, checkpoint_path=checkpoint
+        ))
+        print(f"✅ Bulk quote finished: {stats['quoted']} quoted, {stats['failed']} failed", file=sys.stderr)
+    except KeyboardInterrupt:
+        print(f"\n⏸️  Interrupted; rerun the same command to resume from {checkpoint}", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+def print_streamed_response(events):
+    """Print tool progress on its own lines and answer tokens as they arrive"""
+    streamed = ""
+    for event in events:
+        if event["type"] == "status":
+            if streamed:
+                print()
+                streamed = ""
+            print(f"   {event['text']}", flush=True)
+        elif event["type"] == "token":
+            if not streamed:
+                print("\n🤖 Assistant: ", end="")
+            streamed += event["text"]
+            print(event["text"], end="", flush=True)
+        elif event["type"] == "discard" and streamed:
+            print()
+            streamed = ""
+        elif event["type"] == "done":
+            # Tokens are not always the whole answer, e.g. when the model streamed nothing
+            if streamed.strip() != event["output"].strip():
+                print(f"\n🤖 Assistant: {event['output']}", end="")
+            print("\n")
 
 def main():
     """Main CLI interface"""
+    args = parse_args()
+    if args.bulk:
+        run_bulk(args)
+        return
+    
+    from shipping_assistant import create_shipping_assistant
+    
+    # Per-turn diagnostics go to stderr so they never interleave with the streamed answer
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper(), format="%(message)s")
+    
     print("🚚 Indonesian Shipping Price Checker - CLI Version")
     print("=" * 60)
     print("Welcome! I can help you check shipping costs across Indonesia.")
@@ -42,10 +113,8 @@ def main():
             if not user_input:
                 continue
             
-            # Get assistant response
-            print("\n🤖 Assistant is thinking...")
-            response = assistant.chat(user_input)
-            print(f"\n🤖 Assistant: {response}\n")
+            # Stream the assistant response as it is generated
+            print_streamed_response(assistant.stream_chat(user_input))
             print("-" * 60)
             
         except KeyboardInterrupt:
@@ -0,0 +1,230 @@
+"""
+Token-budgeted conversation memory
+Only the raw user text, the knowledge chunks first shown in that turn and the final answers
+are kept; when the transcript outgrows its token budget the oldest turns are dropped and
+folded into a running summary of the shipping details resolved so far (origin/destination
+IDs, weight, item value, COD)
+"""
+
+import os
+import re
+import sys
+from typing import Any, Dict, List, Optional, Set
+
+# Add AI & Tools directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AI_And_Tools"))
+
+from langchain.memory.chat_memory import BaseChatMemory
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, get_buffer_string
+from pydantic import Field
+from slot_extractor import extract_shipping_slots
+from token_counter import count_message_tokens
+
+# Search results remembered per session to put names next to resolved IDs
+MAX_KNOWN_LOCATIONS = 200
+
+LOCATION_LINE = re.compile(r"^\d+\. ID: (\d+) - (.+)$", re.MULTILINE)
+
+class TokenBudgetMemory(BaseChatMemory):
+    """Chat memory capped by tokens that keeps a summary of resolved slots for evicted turns"""
+
+    memory_key: str = "chat_history"
+    return_messages: bool = True
+    input_key: Optional[str] = "raw_input"
+    """Inputs key holding the user's own text, not the RAG-enhanced prompt"""
+    output_key: Optional[str] = "output"
+    context_key: str = "knowledge_context"
+    """Inputs key holding the knowledge chunks injected for the first time in this turn"""
+    chunk_ids_key: str = "knowledge_chunk_ids"
+    max_token_limit: int = 2000
+    """Token budget for the summary plus the turns kept verbatim"""
+
+    slots: Dict[str, Any] = Field(default_factory=dict)
+    locations: Dict[str, str] = Field(default_factory=dict)
+    compacted_turns: int = 0
+    turn_chunks: List[List[str]] = Field(default_factory=list)
+    """Knowledge chunk ids stored with each kept turn, oldest first"""
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def summary_message(self, compacted_turns: Optional[int] = None) -> Optional[SystemMessage]:
+        """Return the summary of compacted turns, or None while every turn is kept verbatim"""
+        compacted_turns = self.compacted_turns if compacted_turns is None else compacted_turns
+        if not compacted_turns:
+            return None
+        details = self.describe_slots()
+        return SystemMessage(content=(
+            f"Summary of {compacted_turns} earlier turn(s) that are no longer shown. "
+            + (f"Shipping details resolved so far: {details}. Reuse them unless the user changes them."
+               if details else "No shipping details had been resolved yet.")
+        ))
+
+    def describe_slots(self) -> str:
+        """Return the resolved slots as one line, e.g. "origin: Jakarta (ID 31555); weight: 1,000 g\""""
+        parts = []
+        for slot in ("origin", "destination"):
+            name, location_id = self.slots.get(slot), self.slots.get(f"{slot}_id")
+            if name and location_id:
+                parts.append(f"{slot}: {name} (ID {location_id})")
+            elif location_id:
+                parts.append(f"{slot}: ID {location_id}")
+            elif name:
+                parts.append(f"{slot}: {name} (ID not resolved yet)")
+        if self.slots.get("weight"):
+            parts.append(f"weight: {self.slots['weight']:,.0f} g")
+        if self.slots.get("item_value"):
+            parts.append(f"item value: Rp {self.slots['item_value']:,.0f}")
+        if "cod" in self.slots:
+            parts.append(f"COD: {'yes' if self.slots['cod'] else 'no'}")
+        return "; ".join(parts)
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        summary = self.summary_message()
+        messages = ([summary] if summary else []) + list(self.chat_memory.messages)
+        if self.return_messages:
+            return {self.memory_key: messages}
+        return {self.memory_key: get_buffer_string(messages)}
+
+    def update_slots(self, values: Dict[str, Any]):
+        """
+        Merge newly resolved shipping details into the running summary
+
+        A location name that differs from the stored one invalidates its stored ID, and
+        a new ID replacing a different one invalidates the stored name.
+
+        Args:
+            values (dict): Any of origin, origin_id, destination, destination_id, weight, item_value, cod
+        """
+        for slot in ("origin", "destination"):
+            name, location_id = values.get(slot), values.get(f"{slot}_id")
+            stored_id = self.slots.get(f"{slot}_id")
+            if location_id is not None and not name and stored_id is not None and location_id != stored_id:
+                self.slots.pop(slot, None)
+            elif name and name != self.slots.get(slot) and location_id is None:
+                self.slots.pop(f"{slot}_id", None)
+        self.slots.update({key: value for key, value in values.items() if value is not None})
+
+    def _remember_locations(self, observation: str):
+        for location_id, name in LOCATION_LINE.findall(observation):
+            self.locations.pop(location_id, None)
+            self.locations[location_id] = name.strip()
+        while len(self.locations) > MAX_KNOWN_LOCATIONS:
+            self.locations.pop(next(iter(self.locations)))
+
+    def _location(self, slot: str, location_id: Any) -> Dict[str, Any]:
+        location_id = str(location_id)
+        return {f"{slot}_id": location_id, slot: self.locations.get(location_id)}
+
+    def _update_from_steps(self, intermediate_steps: List[Any]):
+        """Read resolved IDs, weight and value from the tool calls of a turn"""
+        for action, observation in intermediate_steps or []:
+            tool_input = action.tool_input if isinstance(action.tool_input, dict) else {}
+            if action.tool == "search_destination":
+                self._remember_locations(str(observation))
+            elif action.tool == "calculate_shipping_cost" and not str(observation).startswith("Error"):
+                values = {"weight": tool_input.get("weight"), "item_value": tool_input.get("item_value"),
+                          "cod": tool_input.get("cod", False)}
+                if tool_input.get("shipper_destination_id") is not None:
+                    values.update(self._location("origin", tool_input["shipper_destination_id"]))
+                if tool_input.get("receiver_destination_id") is not None:
+                    values.update(self._location("destination", tool_input["receiver_destination_id"]))
+                self.update_slots(values)
+            elif action.tool == "calculate_shipping_matrix" and not str(observation).startswith("Error"):
+                # Only a single origin/destination/weight is an unambiguous slot value
+                values = {"item_value": tool_input.get("item_value")}
+                if len(tool_input.get("origin_ids") or []) == 1:
+                    values.update(self._location("origin", tool_input["origin_ids"][0]))
+                if len(tool_input.get("destination_ids") or []) == 1:
+                    values.update(self._location("destination", tool_input["destination_ids"][0]))
+                if len(tool_input.get("weights") or []) == 1:
+                    values["weight"] = tool_input["weights"][0]
+                self.update_slots(values)
+
+    def seen_chunk_ids(self) -> Set[str]:
+        """Return the ids of knowledge chunks still visible in the kept turns"""
+        return {chunk_id for chunk_ids in self.turn_chunks for chunk_id in chunk_ids}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> None:
+        """Store the raw user text and the answer, update the slots and enforce the budget"""
+        input_str, output_str = self._get_input_output(inputs, outputs)
+        self.update_slots(extract_shipping_slots(input_str))
+        self._update_from_steps(outputs.get("intermediate_steps"))
+
+        # Chunks stay with the turn that introduced them, so later turns can leave them out
+        context = inputs.get(self.context_key)
+        human = f"{input_str}\n\n{context.strip()}" if context else input_str
+        self.chat_memory.add_messages([HumanMessage(content=human), AIMessage(content=output_str)])
+        self.turn_chunks.append(list(inputs.get(self.chunk_ids_key) or []) if context else [])
+        self._prune()
+
+    async def asave_context(self, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> None:
+        # Everything is in memory, so there is nothing to await
+        self.save_context(inputs, outputs)
+
+    def _prune(self):
+        """Drop the oldest turns until the summary and the remaining turns fit the budget"""
+        messages = list(self.chat_memory.messages)
+        sizes = [count_message_tokens([message]) for message in messages]
+        dropped = 0
+        # The latest turn is always kept, even when it alone exceeds the budget
+        while len(messages) - dropped > 2:
+            if self._tokens(sizes[dropped:], self.compacted_turns + dropped // 2) <= self.max_token_limit:
+                break
+            dropped += 2
+        if dropped:
+            # Chunks of dropped turns are no longer visible and may be injected again
+            self.compacted_turns += dropped // 2
+            self.turn_chunks = self.turn_chunks[dropped // 2:]
+            self.chat_memory.clear()
+            self.chat_memory.add_messages(messages[dropped:])
+
+    def _tokens(self, sizes: List[int], compacted_turns: int) -> int:
+        summary = self.summary_message(compacted_turns)
+        return sum(sizes) + (count_message_tokens([summary]) if summary else 0)
+
+    def token_count(self) -> int:
+        """Return the tokens this memory currently adds to every prompt"""
+        return count_message_tokens(self.load_memory_variables({})[self.memory_key])
+
+    def clear(self) -> None:
+        super().clear()
+        self.slots.clear()
+        self.locations.clear()
+        self.compacted_turns = 0
+        self.turn_chunks = []
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return turn counts, token usage against the budget and the resolved slots"""
+        return {
+            "turns": len(self.chat_memory.messages) // 2,
+            "compacted_turns": self.compacted_turns,
+            "knowledge_chunks": len(self.seen_chunk_ids()),
+            "tokens": self.token_count(),
+            "budget": self.max_token_limit,
+            "slots": dict(self.slots)
+        }
+
+class PromptTokenCounter(BaseCallbackHandler):
+    """Counts the prompt tokens a turn sends to the LLM, across every agent iteration"""
+
+    def __init__(self):
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.reported_prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], **kwargs: Any) -> None:
+        for prompt in messages:
+            self.llm_calls += 1
+            self.prompt_tokens += count_message_tokens(prompt)
+
+    def on_llm_end(self, response: Any, **kwargs: Any) -> None:
+        # Token counts reported by the provider, when the response carries them
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                self.reported_prompt_tokens += usage.get("input_tokens", 0)
+                self.completion_tokens += usage.get("output_tokens", 0)
@@ -0,0 +1,172 @@
+"""
+Agent executor that runs the tool calls of one LLM step concurrently
+A tool-calling model can ask for several independent tools at once, e.g. search_destination
+for both the origin and the destination; AgentExecutor would run them one after another
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, List, Union
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentFinish, AgentStep
+from pydantic import PrivateAttr
+
+# State of the async turn running in the current context: its timings, the semaphore bounding
+# tool calls and the number of actions in the current step
+_async_turn: contextvars.ContextVar = contextvars.ContextVar("parallel_agent_turn", default=None)
+
+class ParallelAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor whose tool calls from the same LLM step run concurrently, at most
+    max_tool_concurrency at a time: on a thread pool for invoke, under a semaphore for ainvoke
+    """
+
+    max_tool_concurrency: int = 4
+    """Maximum tool calls of one step running at the same time; 1 restores sequential execution"""
+
+    _local: threading.local = PrivateAttr(default_factory=threading.local)
+
+    @property
+    def last_tool_timings(self) -> List[Dict[str, Any]]:
+        """Per-tool timings of the most recent turn on this thread"""
+        return list(self._timings())
+
+    def _timings(self) -> List[Dict[str, Any]]:
+        if not hasattr(self._local, "timings"):
+            self._local.timings = []
+        return self._local.timings
+
+    def _call(self, inputs: Dict[str, str], run_manager=None) -> Dict[str, Any]:
+        self._local.timings = []
+        return super()._call(inputs, run_manager=run_manager)
+
+    async def _acall(self, inputs: Dict[str, str], run_manager=None) -> Dict[str, Any]:
+        self._local.timings = []
+        turn = {
+            "timings": self._local.timings,
+            "semaphore": asyncio.Semaphore(max(1, self.max_tool_concurrency)),
+            "step_size": 1
+        }
+        token = _async_turn.set(turn)
+        try:
+            return await super()._acall(inputs, run_manager=run_manager)
+        finally:
+            _async_turn.reset(token)
+
+    def _iter_next_step(
+        self,
+        name_to_tool_map,
+        color_mapping,
+        inputs,
+        intermediate_steps,
+        run_manager=None
+    ) -> Iterator[Union[AgentFinish, AgentAction, AgentStep]]:
+        # The parent yields every action of the step before running the first one,
+        # so by the time _perform_agent_action is called the whole batch is known
+        self._local.pending = []
+        self._local.results = {}
+        for item in super()._iter_next_step(name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager):
+            if isinstance(item, AgentAction):
+                self._local.pending.append(item)
+            yield item
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None) -> AgentStep:
+        results = getattr(self._local, "results", {})
+        if id(agent_action) in results:
+            return results.pop(id(agent_action))
+
+        pending = getattr(self._local, "pending", [])
+        batch = [action for action in pending if action is not agent_action]
+        self._local.pending = []
+        if not batch or self.max_tool_concurrency <= 1:
+            return self._timed_action(name_to_tool_map, color_mapping, agent_action, run_manager, parallel=1)
+
+        batch.insert(0, agent_action)
+        workers = min(self.max_tool_concurrency, len(batch))
+        timings = self._timings()
+        started = time.perf_counter()
+
+        def run(action):
+            # Worker threads report into the caller's timing list
+            self._local.timings = timings
+            return self._timed_action(name_to_tool_map, color_mapping, action, run_manager, parallel=len(batch))
+
+        # Each call runs in its own copy of the caller's context, so tracing spans keep their parent
+        contexts = [contextvars.copy_context() for _ in batch]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agent-tool") as pool:
+            steps = list(pool.map(lambda context, action: context.run(run, action), contexts, batch))
+
+        if run_manager:
+            run_manager.on_text(
+                f"\n⏱️ {len(batch)} tool calls in parallel took {time.perf_counter() - started:.2f}s\n",
+                verbose=self.verbose
+            )
+        for action, step in zip(batch[1:], steps[1:]):
+            results[id(action)] = step
+        return steps[0]
+
+    async def _aiter_next_step(
+        self,
+        name_to_tool_map,
+        color_mapping,
+        inputs,
+        intermediate_steps,
+        run_manager=None
+    ) -> AsyncIterator[Union[AgentFinish, AgentAction, AgentStep]]:
+        # The parent yields every action of the step, then gathers _aperform_agent_action for all of them
+        turn = _async_turn.get()
+        actions, started = 0, None
+        async for item in super()._aiter_next_step(name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager):
+            if isinstance(item, AgentAction):
+                actions += 1
+                if turn is not None:
+                    turn["step_size"] = actions
+                started = time.perf_counter()
+            elif isinstance(item, AgentStep) and started is not None:
+                if run_manager and actions > 1:
+                    await run_manager.on_text(
+                        f"\n⏱️ {actions} tool calls in parallel took {time.perf_counter() - started:.2f}s\n",
+                        verbose=self.verbose
+                    )
+                started = None
+            yield item
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None) -> AgentStep:
+        turn = _async_turn.get()
+        if turn is None:
+            return await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+        async with turn["semaphore"]:
+            started = time.perf_counter()
+            step = await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+            elapsed = time.perf_counter() - started
+
+        turn["timings"].append({
+            "tool": agent_action.tool,
+            "input": agent_action.tool_input,
+            "seconds": elapsed,
+            # As on the sync path, calls only count as parallel when more than one may run at once
+            "parallel": turn["step_size"] if self.max_tool_concurrency > 1 else 1
+        })
+        if run_manager:
+            await run_manager.on_text(f"\n⏱️ {agent_action.tool} took {elapsed:.2f}s\n", verbose=self.verbose)
+        return step
+
+    def _timed_action(self, name_to_tool_map, color_mapping, agent_action, run_manager, parallel: int) -> AgentStep:
+        started = time.perf_counter()
+        step = super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        elapsed = time.perf_counter() - started
+
+        self._timings().append({
+            "tool": agent_action.tool,
+            "input": agent_action.tool_input,
+            "seconds": elapsed,
+            "parallel": parallel
+        })
+        if run_manager:
+            run_manager.on_text(f"\n⏱️ {agent_action.tool} took {elapsed:.2f}s\n", verbose=self.verbose)
+        return step
@@ -0,0 +1,106 @@
+"""
+Process-wide registry for heavy, shareable resources
+The LLM client, embeddings/vector store and agent are loaded once per process and
+shared by every ShippingAssistant; each session only owns its conversation memory
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict
+
+# Add AI & Tools directory to path for imports
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AI_And_Tools"))
+
+from langchain_mistralai import ChatMistralAI
+from langchain.agents import create_tool_calling_agent
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+from shipping_tools import create_shipping_tools
+from knowledge_base import ShippingKnowledgeBase
+from answer_cache import SemanticAnswerCache
+
+class ResourceRegistry:
+    """Thread-safe, lazily populated registry of process-wide resources"""
+
+    def __init__(self):
+        self._resources: Dict[str, Any] = {}
+        self._load_times: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def get(self, name: str, factory: Callable[[], Any]) -> Any:
+        """
+        Return the named resource, creating it with factory on first use
+
+        Concurrent first calls for the same name wait for a single factory call;
+        different resources load independently.
+        """
+        if name in self._resources:
+            return self._resources[name]
+
+        with self._locks_lock:
+            lock = self._locks.setdefault(name, threading.Lock())
+        with lock:
+            if name not in self._resources:
+                started = time.perf_counter()
+                self._resources[name] = factory()
+                self._load_times[name] = time.perf_counter() - started
+        return self._resources[name]
+
+    def get_llm(self):
+        """Shared ChatMistralAI client"""
+        def create():
+            return ChatMistralAI(
+                model="mistral-large-latest",
+                temperature=0.1,
+                mistral_api_key=os.getenv("MISTRAL_API_KEY")
+            )
+        return self.get("llm", create)
+
+    def get_knowledge_base(self):
+        """Shared knowledge base holding the embedding model and vector store"""
+        return self.get("knowledge_base", ShippingKnowledgeBase)
+
+    def get_answer_cache(self):
+        """Shared semantic cache of answers to generic questions, or None when disabled through ANSWER_CACHE_ENABLED"""
+        if os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("0", "false", "no"):
+            return None
+
+        def create():
+            return SemanticAnswerCache(
+                max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "500")),
+                ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "86400")),
+                threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+            )
+        return self.get("answer_cache", create)
+
+    def get_tools(self):
+        """Shared stateless shipping tools"""
+        return self.get("tools", create_shipping_tools)
+
+    def get_agent(self, system_prompt: str):
+        """Shared tool-calling agent runnable; it holds no conversation state"""
+        def create():
+            prompt = ChatPromptTemplate.from_messages([
+                ("system", system_prompt),
+                MessagesPlaceholder(variable_name="chat_history"),
+                ("human", "{input}"),
+                MessagesPlaceholder(variable_name="agent_scratchpad")
+            ])
+            return create_tool_calling_agent(
+                llm=self.get_llm(),
+                tools=self.get_tools(),
+                prompt=prompt
+            )
+        return self.get("agent", create)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return which resources are loaded and how long each took to load"""
+        return {name: {"load_seconds": round(seconds, 3)} for name, seconds in self._load_times.items()}
+
+_registry = ResourceRegistry()
+
+def get_registry() -> ResourceRegistry:
+    """Return the process-wide resource registry"""
+    return _registry
@@ -1,72 +1,69 @@
+import asyncio
+import contextvars
+import logging
 import os
+import queue
 import sys
-import re
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, Iterator, Optional, Tuple
 from dotenv import load_dotenv
 
 # Add AI & Tools directory to path for imports
 sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AI_And_Tools"))
 
-from langchain_mistralai import ChatMistralAI
-from langchain.agents import AgentExecutor, create_tool_calling_agent
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.memory import ConversationBufferWindowMemory
-from langchain_core.messages import HumanMessage, AIMessage
-from shipping_tools import create_shipping_tools
-from knowledge_base import ShippingKnowledgeBase
+from shipping_tools import find_locations
+from rajaongkir_api import RajaOngkirAPI
+from slot_extractor import extract_shipping_slots, has_all_slots, mentions_cod
+from knowledge_base import requires_retrieval, should_skip_retrieval
+from resources import ResourceRegistry, get_registry
+from parallel_executor import ParallelAgentExecutor
+from streaming import StreamingEventHandler, done_event, status_event, token_event
+from conversation_memory import PromptTokenCounter, TokenBudgetMemory
+from tracing import TracingCallbackHandler, get_tracer
 
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Data_And_Config", ".env"))
 
+logger = logging.getLogger(__name__)
+
+# Slots that tie a question to a particular shipment; COD alone does not
+SHIPMENT_SLOTS = ("origin", "destination", "weight", "item_value")
+
 class ShippingAssistant:
     """Main shipping assistant class that combines RAG and function calling"""
     
-    def __init__(self):
-        # Initialize LLM
-        self.llm = ChatMistralAI(
-            model="mistral-large-latest",
-            temperature=0.1,
-            mistral_api_key=os.getenv("MISTRAL_API_KEY")
-        )
-        
-        # Initialize knowledge base
-        self.knowledge_base = ShippingKnowledgeBase()
+    def __init__(self, registry: ResourceRegistry = None):
+        # LLM, knowledge base, tools and agent are shared process-wide;
+        # each assistant only owns its conversation memory and executor
+        self.registry = registry or get_registry()
+        self.llm = self.registry.get_llm()
+        self.knowledge_base = self.registry.get_knowledge_base()
+        self.tools = self.registry.get_tools()
+        self.answer_cache = self.registry.get_answer_cache()
         
-        # Initialize tools
-        self.tools = create_shipping_tools()
-        
-        # Initialize memory
-        self.memory = ConversationBufferWindowMemory(
-            memory_key="chat_history",
-            return_messages=True,
-            k=20  # Keep last 20 exchanges
+        # Memory keeps raw user turns within a token budget; older turns become a slot summary
+        self.memory = TokenBudgetMemory(
+            max_token_limit=int(os.getenv("CONVERSATION_MEMORY_TOKEN_BUDGET", "2000"))
         )
+        self.last_turn_usage: Dict[str, Any] = {}
         
         # Create agent
         self.agent_executor = self._create_agent()
         
     def _create_agent(self):
-        """Create the LangChain agent with tools and prompt"""
-        
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", self._get_system_prompt()),
-            MessagesPlaceholder(variable_name="chat_history"),
-            ("human", "{input}"),
-            MessagesPlaceholder(variable_name="agent_scratchpad")
-        ])
-        
-        agent = create_tool_calling_agent(
-            llm=self.llm,
-            tools=self.tools,
-            prompt=prompt
-        )
+        """Create the per-conversation executor around the shared agent"""
+        agent = self.registry.get_agent(self._get_system_prompt())
         
-        return AgentExecutor(
+        return ParallelAgentExecutor(
             agent=agent,
             tools=self.tools,
             memory=self.memory,
             verbose=True,
             handle_parsing_errors=True,
-            max_iterations=5
+            max_iterations=5,
+            # The memory reads resolved location IDs from the tool calls
+            return_intermediate_steps=True,
+            # Independent tool calls from one LLM step (e.g. origin and destination searches) run concurrently
+            max_tool_concurrency=int(os.getenv("AGENT_TOOL_CONCURRENCY", "4"))
         )
     
     def _get_system_prompt(self):
@@ -88,6 +85,8 @@ class ShippingAssistant:
         7. Explain COD availability and delivery times
         8. Help users understand weight conversions (kg to grams)
         9. Suggest reasonable item values if not provided
+        10. When comparing several origins, destinations or weights, use calculate_shipping_matrix once instead of repeated calculate_shipping_cost calls
+        11. When you need several independent lookups, such as searching both the origin and the destination, request all of those tool calls in the same step instead of one per step
 
         CONVERSATION FLOW:
         1. Greet the user and ask what they want to ship
@@ -105,95 +104,337 @@ class ShippingAssistant:
         Always use the knowledge base context to provide accurate information about Indonesian locations and shipping guidelines.
         """
     
-    def _enhance_query_with_context(self, user_input: str) -> str:
-        """Enhance user query with relevant context from knowledge base"""
-        context = self.knowledge_base.get_context_for_query(user_input)
+    def _enhance_query_with_context(self, user_input: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Enhance user query with relevant context from knowledge base
+        
+        Only chunks above the relevance threshold that the conversation memory does not
+        already hold are injected.
+        
+        Returns:
+            The enhanced input and the retrieval report of knowledge_base.retrieve_context
+        """
+        # Short slot-filling replies ("ya", "1kg") gain nothing from retrieval
+        if should_skip_retrieval(user_input):
+            return user_input, {}
+        
+        # While the model is still loading, only wait for it if the query needs shipping knowledge
+        retrieval = self.knowledge_base.retrieve_context(
+            user_input,
+            wait=requires_retrieval(user_input),
+            exclude=self.memory.seen_chunk_ids()
+        )
+        if not retrieval["context"]:
+            return user_input, retrieval
         
         enhanced_input = f"""
         User Query: {user_input}
         
-        {context}
+        {retrieval["context"]}
         
         Based on the above context and user query, please help the user with their shipping inquiry.
         """
         
-        return enhanced_input
+        return enhanced_input, retrieval
+    
+    def _agent_inputs(self, user_input: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Build the executor inputs for a turn; memory stores raw_input and the new chunks, the prompt uses input"""
+        enhanced_input, retrieval = self._enhance_query_with_context(user_input)
+        inputs = {
+            "input": enhanced_input,
+            "raw_input": user_input,
+            "knowledge_context": retrieval.get("context", ""),
+            "knowledge_chunk_ids": retrieval.get("chunk_ids", [])
+        }
+        return inputs, retrieval
     
     def chat(self, user_input: str) -> str:
         """Main chat interface"""
-        try:
-            # Enhance query with RAG context
-            enhanced_input = self._enhance_query_with_context(user_input)
+        with get_tracer().span("chat", mode="sync", input_bytes=len(user_input)) as turn:
+            try:
+                # Fully specified quotes and repeated generic questions skip RAG and the LLM entirely
+                fast_response = self._try_without_agent(user_input)
+                if fast_response is not None:
+                    return self._finish_turn(turn, fast_response)
+                
+                # Enhance query with RAG context
+                inputs, retrieval = self._agent_inputs(user_input)
+                cacheable = self._is_cacheable(user_input)
+                
+                # Get response from agent
+                counter = PromptTokenCounter()
+                with get_tracer().span("agent"):
+                    result = self.agent_executor.invoke(inputs, config={"callbacks": self._callbacks(counter)})
+                self._report_usage(counter, retrieval)
+                self._cache_answer(user_input, result, cacheable)
+                
+                return self._finish_turn(turn, result["output"])
             
-            # Get response from agent
-            result = self.agent_executor.invoke({
-                "input": enhanced_input
-            })
-            
-            return result["output"]
+            except Exception as e:
+                turn.record_error(f"{type(e).__name__}: {str(e)}")
+                return f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question."
+    
+    async def achat(self, user_input: str) -> str:
+        """Async chat interface; tools run on the event loop instead of a thread per request"""
+        with get_tracer().span("chat", mode="async", input_bytes=len(user_input)) as turn:
+            try:
+                fast_response = await asyncio.to_thread(self._try_without_agent, user_input)
+                if fast_response is not None:
+                    return self._finish_turn(turn, fast_response)
+                
+                # Retrieval is CPU-bound, keep it off the event loop
+                inputs, retrieval = await asyncio.to_thread(self._agent_inputs, user_input)
+                cacheable = self._is_cacheable(user_input)
+                
+                counter = PromptTokenCounter()
+                with get_tracer().span("agent"):
+                    result = await self.agent_executor.ainvoke(inputs, config={"callbacks": self._callbacks(counter)})
+                self._report_usage(counter, retrieval)
+                self._cache_answer(user_input, result, cacheable)
+                
+                return self._finish_turn(turn, result["output"])
             
-        except Exception as e:
-            return f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question."
+            except Exception as e:
+                turn.record_error(f"{type(e).__name__}: {str(e)}")
+                return f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question."
+    
+    def stream_chat(self, user_input: str) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming chat interface
+        
+        Yields events as they happen: {"type": "status", "text": ...} for tool progress,
+        {"type": "token", "text": ...} for answer tokens, {"type": "discard"} when tokens
+        streamed so far preceded a tool call, and finally {"type": "done", "output": ...}
+        with the complete response.
+        """
+        events = queue.Queue()
+        
+        def run():
+            with get_tracer().span("chat", mode="stream", input_bytes=len(user_input)) as turn:
+                try:
+                    events.put(status_event("🤔 Thinking…"))
+                    fast_response = self._try_without_agent(user_input)
+                    if fast_response is not None:
+                        events.put(token_event(fast_response))
+                        events.put(done_event(self._finish_turn(turn, fast_response)))
+                        return
+                    
+                    inputs, retrieval = self._agent_inputs(user_input)
+                    cacheable = self._is_cacheable(user_input)
+                    counter = PromptTokenCounter()
+                    with get_tracer().span("agent"):
+                        result = self.agent_executor.invoke(
+                            inputs,
+                            config={"callbacks": self._callbacks(StreamingEventHandler(events), counter)}
+                        )
+                    self._report_usage(counter, retrieval)
+                    self._cache_answer(user_input, result, cacheable)
+                    events.put(done_event(self._finish_turn(turn, result["output"])))
+                except Exception as e:
+                    turn.record_error(f"{type(e).__name__}: {str(e)}")
+                    events.put(done_event(
+                        f"I apologize, but I encountered an error: {str(e)}. Please try rephrasing your question."
+                    ))
+        
+        # The worker runs in a copy of the caller's context so its spans join the caller's trace
+        threading.Thread(target=contextvars.copy_context().run, args=(run,), name="chat-stream", daemon=True).start()
+        while True:
+            event = events.get()
+            yield event
+            if event["type"] == "done":
+                return
+    
+    def _callbacks(self, *handlers) -> list:
+        """Return the callback handlers for an agent run, adding LLM-call spans while tracing"""
+        if get_tracer().enabled:
+            return [*handlers, TracingCallbackHandler()]
+        return list(handlers)
+    
+    def _finish_turn(self, turn, output: str) -> str:
+        """Record how the turn was answered and its token usage on the turn span"""
+        turn.set_attributes({
+            key: value for key, value in self.last_turn_usage.items()
+            if isinstance(value, (int, float, str)) and key != "answer_cache_id"
+        })
+        turn.set_attribute("output_bytes", len(output))
+        return output
+    
+    def _report_usage(self, counter: PromptTokenCounter, retrieval: Dict[str, Any]):
+        """Record and log how many prompt tokens the turn cost and where they came from"""
+        self.last_turn_usage = {
+            "route": "agent",
+            "llm_calls": counter.llm_calls,
+            "prompt_tokens": counter.prompt_tokens,
+            "reported_prompt_tokens": counter.reported_prompt_tokens,
+            "completion_tokens": counter.completion_tokens,
+            "context_tokens": retrieval.get("tokens", 0),
+            "context_tokens_saved": retrieval.get("saved_tokens", 0),
+            "chunks_injected": len(retrieval.get("chunk_ids", [])),
+            "chunks_already_seen": retrieval.get("already_seen", 0),
+            "chunks_below_threshold": retrieval.get("below_threshold", 0),
+            "memory_tokens": self.memory.token_count(),
+            "memory_budget": self.memory.max_token_limit
+        }
+        usage = self.last_turn_usage
+        reported = f", provider reported {usage['reported_prompt_tokens']:,}" if usage["reported_prompt_tokens"] else ""
+        logger.info(
+            f"📏 Prompt tokens this turn: {usage['prompt_tokens']:,} over {usage['llm_calls']} LLM call(s){reported} "
+            f"(RAG context {usage['context_tokens']:,}, memory {usage['memory_tokens']:,}/{usage['memory_budget']:,})"
+        )
+        if retrieval.get("retrieved"):
+            logger.info(
+                f"📚 Context: {usage['chunks_injected']} new chunk(s), {usage['chunks_already_seen']} already seen, "
+                f"{usage['chunks_below_threshold']} below relevance {self.knowledge_base.min_relevance:.2f}, "
+                f"{usage['context_tokens_saved']:,} tokens saved"
+            )
     
     def reset_conversation(self):
         """Reset the conversation memory"""
         self.memory.clear()
+        self.last_turn_usage = {}
     
     def get_conversation_history(self):
         """Get the current conversation history"""
         return self.memory.chat_memory.messages
     
     def extract_shipping_info(self, text: str) -> Dict[str, Any]:
-        """Extract shipping information from user text using regex"""
-        info = {}
-        
-        # Extract weight patterns
-        weight_patterns = [
-            r'(\d+(?:\.\d+)?)\s*kg',
-            r'(\d+(?:\.\d+)?)\s*kilogram',
-            r'(\d+(?:\.\d+)?)\s*gram',
-            r'(\d+(?:\.\d+)?)\s*g\b'
-        ]
-        
-        for pattern in weight_patterns:
-            match = re.search(pattern, text.lower())
-            if match:
-                weight_value = float(match.group(1))
-                if 'kg' in pattern or 'kilogram' in pattern:
-                    info['weight'] = weight_value * 1000  # Convert to grams
-                else:
-                    info['weight'] = weight_value
-                break
-        
-        # Extract value patterns
-        value_patterns = [
-            r'rp\s*(\d+(?:,\d+)*(?:\.\d+)?)',
-            r'rupiah\s*(\d+(?:,\d+)*(?:\.\d+)?)',
-            r'(\d+(?:,\d+)*(?:\.\d+)?)\s*rupiah'
-        ]
-        
-        for pattern in value_patterns:
-            match = re.search(pattern, text.lower())
-            if match:
-                value_str = match.group(1).replace(',', '')
-                info['item_value'] = float(value_str)
-                break
-        
-        # Extract location patterns
-        location_keywords = ['dari', 'from', 'ke', 'to', 'menuju', 'asal']
-        for keyword in location_keywords:
-            pattern = f'{keyword}\\s+([A-Za-z\\s]+?)(?:\\s+(?:ke|to|menuju)|$)'
-            match = re.search(pattern, text.lower())
-            if match:
-                location = match.group(1).strip()
-                if keyword in ['dari', 'from', 'asal']:
-                    info['origin'] = location
-                else:
-                    info['destination'] = location
-        
-        return info
-
+        """Extract shipping information (origin, destination, weight in grams, item value, COD) from user text"""
+        return extract_shipping_slots(text)
+    
+    def _resolve_unambiguous(self, keyword: str) -> Optional[Dict[str, Any]]:
+        """Return the location for a keyword only if the search leaves no choice to make"""
+        locations = find_locations(keyword)
+        if len(locations) == 1:
+            return locations[0]
+        
+        exact = [location for location in locations if location["display_name"].strip().lower() == keyword.strip().lower()]
+        return exact[0] if len(exact) == 1 else None
+    
+    def _try_without_agent(self, user_input: str) -> Optional[str]:
+        """Answer from the quote fast path or the answer cache, or return None to run the agent"""
+        with get_tracer().span("fast_path") as span:
+            response = self._try_fast_path(user_input)
+            span.set_attribute("hit", response is not None)
+        if response is None:
+            with get_tracer().span("answer_cache") as span:
+                response = self._try_answer_cache(user_input)
+                span.set_attribute("hit", response is not None)
+        return response
+    
+    def _is_generic_question(self, user_input: str) -> bool:
+        """
+        Return True for questions whose answer does not depend on a particular shipment
+        
+        "Can I use COD?" or "how long does JNE take?" qualify; anything naming a location,
+        weight or item value, and short replies to the assistant's last question, do not.
+        """
+        if should_skip_retrieval(user_input):
+            return False
+        info = self.extract_shipping_info(user_input)
+        return not any(info.get(slot) for slot in SHIPMENT_SLOTS)
+    
+    def _is_cacheable(self, user_input: str) -> bool:
+        """Return True when the agent's answer to this turn may be stored in the answer cache"""
+        # Answers given once shipment details are known may refer to them
+        return (
+            self.answer_cache is not None
+            and self.knowledge_base.is_ready()
+            and not any(self.memory.slots.get(slot) for slot in SHIPMENT_SLOTS + ("origin_id", "destination_id"))
+            and self._is_generic_question(user_input)
+        )
+    
+    def _try_answer_cache(self, user_input: str) -> Optional[str]:
+        """Return a cached answer to a semantically equivalent generic question, or None"""
+        # The lookup reuses the knowledge base embeddings, so it never waits for them to load
+        if self.answer_cache is None or not self.knowledge_base.is_ready() or not self._is_generic_question(user_input):
+            return None
+        cached = self.answer_cache.get(self.knowledge_base.embed_query(user_input))
+        if cached is None:
+            return None
+        
+        self.memory.save_context({"raw_input": user_input}, {"output": cached["answer"]})
+        self.last_turn_usage = {
+            "route": "answer_cache",
+            "llm_calls": 0,
+            "prompt_tokens": 0,
+            "answer_cache_id": cached["id"],
+            "answer_cache_similarity": cached["similarity"],
+            "memory_tokens": self.memory.token_count(),
+            "memory_budget": self.memory.max_token_limit
+        }
+        logger.info(f"♻️ Answered from cache (similarity {cached['similarity']:.3f} to \"{cached['question']}\")")
+        return cached["answer"]
+    
+    def _cache_answer(self, user_input: str, result: Dict[str, Any], cacheable: bool):
+        """Store the agent's answer when the question was generic and no tool was called"""
+        if cacheable and not result.get("intermediate_steps") and result.get("output"):
+            self.answer_cache.set(user_input, self.knowledge_base.embed_query(user_input), result["output"])
+    
+    def invalidate_cached_answer(self, user_input: str) -> int:
+        """
+        Remove cached answers that would be served for this question, e.g. after a bad answer
+        
+        Returns:
+            Number of answers removed
+        """
+        if self.answer_cache is None:
+            return 0
+        return self.answer_cache.invalidate_similar(self.knowledge_base.embed_query(user_input))
+    
+    def _try_fast_path(self, user_input: str) -> Optional[str]:
+        """
+        Answer a fully specified quote request without the LLM
+        
+        Returns:
+            Formatted shipping options, or None when a slot is missing, a location is
+            ambiguous or the API call fails, in which case the agent handles the turn
+        """
+        info = self.extract_shipping_info(user_input)
+        # An unclear COD mention is left to the agent rather than quoted without COD
+        if not has_all_slots(info) or ("cod" not in info and mentions_cod(user_input)):
+            return None
+        
+        origin = self._resolve_unambiguous(info["origin"])
+        destination = self._resolve_unambiguous(info["destination"]) if origin else None
+        if origin is None or destination is None:
+            return None
+        
+        api = RajaOngkirAPI()
+        result = api.calculate_shipping_cost(
+            shipper_destination_id=int(origin["id"]),
+            receiver_destination_id=int(destination["id"]),
+            weight=int(info["weight"]),
+            item_value=int(info["item_value"]),
+            cod=info.get("cod", False)
+        )
+        if result.get("meta", {}).get("status") != "success":
+            return None
+        
+        response = (
+            f"From **{origin['display_name']}** (ID {origin['id']}) to **{destination['display_name']}** "
+            f"(ID {destination['id']}), {info['weight']:,.0f} g, item value Rp {info['item_value']:,.0f}:\n\n"
+            + api.format_shipping_results(result)
+        )
+        
+        # Keep the exchange in memory so follow-up questions have context; the resolved
+        # locations replace the names typed by the user in the slot summary
+        self.memory.save_context({"raw_input": user_input}, {"output": response})
+        self.memory.update_slots({
+            "origin": origin["display_name"],
+            "origin_id": str(origin["id"]),
+            "destination": destination["display_name"],
+            "destination_id": str(destination["id"])
+        })
+        self.last_turn_usage = {
+            "route": "fast_path",
+            "llm_calls": 0,
+            "prompt_tokens": 0,
+            "memory_tokens": self.memory.token_count(),
+            "memory_budget": self.memory.max_token_limit
+        }
+        return response
+    
 # Convenience function to create assistant instance
 def create_shipping_assistant():
-    """Create a new shipping assistant instance"""
+    """Create a new shipping assistant instance backed by the shared process-wide resources"""
     return ShippingAssistant()
@@ -0,0 +1,83 @@
+"""
+Streaming events for chat turns
+The agent runs in a worker thread; a callback handler turns LLM tokens and tool
+activity into events that the UI consumes as they happen
+"""
+
+import queue
+import re
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+def status_event(text: str) -> Dict[str, Any]:
+    return {"type": "status", "text": text}
+
+def token_event(text: str) -> Dict[str, Any]:
+    return {"type": "token", "text": text}
+
+def discard_event() -> Dict[str, Any]:
+    """Tokens streamed so far were the agent thinking aloud before a tool call, not the answer"""
+    return {"type": "discard"}
+
+def done_event(output: str) -> Dict[str, Any]:
+    return {"type": "done", "output": output}
+
+def describe_tool_start(name: str, inputs: Dict[str, Any]) -> Optional[str]:
+    """Return a progress message for a tool about to run"""
+    if name == "search_destination":
+        return f"🔍 Searching {inputs.get('keyword', 'locations')}…"
+    if name == "calculate_shipping_cost":
+        return "💰 Quoting shipping costs…"
+    if name == "calculate_shipping_matrix":
+        routes = len(inputs.get("origin_ids", [])) * len(inputs.get("destination_ids", [])) * len(inputs.get("weights", []))
+        return f"📊 Quoting {routes} route combinations…" if routes else "📊 Quoting routes…"
+    return f"🔧 Running {name}…"
+
+def describe_tool_end(name: str, output: str) -> Optional[str]:
+    """Return a progress message summarizing a finished tool call"""
+    if output.startswith("Error") or output.startswith("No locations"):
+        return f"⚠️ {output.splitlines()[0]}"
+    if name == "search_destination":
+        match = re.match(r"Found (\d+) location", output)
+        return f"📍 Found {match.group(1)} location(s)" if match else None
+    if name in ("calculate_shipping_cost", "calculate_shipping_matrix"):
+        services = sum(1 for line in output.splitlines() if line.startswith("• "))
+        return f"✅ Quoted {services} services" if services else "✅ Quote ready"
+    return None
+
+class StreamingEventHandler(BaseCallbackHandler):
+    """Puts token and tool-progress events on a queue while the agent runs"""
+
+    def __init__(self, events: queue.Queue):
+        self.events = events
+        self._tool_names: Dict[UUID, str] = {}
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if token:
+            self.events.put(token_event(token))
+
+    def on_agent_action(self, action: Any, **kwargs: Any) -> None:
+        self.events.put(discard_event())
+
+    def on_tool_start(
+        self,
+        serialized: Dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        inputs: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> None:
+        name = (serialized or {}).get("name", "tool")
+        self._tool_names[run_id] = name
+        message = describe_tool_start(name, inputs or {})
+        if message:
+            self.events.put(status_event(message))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        name = self._tool_names.pop(run_id, "tool")
+        message = describe_tool_end(name, str(getattr(output, "content", output)))
+        if message:
+            self.events.put(status_event(message))
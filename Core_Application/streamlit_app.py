@@ -7,6 +7,7 @@ import re
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shipping_assistant import create_shipping_assistant
+from resilience import get_resilience_stats
 
 # Set environment variables to prevent PyTorch issues
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
@@ -387,6 +388,8 @@ setTimeout(scrollToBottom, 100);
 def initialize_session_state():
     """Initialize session state variables"""
     if 'assistant' not in st.session_state:
+        # Model, vector store and LLM client are loaded once per process;
+        # a new browser session only creates its own conversation state
         with st.spinner("Initializing shipping assistant..."):
             st.session_state.assistant = create_shipping_assistant()
     
@@ -533,6 +536,11 @@ def main():
                 st.rerun()
         
         st.markdown("---")
+        with st.expander("📡 API Status", expanded=False):
+            for endpoint, stats in get_resilience_stats().items():
+                breaker = stats["circuit_breaker"]
+                st.markdown(f"**{endpoint}**: circuit `{breaker['state']}` · {breaker['failures']} failures · {stats['rate_limiter']['rejected']} rate-limited")
+        
         st.markdown("""
         <div style="text-align: center; color: #666; font-size: 12px;">
             <p>🚚 Powered by RajaOngkir API<br>
@@ -564,19 +572,38 @@ def main():
         # Add user message to history
         st.session_state.messages.append({"role": "user", "content": user_input})
         
-        # Get assistant response
-        with st.spinner("🤖 Checking shipping costs..."):
+        # Show the user message right away, then stream the assistant response into place
+        with st.chat_message("user", avatar="🧑"):
+            st.markdown(user_input)
+        
+        with st.chat_message("assistant", avatar="🤖"):
+            status_placeholder = st.empty()
+            response_placeholder = st.empty()
             try:
                 # Check if assistant is properly initialized
                 if not hasattr(st.session_state, 'assistant') or st.session_state.assistant is None:
                     st.error("Assistant not properly initialized. Please refresh the page.")
                     return
                 
-                response = st.session_state.assistant.chat(user_input)
+                response = ""
+                streamed = ""
+                for event in st.session_state.assistant.stream_chat(user_input):
+                    if event["type"] == "status":
+                        status_placeholder.caption(event["text"])
+                    elif event["type"] == "token":
+                        streamed += event["text"]
+                        response_placeholder.markdown(streamed + "▌")
+                    elif event["type"] == "discard":
+                        streamed = ""
+                        response_placeholder.empty()
+                    elif event["type"] == "done":
+                        response = event["output"]
+                status_placeholder.empty()
                 
                 # Validate response
                 if not response or not isinstance(response, str):
                     response = "❌ I couldn't generate a proper response. Please try again with a different query."
+                response_placeholder.markdown(response)
                 
                 # Add assistant response to history
                 st.session_state.messages.append({"role": "assistant", "content": response})
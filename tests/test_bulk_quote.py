@@ -0,0 +1,92 @@
+import argparse
+import json
+import os
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(PROJECT_ROOT, "AI_And_Tools"))
+sys.path.append(os.path.join(PROJECT_ROOT, "Core_Application"))
+
+import bulk_quote
+from cli import run_bulk
+
+@pytest.fixture
+def quoted(monkeypatch):
+    """Replace the RajaOngkir call with a canned response and record every quoted route"""
+    monkeypatch.setenv("TARIFF_CACHE_ENABLED", "false")
+    monkeypatch.setenv("DESTINATION_INDEX_ENABLED", "false")
+    calls = []
+
+    async def calculate_shipping_cost(self, shipper_destination_id, receiver_destination_id, weight, item_value, cod=False):
+        calls.append(receiver_destination_id)
+        return {
+            "meta": {"status": "success"},
+            "data": {"calculate_reguler": [
+                {"shipping_name": "JNE", "service_name": "REG", "grandtotal": 10000 + weight, "etd": "2 day"}
+            ]}
+        }
+
+    monkeypatch.setattr(bulk_quote.AsyncRajaOngkirAPI, "calculate_shipping_cost", calculate_shipping_cost)
+    return calls
+
+def write_input(path, destinations, weight=1000):
+    with open(path, "w", encoding="utf-8") as f:
+        for number, destination in enumerate(destinations, 1):
+            f.write(json.dumps({
+                "id": f"order-{number}", "origin_id": 1, "destination_id": destination,
+                "weight": weight, "item_value": 100000
+            }) + "\n")
+
+def identity(path):
+    with open(path, encoding="utf-8") as f:
+        return bulk_quote.input_identity(f)
+
+def bulk(input_path, output_path):
+    run_bulk(argparse.Namespace(
+        bulk=str(input_path), output=str(output_path), format=None, checkpoint=None, concurrency=2
+    ))
+    with open(output_path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_second_run_quotes_everything_again(tmp_path, quoted):
+    write_input(tmp_path / "orders.jsonl", range(1, 6))
+    first = bulk(tmp_path / "orders.jsonl", tmp_path / "quotes.jsonl")
+    assert not os.path.exists(tmp_path / "quotes.jsonl.checkpoint")
+
+    # Nightly rerun over an updated input written to the same output
+    write_input(tmp_path / "orders.jsonl", range(1, 6), weight=2000)
+    second = bulk(tmp_path / "orders.jsonl", tmp_path / "quotes.jsonl")
+
+    assert [row["row"] for row in first] == [row["row"] for row in second] == [1, 2, 3, 4, 5]
+    assert [row["cheapest_total"] for row in second] == [12000] * 5
+    assert len(quoted) == 10
+
+def test_interrupted_run_resumes_without_duplicates(tmp_path, quoted):
+    write_input(tmp_path / "orders.jsonl", range(1, 11))
+    source = identity(tmp_path / "orders.jsonl")
+    bulk(tmp_path / "orders.jsonl", tmp_path / "quotes.jsonl")
+    with open(tmp_path / "quotes.jsonl", "rb") as f:
+        lines = f.readlines()
+
+    # Simulate an interrupt after row 6 was written but before its checkpoint was saved
+    with open(tmp_path / "quotes.jsonl", "wb") as f:
+        f.writelines(lines[:6])
+    bulk_quote.save_checkpoint(str(tmp_path / "quotes.jsonl.checkpoint"), 5, sum(map(len, lines[:5])), source)
+    quoted.clear()
+
+    rows = bulk(tmp_path / "orders.jsonl", tmp_path / "quotes.jsonl")
+    assert [row["row"] for row in rows] == list(range(1, 11))
+    assert quoted == list(range(6, 11))
+
+def test_checkpoint_for_another_input_is_ignored(tmp_path, quoted):
+    write_input(tmp_path / "old.jsonl", range(1, 4))
+    old_source = identity(tmp_path / "old.jsonl")
+    with open(tmp_path / "quotes.jsonl", "w", encoding="utf-8") as f:
+        f.write('{"row": 1, "stale": true}\n')
+    bulk_quote.save_checkpoint(str(tmp_path / "quotes.jsonl.checkpoint"), 3, 26, old_source)
+
+    write_input(tmp_path / "new.jsonl", range(7, 11))
+    rows = bulk(tmp_path / "new.jsonl", tmp_path / "quotes.jsonl")
+    assert [row["destination_id"] for row in rows] == [7, 8, 9, 10]
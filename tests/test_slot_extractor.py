@@ -0,0 +1,104 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AI_And_Tools"))
+
+from slot_extractor import extract_shipping_slots, has_all_slots, mentions_cod, parse_number
+
+@pytest.mark.parametrize("text, expected", [
+    ("1,5", 1.5),
+    ("2.5", 2.5),
+    ("1.000", 1000),
+    ("500,000", 500000),
+    ("1.500.000", 1500000),
+    ("1.250,50", 1250.5),
+])
+def test_parse_number(text, expected):
+    assert parse_number(text) == expected
+
+@pytest.mark.parametrize("text, grams", [
+    ("kirim 1,5 kg ke Bandung", 1500),
+    ("paket 2.5kg", 2500),
+    ("berat 500 gram", 500),
+    ("3 ons saja", 300),
+])
+def test_weight_in_grams(text, grams):
+    assert extract_shipping_slots(text)["weight"] == grams
+
+@pytest.mark.parametrize("text, value", [
+    ("nilai 500rb", 500_000),
+    ("harganya 1jt", 1_000_000),
+    ("barang Rp 1.500.000", 1_500_000),
+    ("Rp1,5jt", 1_500_000),
+    ("worth 200k", 200_000),
+    ("500000 rupiah", 500_000),
+])
+def test_item_value_in_rupiah(text, value):
+    assert extract_shipping_slots(text)["item_value"] == value
+
+def test_weight_number_is_not_read_as_value():
+    info = extract_shipping_slots("kirim 1,5 kg dari Jakarta ke Surabaya nilai 500rb")
+    assert info == {
+        "weight": 1500,
+        "item_value": 500_000,
+        "origin": "jakarta",
+        "destination": "surabaya"
+    }
+    assert has_all_slots(info)
+
+@pytest.mark.parametrize("text", [
+    "kirim 1 kg ke Bandung pakai COD",
+    "bisa bayar di tempat?",
+    "ship 2kg to Medan, cash on delivery please",
+])
+def test_cod_requested(text):
+    assert extract_shipping_slots(text)["cod"] is True
+
+@pytest.mark.parametrize("text", [
+    "kirim 1 kg ke Bandung tanpa COD",
+    "ongkir non-cod ke Medan",
+    "no COD, 2kg to Bali",
+    "bukan cod ya kak",
+    "tidak pakai cod",
+    "ship it without cash on delivery",
+    "I don't want COD",
+])
+def test_cod_declined(text):
+    assert extract_shipping_slots(text)["cod"] is False
+
+@pytest.mark.parametrize("text", [
+    "bisa cod gak?",
+    "pakai cod atau tidak",
+    "cod ke Jakarta, tanpa cod ke Bandung",
+])
+def test_unclear_cod_is_left_unset(text):
+    info = extract_shipping_slots(text)
+    assert "cod" not in info
+    assert mentions_cod(text)
+
+def test_no_cod_mention():
+    text = "kirim 1 kg dari Jakarta ke Bandung nilai 100rb"
+    assert "cod" not in extract_shipping_slots(text)
+    assert not mentions_cod(text)
+
+@pytest.mark.parametrize("text, origin, destination", [
+    ("I want to know the cost from Jakarta to Surabaya for 2kg worth 500k", "jakarta", "surabaya"),
+    ("I need to send 1kg from Bandung to Medan", "bandung", "medan"),
+    ("ship 2kg to Medan from Bali worth 1jt", "bali", "medan"),
+    ("Jakarta ke Bandung 1kg 100rb", "jakarta", "bandung"),
+])
+def test_destination_follows_a_place_marker(text, origin, destination):
+    info = extract_shipping_slots(text)
+    assert (info.get("origin"), info.get("destination")) == (origin, destination)
+
+@pytest.mark.parametrize("text", [
+    "saya mau kirim barang ke teman di surabaya dari jakarta 2kg 500rb",
+    "from Jakarta to my friend in Bandung 1kg 100rb",
+    "how to use cod?",
+])
+def test_non_place_after_marker_is_not_a_destination(text):
+    info = extract_shipping_slots(text)
+    assert "destination" not in info
+    assert not has_all_slots(info)
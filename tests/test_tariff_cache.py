@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "AI_And_Tools"))
+
+from tariff_cache import TariffCache
+
+SUCCESS = {"meta": {"status": "success"}, "data": {}}
+
+def store(cache, weight, ttl):
+    cache.set(1, 2, weight, 100000, False, None, None, SUCCESS, ttl=ttl)
+
+def test_expired_entries_are_purged_after_retention(tmp_path):
+    cache = TariffCache(str(tmp_path / "tariffs.db"), stale_retention=100, purge_every=3)
+    store(cache, 1000, ttl=-500)
+    store(cache, 2000, ttl=-50)
+    assert cache.get_stats()["entries"] == 2
+
+    # The third write triggers a purge; the recently expired entry stays as a stale fallback
+    store(cache, 3000, ttl=60)
+    assert cache.get_stats()["entries"] == 2
+    assert cache.get(1, 2, 1000, 100000, allow_stale=True) is None
+    assert cache.get(1, 2, 2000, 100000, allow_stale=True) == SUCCESS
+    assert cache.get(1, 2, 3000, 100000) == SUCCESS
+
+def test_purge_on_open(tmp_path):
+    path = str(tmp_path / "tariffs.db")
+    cache = TariffCache(path, stale_retention=100, purge_every=0)
+    for weight in range(5):
+        store(cache, weight, ttl=-500)
+    assert cache.get_stats()["entries"] == 5
+
+    reopened = TariffCache(path, stale_retention=100)
+    assert reopened.get_stats()["entries"] == 0
+    assert reopened.get_stats()["purged"] == 5